@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+_results = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--benchmark-json", metavar="PATH", help="Write the benchmark results to PATH")
+    group.addoption("--benchmark-compare", metavar="PATH", help="Fail benchmarks that got slower than in this earlier --benchmark-json file")
+    group.addoption("--benchmark-tolerance", type=float, default=0.25, help="Allowed wall time increase over the baseline (default: 0.25 = 25%%)")
+
+
+@pytest.fixture
+def run_scenario(request):
+    """Runs a benchmarks.scenarios command in a fresh process and returns its result, checked against the baseline."""
+    config = request.config
+    baseline = {}
+    # The options are only registered when benchmarks/ is named on the command line
+    compare_path = config.getoption("--benchmark-compare", None)
+    tolerance = config.getoption("--benchmark-tolerance", 0.25)
+    if compare_path:
+        with open(compare_path, 'r', encoding='utf-8') as f:
+            baseline = {result["name"]: result for result in json.load(f)}
+
+    def run(*args):
+        command = [sys.executable, "-m", "benchmarks.scenarios", *map(str, args)]
+        completed = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True)
+        assert completed.returncode == 0, completed.stderr
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["name"] = request.node.name
+        _results.append(result)
+
+        previous = baseline.get(result["name"])
+        if previous is not None:
+            # The absolute slack keeps sub-second scenarios from failing on timer noise
+            limit = previous["wall"] * (1 + tolerance) + 0.05
+            assert result["wall"] <= limit, f"{result['name']} took {result['wall']:.2f}s, baseline {previous['wall']:.2f}s"
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--benchmark-json", None)
+    if path and _results:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_results, f, indent=4)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmarks")
+    for result in _results:
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["stages"].items())
+        extra = f" · {result['variants_per_second']:.1f} variants/s" if "variants_per_second" in result else ""
+        terminalreporter.write_line(
+            f"{result['name']:<36} {result['wall']:>7.2f}s · peak RSS {result['peak_rss'] / (1024 * 1024):.0f} MB{extra} · {stages}"
+        )
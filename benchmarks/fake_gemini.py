@@ -0,0 +1,86 @@
+import io
+import json
+import time
+import base64
+import threading
+
+import httpx
+from PIL import Image
+
+IMAGE_SIZES = {"4K": 4096, "2K": 2048, "1K": 1024}
+ERROR_STATUSES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+class FakeGeminiTransport(httpx.BaseTransport):
+    """Local stand-in for the Gemini REST API, plugged into genai.Client through its httpx client.
+
+    Answers generateContent requests without network access: image requests get a solid PNG of the
+    requested size, JSON (schema) requests get `json_response` and everything else gets `text_response`.
+    streamGenerateContent responses are sent as server-sent events, split into chunks of stream_chunk_size
+    characters. Status codes queued in `error_statuses` (e.g. 429, 503) are returned as API errors for the
+    next requests. Every response is delayed by `latency` seconds (or `image_latency` for image requests)
+    to simulate model inference time.
+    """
+
+    def __init__(self, text_response="[]", json_response=None, image_color=(128, 128, 128, 255), stream_chunk_size=16,
+                 latency=0.0, image_latency=None):
+        self.text_response = text_response
+        self.json_response = json_response if json_response is not None else {
+            "is_face_valid": True, "is_torso_seams_valid": True, "is_legs_valid": True, "feedback": ""
+        }
+        self.image_color = image_color
+        self.stream_chunk_size = stream_chunk_size
+        self.latency = latency
+        self.image_latency = latency if image_latency is None else image_latency
+        self.error_statuses = []
+        self.requests = []
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def handle_request(self, request):
+        body = json.loads(request.content or b"{}")
+        model, _, method = request.url.path.rsplit("/", 1)[-1].partition(":")
+        with self._lock:
+            self.requests.append((model, body))
+            status = self.error_statuses.pop(0) if self.error_statuses else None
+        if status is not None:
+            error_status = ERROR_STATUSES.get(status, "INTERNAL")
+            return httpx.Response(status, json={"error": {"code": status, "message": f"Fake {error_status}", "status": error_status}})
+
+        generation_config = body.get("generationConfig", {})
+        is_image = "IMAGE" in generation_config.get("responseModalities", [])
+        delay = self.image_latency if is_image else self.latency
+        if delay:
+            time.sleep(delay)
+
+        if is_image:
+            image_size = generation_config.get("imageConfig", {}).get("imageSize", "2K")
+            part = {"inlineData": {"mimeType": "image/png", "data": self._image_base64(image_size)}}
+        elif generation_config.get("responseMimeType") == "application/json":
+            part = {"text": json.dumps(self.json_response)}
+        else:
+            part = {"text": self.text_response}
+
+        if method != "streamGenerateContent":
+            return httpx.Response(200, json=self._response(part))
+
+        if "text" in part:
+            text = part["text"]
+            parts = [{"text": text[i:i + self.stream_chunk_size]} for i in range(0, len(text), self.stream_chunk_size)]
+        else:
+            parts = [part]
+        events = "".join(f"data: {json.dumps(self._response(p))}\r\n\r\n" for p in parts)
+        return httpx.Response(200, content=events.encode("utf-8"), headers={"Content-Type": "text/event-stream"})
+
+    @staticmethod
+    def _response(part):
+        return {"candidates": [{"content": {"role": "model", "parts": [part]}}]}
+
+    def _image_base64(self, image_size):
+        with self._lock:
+            if image_size not in self._images:
+                side = IMAGE_SIZES.get(image_size, 2048)
+                buffer = io.BytesIO()
+                Image.new("RGBA", (side, side), self.image_color).save(buffer, format="PNG")
+                self._images[image_size] = base64.b64encode(buffer.getvalue()).decode("ascii")
+            return self._images[image_size]
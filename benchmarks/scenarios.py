@@ -0,0 +1,153 @@
+"""Benchmark scenarios for the generation and grouping pipelines against the local fake Gemini backend.
+
+Each scenario runs in its own process, so the peak RSS it reports belongs to that scenario alone:
+
+    python -m benchmarks.scenarios generate --resolution 2K --latency 0.5
+    python -m benchmarks.scenarios group --variants 16 --resolution 2K
+
+The result is printed as one JSON object.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.client_registry import ClientRegistry
+from benchmarks.fake_gemini import IMAGE_SIZES, FakeGeminiTransport
+from src.pipeline import OutfitPipeline, warm_imports
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+def peak_rss_bytes():
+    """Peak resident set size of the current process."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def write_dds(path, resolution, color):
+    from PIL import Image
+
+    side = IMAGE_SIZES[resolution]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGBA", (side, side), color).save(path, format="DDS", pixel_format="DXT5")
+
+
+def make_pipeline(haydee_path, resolution, latency, image_latency, workers):
+    config = {
+        "gemini_api_key": "benchmark-key",
+        "haydee_path": str(haydee_path),
+        "author_name": "Benchmark",
+        "image_resolution": resolution,
+        "model_name": "fake-image-model",
+        "validator_model": "fake-validator-model",
+        "qa_mode": "sequential",
+        "group_workers": workers,
+    }
+    # Startup imports are measured by the app's startup report, not here
+    warm_imports()
+    transport = FakeGeminiTransport(latency=latency, image_latency=image_latency)
+    # The rate limiter must not be what is measured
+    clients = ClientRegistry(transport=transport, limiter=AdaptiveRateLimiter(requests_per_minute=60000, max_concurrency=16))
+    return OutfitPipeline(config, clients=clients), transport
+
+
+def collect_stages(pipeline):
+    stages = {}
+
+    def listener(event):
+        if event["event"] == "stage_end":
+            stages[event["stage"]] = stages.get(event["stage"], 0.0) + event["elapsed"]
+
+    pipeline.progress.subscribe(listener)
+    return stages
+
+
+def run_generate(resolution="2K", latency=0.0, image_latency=None):
+    """Full generate_mod run (Suit_D with QA, Suit_S and Suit_N), as started by the Generate tab."""
+    with tempfile.TemporaryDirectory(prefix="haydee_bench_") as temp_dir:
+        haydee_path = Path(temp_dir)
+        write_dds(haydee_path / "Outfits" / "Haydee" / "Suit_D.dds", resolution, (90, 90, 90, 255))
+        pipeline, transport = make_pipeline(haydee_path, resolution, latency, image_latency, workers=1)
+        stages = collect_stages(pipeline)
+
+        start = time.perf_counter()
+        pipeline.generate_mod("BenchMod", "benchmark style", True, True, True)
+        wall = time.perf_counter() - start
+
+    return {"scenario": "generate", "resolution": resolution, "latency": latency, "wall": wall,
+            "stages": stages, "requests": len(transport.requests), "peak_rss": peak_rss_bytes()}
+
+
+def run_group(variants=8, resolution="2K", workers=4, delete_sources=False):
+    """group_mods over N generated variants, as started by the Group Mods tab."""
+    with tempfile.TemporaryDirectory(prefix="haydee_bench_") as temp_dir:
+        haydee_path = Path(temp_dir)
+        outfits_dir = haydee_path / "Outfits"
+        template_dir = haydee_path / "template"
+        write_dds(template_dir / "Suit_D.dds", resolution, (200, 40, 40, 255))
+        write_dds(template_dir / "Suit_S.dds", resolution, (120, 120, 0, 255))
+        names = [f"Variant{index:03d}" for index in range(variants)]
+        for name in names:
+            shutil.copytree(template_dir, outfits_dir / name)
+            (outfits_dir / f"{name}.outfit").write_text(name, encoding="utf-8")
+        total_bytes = sum(path.stat().st_size for path in template_dir.iterdir()) * variants
+
+        pipeline, _ = make_pipeline(haydee_path, resolution, 0.0, None, workers=workers)
+        stages = collect_stages(pipeline)
+
+        start = time.perf_counter()
+        pipeline.group_mods("BenchPack", names, "color", delete_sources)
+        wall = time.perf_counter() - start
+
+    return {"scenario": "group", "resolution": resolution, "variants": variants, "workers": workers, "wall": wall,
+            "stages": stages, "variants_per_second": variants / wall, "mb_per_second": total_bytes / wall / (1024 * 1024),
+            "peak_rss": peak_rss_bytes()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scenarios")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    generate = subparsers.add_parser("generate")
+    generate.add_argument("--resolution", default="2K", choices=["2K", "4K"])
+    generate.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per text/JSON request")
+    generate.add_argument("--image-latency", type=float, help="Simulated seconds per image request (defaults to --latency)")
+
+    group = subparsers.add_parser("group")
+    group.add_argument("--variants", type=int, default=8)
+    group.add_argument("--resolution", default="2K", choices=["2K", "4K"])
+    group.add_argument("--workers", type=int, default=4)
+    group.add_argument("--delete-sources", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.scenario == "generate":
+        result = run_generate(args.resolution, args.latency, args.image_latency)
+    else:
+        result = run_group(args.variants, args.resolution, args.workers, args.delete_sources)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
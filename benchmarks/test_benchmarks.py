@@ -0,0 +1,25 @@
+import pytest
+
+LATENCY = 0.2
+
+GENERATION_STAGES = {"decode", "generate", "validate", "encode", "mask", "normal", "write"}
+
+
+@pytest.mark.parametrize("resolution", ["2K", "4K"])
+def test_generate_mod(run_scenario, resolution):
+    """End-to-end generation of all three maps with simulated model latency."""
+    result = run_scenario("generate", "--resolution", resolution, "--latency", LATENCY)
+
+    assert set(result["stages"]) == GENERATION_STAGES
+    # Diffuse generation, its validation, then the mask and normal requests
+    assert result["requests"] == 4
+    assert result["wall"] >= 3 * LATENCY
+
+
+@pytest.mark.parametrize("variants", [4, 16])
+def test_group_mods(run_scenario, variants):
+    """Grouping throughput for N variants at 2K."""
+    result = run_scenario("group", "--variants", variants, "--resolution", "2K")
+
+    assert set(result["stages"]) == {"migrate", "write"}
+    assert result["variants_per_second"] > 0
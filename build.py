@@ -1,20 +1,22 @@
+import argparse
 import os
 import subprocess
 import sys
 
-def build_exe():
+def build_exe(onedir=False):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
-    print("Starting application build...")
+    print(f"Starting application build ({'one-folder' if onedir else 'one-file'})...")
     
     # PyInstaller command
     # --noconsole hides the black terminal window
-    # --onefile packages everything into a single .exe
+    # --onefile packages everything into a single .exe, which is unpacked to a temp folder on every launch
+    # --onedir keeps the unpacked folder next to the .exe instead, for a faster cold start
     # --name sets the output file name
     command = [
         sys.executable, "-m", "PyInstaller",
         "--noconsole",
-        "--onefile",
+        "--onedir" if onedir else "--onefile",
         "--name", "HaydeeOutfitGenerator",
         "--clean",
         "main.py"
@@ -23,9 +25,12 @@ def build_exe():
     try:
         subprocess.run(command, check=True)
         print("\nBuild completed successfully!")
-        print(f"Executable file is located in the folder: {os.path.abspath('dist')}")
+        output_dir = os.path.join("dist", "HaydeeOutfitGenerator") if onedir else "dist"
+        print(f"Executable file is located in the folder: {os.path.abspath(output_dir)}")
     except subprocess.CalledProcessError as e:
         print(f"\nError during build: {e}")
 
 if __name__ == "__main__":
-    build_exe()
+    parser = argparse.ArgumentParser(description="Build the Haydee AI Outfit Generator executable with PyInstaller")
+    parser.add_argument("--onedir", action="store_true", help="Build a folder with the .exe and its unpacked libraries instead of a single .exe")
+    build_exe(onedir=parser.parse_args().onedir)
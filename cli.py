@@ -0,0 +1,212 @@
+"""Headless entry point for build boxes and scripts: python -m cli <command> [options]
+
+Uses the same settings.json as the GUI; command line flags override individual settings for that run only.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from src.config_manager import ConfigManager
+from src.job_queue import FAILED, JobQueue, parse_job_lines
+from src.pipeline import OutfitPipeline, parse_mod_list
+from src.progress import json_lines_listener
+from src.run_history import format_report
+from src.prompt_store import PromptStore
+
+# (flag, ConfigManager key, help)
+SETTING_FLAGS = [
+    ("--api-key", "gemini_api_key", "Gemini API key (defaults to settings.json or $GEMINI_API_KEY)"),
+    ("--haydee-path", "haydee_path", "Haydee game installation directory"),
+    ("--author", "author_name", "Author name written into the generated outfits"),
+    ("--resolution", "image_resolution", "Texture resolution (4K or 2K)"),
+    ("--model", "model_name", "Generation AI model"),
+    ("--validator-model", "validator_model", "Validation / prompt ideas AI model"),
+    ("--qa-mode", "qa_mode", "QA loop mode: sequential, speculative_keep, speculative_restart or best_of_n"),
+    ("--candidates", "best_of_n_candidates", "Number of candidates generated in best_of_n mode"),
+    ("--max-parallel-requests", "max_parallel_requests", "Concurrent Gemini requests in best_of_n mode"),
+    ("--api-rpm", "api_requests_per_minute", "Upper limit for Gemini requests per minute across all workers"),
+    ("--api-concurrency", "api_max_concurrency", "Upper limit for concurrent Gemini requests across all workers"),
+    ("--group-workers", "group_workers", "Variants validated and migrated in parallel when grouping (1 = serial)"),
+    ("--dds-quality", "dds_quality", "DDS encode quality: final or preview (half size, bilinear resampling, about 4x faster)"),
+    ("--encode-workers", "dds_encode_workers", "Processes compressing the final DDS textures (defaults to all cores)"),
+    ("--draft-resolution", "draft_resolution", "Resolution drafts are generated and validated at (default 2K)"),
+    ("--finalize-mode", "finalize_mode", "How finalize turns a draft into the mod: upscale (reuse the draft) or regenerate (at full resolution)"),
+]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Haydee AI Outfit Generator (headless)")
+    parser.add_argument("--config-dir", help="Directory containing settings.json (defaults to the GUI settings folder)")
+    parser.add_argument("--bypass-cache", action="store_true", help="Always call the AI instead of reusing cached prompt ideas and QA verdicts")
+    parser.add_argument("--temp-files", action="store_true", help="Pass decoded textures to the AI through PNG temp files instead of in memory")
+    parser.add_argument("--progress-json", metavar="PATH", help="Append stage start/end events (elapsed time, bytes) as JSON lines to PATH, or '-' for stdout")
+    for flag, _, help_text in SETTING_FLAGS:
+        parser.add_argument(flag, help=help_text)
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="Generate a single outfit mod")
+    gen.add_argument("name", help="Mod name, e.g. NeonSurge")
+    gen.add_argument("--style", default="", help="Style description (required unless --skip-d is set)")
+    gen.add_argument("--skip-d", action="store_true", help="Reuse the existing Suit_D instead of generating a new one")
+    gen.add_argument("--skip-s", action="store_true", help="Do not generate Suit_S")
+    gen.add_argument("--skip-n", action="store_true", help="Do not generate Suit_N")
+    gen.add_argument("--stale-only", action="store_true", help="Only rebuild outputs whose inputs changed since the last build (keeps the mod folder)")
+
+    draft = subparsers.add_parser("draft", help="Generate and validate a low-resolution Suit_D draft without building the mod")
+    draft.add_argument("name", help="Mod name, e.g. NeonSurge")
+    draft.add_argument("--style", required=True, help="Style description")
+
+    finalize = subparsers.add_parser("finalize", help="Build the mod at full resolution from its draft")
+    finalize.add_argument("name", help="Mod name of a previous draft")
+    finalize.add_argument("--skip-s", action="store_true", help="Do not generate Suit_S")
+    finalize.add_argument("--skip-n", action="store_true", help="Do not generate Suit_N")
+    finalize.add_argument("--force", action="store_true", help="Finalize the draft even if it did not pass QA validation")
+
+    ideas = subparsers.add_parser("ideas", help="Generate prompt ideas for a theme and print them as JSON")
+    ideas.add_argument("theme", help="Theme or concept, e.g. 'Lollipop and Strawberry'")
+    ideas.add_argument("--count", type=int, help="Number of concepts to generate (defaults to the prompt_ideas_count setting)")
+    ideas.add_argument("--save", action="store_true", help="Also add the ideas to the saved prompt list")
+
+    group = subparsers.add_parser("group", help="Group existing mods into one multi-mod")
+    group.add_argument("name", help="Multi-mod name, e.g. Rainbow")
+    group.add_argument("--sources", required=True, help="Comma-separated source mods, e.g. 'red, green, blue'")
+    group.add_argument("--slot", default="color", help="Slot category name (default: color)")
+    group.add_argument("--delete-sources", action="store_true", help="Delete the source mods after grouping")
+
+    batch = subparsers.add_parser("batch", help="Run the batch queue until it is empty")
+    batch.add_argument("--file", help="Text file with one 'Name: style' line per outfit to add to the queue")
+    batch.add_argument("--workers", type=int, help="Number of parallel workers (defaults to the batch_workers setting)")
+    batch.add_argument("--queue-file", help="Queue storage file (defaults to batch_queue.json in the config dir)")
+
+    history = subparsers.add_parser("history", help="Print p50/p95 stage durations of past generation runs")
+    history.add_argument("--json", action="store_true", help="Print the statistics as JSON instead of tables")
+
+    return parser
+
+
+def load_config(args):
+    """Returns the ConfigManager and the effective settings: a copy of settings.json with the command line overrides.
+
+    The overrides (and the API key from the environment) only apply to this run and are never written back.
+    """
+    config_manager = ConfigManager(config_dir=args.config_dir)
+    config = dict(config_manager.config)
+    if not config.get("gemini_api_key"):
+        config["gemini_api_key"] = os.getenv("GEMINI_API_KEY", "")
+    for flag, key, _ in SETTING_FLAGS:
+        value = getattr(args, flag.lstrip("-").replace("-", "_"))
+        if value:
+            config[key] = value
+    if args.bypass_cache:
+        config["bypass_response_cache"] = True
+    if args.temp_files:
+        config["in_memory_images"] = False
+    return config_manager, config
+
+
+def run_generate(args, config_manager, pipeline):
+    gen_d, gen_s, gen_n = not args.skip_d, not args.skip_s, not args.skip_n
+    if gen_d and not args.style:
+        raise ValueError("--style is required to generate a new Diffuse texture.")
+    if not gen_d and not gen_s and not gen_n:
+        raise ValueError("Nothing to generate. All options are disabled.")
+    pipeline.generate_mod(args.name, args.style, gen_d, gen_s, gen_n, stale_only=args.stale_only)
+    return 0
+
+
+def run_draft(args, config_manager, pipeline):
+    draft = pipeline.generate_draft(args.name, args.style)
+    print(draft["image"])
+    return 0
+
+
+def run_finalize(args, config_manager, pipeline):
+    pipeline.finalize_draft(args.name, gen_s=not args.skip_s, gen_n=not args.skip_n, allow_failed=args.force)
+    return 0
+
+
+def run_ideas(args, config_manager, pipeline):
+    ideas = pipeline.generate_prompt_ideas(args.theme, count=args.count)
+    if args.save:
+        prompt_store = PromptStore(config_manager.config_dir / "prompts.db")
+        prompt_store.import_legacy(config_manager)
+        prompt_store.add_many([i for i in ideas if "name" in i and "style" in i])
+        prompt_store.close()
+    print(json.dumps(ideas, indent=4, ensure_ascii=False))
+    return 0
+
+
+def run_group(args, config_manager, pipeline):
+    pipeline.group_mods(args.name, parse_mod_list(args.sources), args.slot, args.delete_sources)
+    return 0
+
+
+def run_batch(args, config_manager, pipeline):
+    queue_file = args.queue_file or config_manager.config_dir / "batch_queue.json"
+    queue = JobQueue(queue_file, runner=pipeline.generate_mod)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            for name, style in parse_job_lines(f.read()):
+                queue.add(name, style)
+
+    queue.start(workers=args.workers or pipeline.config.get("batch_workers", 2))
+    queue.wait()
+
+    failed = [job["name"] for job in queue.jobs if job["status"] == FAILED]
+    if failed:
+        logging.getLogger("haydee_outfit_gen").error(f"Failed jobs: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def run_history(args, config_manager, pipeline):
+    if args.json:
+        stats = {"runs": pipeline.run_history.run_stats(), "stages": pipeline.run_history.stage_stats()}
+        print(json.dumps(stats, indent=4, ensure_ascii=False))
+    else:
+        print(format_report(pipeline.run_history))
+    return 0
+
+
+COMMANDS = {
+    "generate": run_generate,
+    "draft": run_draft,
+    "finalize": run_finalize,
+    "ideas": run_ideas,
+    "group": run_group,
+    "batch": run_batch,
+    "history": run_history,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+
+    config_manager, config = load_config(args)
+    if not config.get("haydee_path") and args.command not in ("ideas", "history"):
+        logging.getLogger("haydee_outfit_gen").error("Haydee game path is not set. Use --haydee-path or the GUI settings.")
+        return 2
+
+    pipeline = OutfitPipeline(config, cache_dir=config_manager.config_dir / "cache")
+    events_file = None
+    if args.progress_json:
+        events_file = sys.stdout if args.progress_json == "-" else open(args.progress_json, 'a', encoding='utf-8')
+        pipeline.progress.subscribe(json_lines_listener(events_file))
+    try:
+        return COMMANDS[args.command](args, config_manager, pipeline)
+    except Exception as e:
+        logging.getLogger("haydee_outfit_gen").error(f"{args.command.capitalize()} failed: {e}")
+        return 1
+    finally:
+        config_manager.flush()
+        pipeline.dds_encoder.shutdown()
+        if events_file is not None and events_file is not sys.stdout:
+            events_file.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,17 @@
-from src.app import HaydeeGUI
+import time
+import multiprocessing
+STARTED = time.perf_counter()
+
+from src.startup import StartupTimer  # noqa: E402
 
 if __name__ == "__main__":
-    app = HaydeeGUI()
+    # DDS encoding runs on a process pool, whose workers re-launch the frozen executable. They must stop here,
+    # before the GUI and its toolkit are imported.
+    multiprocessing.freeze_support()
+    startup_timer = StartupTimer(STARTED)
+
+    from src.app import HaydeeGUI
+    startup_timer.mark("imports")
+
+    app = HaydeeGUI(startup_timer=startup_timer)
     app.mainloop()
@@ -1,66 +1,179 @@
 import threading
 import logging
-import tempfile
-import json
-import re
+import difflib
 from pathlib import Path
 import webbrowser
+from collections import deque
 import customtkinter as ctk
-from tkinter import filedialog, messagebox
-
-# Direct imports from the library
-from haydee_outfit_gen.mod_builder import ModBuilder, MultiModBuilder
-from haydee_outfit_gen.gemini_client import GeminiModClient
-from haydee_outfit_gen.image_processor import ImageProcessor
+from tkinter import TclError, filedialog, messagebox
 
+from src.cancellation import CancelToken, TaskCancelled
 from src.config_manager import ConfigManager
-
-# Monkey-patch google-genai Client to increase the default timeout to 10 minutes (600,000 ms)
-from google import genai
-original_client_init = genai.Client.__init__
-def new_client_init(self, *args, **kwargs):
-    if 'http_options' not in kwargs:
-        kwargs['http_options'] = {'timeout': 600000}
-    original_client_init(self, *args, **kwargs)
-genai.Client.__init__ = new_client_init
-
-import time
+from src.job_queue import JobQueue, parse_job_lines
+from src.pipeline import OutfitPipeline, parse_mod_list, warm_imports
+from src.mod_index import ModIndex
+from src.progress import ProgressTracker, format_duration
+from src.prompt_store import PromptStore
+from src.run_history import format_report
+from src.startup import StartupTimer
+
+# Prompt idea cards materialized per "Show more" page
+PROMPT_PAGE_SIZE = 30
+
+# Installed mods listed at once in the Group Mods tab, and how often the list is re-scanned
+MOD_LIST_LIMIT = 200
+MOD_INDEX_POLL_MS = 5000
+
+# Settings panel label -> "qa_mode" config value
+QA_MODE_LABELS = {
+    "Sequential": "sequential",
+    "Speculative (keep next attempt)": "speculative_keep",
+    "Speculative (restart with feedback)": "speculative_restart",
+    "Best-of-N (parallel candidates)": "best_of_n",
+}
+
+# Settings panel label -> "dds_quality" config value
+DDS_QUALITY_LABELS = {
+    "Final (Lanczos)": "final",
+    "Fast preview (half size)": "preview",
+}
+
+# Settings panel label -> "finalize_mode" config value
+FINALIZE_MODE_LABELS = {
+    "Upscale the draft": "upscale",
+    "Regenerate at full resolution": "regenerate",
+}
+
+# Longest side of the draft preview in the Generate tab
+DRAFT_PREVIEW_SIZE = 256
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
 class CustomTextHandler(logging.Handler):
-    def __init__(self, textbox):
+    """Queues log records from any thread and writes them to the console in batches on a fixed interval.
+
+    Both the pending queue and the console history are capped at max_lines, so heavy logging
+    over a long batch session cannot flood the Tk event loop or grow the textbox without bound.
+    """
+
+    def __init__(self, textbox, flush_interval_ms=100, max_lines=2000):
         super().__init__()
         self.textbox = textbox
+        self.flush_interval_ms = flush_interval_ms
+        self.max_lines = max_lines
+        self._pending = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self.textbox.after(self.flush_interval_ms, self._drain)
 
     def emit(self, record):
         msg = self.format(record)
-        self.textbox.after(0, self.append_text, msg)
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(msg)
+
+    def _drain(self):
+        try:
+            self.flush_pending()
+            self.textbox.after(self.flush_interval_ms, self._drain)
+        except TclError:
+            # The console was destroyed together with the window
+            pass
+
+    def flush_pending(self):
+        with self._lock:
+            messages = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+
+        if dropped:
+            messages.insert(0, f"... {dropped} log lines skipped ...")
+        if messages:
+            self.append_text("\n".join(messages))
 
     def append_text(self, msg):
         self.textbox.configure(state="normal")
         self.textbox.insert("end", msg + "\n")
+
+        # Ring buffer: drop the oldest lines beyond max_lines
+        line_count = int(self.textbox.index("end-1c").split(".")[0]) - 1
+        if line_count > self.max_lines:
+            self.textbox.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+
         self.textbox.see("end")
         self.textbox.configure(state="disabled")
 
 class HaydeeGUI(ctk.CTk):
-    def __init__(self):
+    def __init__(self, startup_timer=None):
         super().__init__()
+        self.startup_timer = startup_timer if startup_timer is not None else StartupTimer()
 
         self.title("Haydee AI Outfit Generator")
         self.geometry("950x750")
         self.minsize(850, 650)
 
         self.config_manager = ConfigManager()
+        self.prompt_store = PromptStore(self.config_manager.config_dir / "prompts.db")
+        self.prompt_store.import_legacy(self.config_manager)
+        haydee_path = self.config_manager.config.get("haydee_path")
+        self.mod_index = ModIndex(
+            self.config_manager.config_dir / "mod_index.json",
+            outfits_dir=Path(haydee_path) / "Outfits" if haydee_path else None,
+        )
+        self.pipeline = OutfitPipeline(self.config_manager.config, cache_dir=self.config_manager.config_dir / "cache")
+        self.job_queue = JobQueue(
+            self.config_manager.config_dir / "batch_queue.json",
+            runner=self.pipeline.generate_mod,
+            on_change=lambda: self.after(0, self._render_batch_jobs),
+        )
 
         self._build_ui()
         self._load_settings()
         self._setup_logging()
+        self._resume_batch_queue()
+        self._poll_mod_index()
         
         # Setup universal hotkeys fix for non-English layouts
         self._setup_universal_hotkeys()
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._update_api_status()
+
+        self.startup_timer.mark("window built")
+        self.after(0, self._on_first_frame)
+
+    def _on_first_frame(self):
+        """Once the window is up, imports the AI SDK and imaging libraries in the background for the first task."""
+        self.startup_timer.mark("first frame")
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            warm_imports()
+            self.startup_timer.mark("AI SDK ready")
+        except Exception as e:
+            self.logger.warning(f"Could not preload the AI SDK: {e}")
+        self.logger.info(self.startup_timer.report())
+
+    def _update_api_status(self):
+        """Shows the current request rate, in-flight requests and queue depth of the shared rate limiter."""
+        limiter = self.pipeline.clients.limiter
+        if limiter is not None:
+            stats = limiter.stats()
+            self.lbl_api_status.configure(
+                text=f"API: {stats['rate']:.0f} req/min · {stats['in_flight']}/{stats['limit']} active · {stats['waiting']} waiting"
+            )
+        self.after(1000, self._update_api_status)
+
+    def _on_close(self):
+        """Writes pending settings and prompt changes before the window goes away."""
+        self.config_manager.flush()
+        self.prompt_store.close()
+        self.pipeline.dds_encoder.shutdown()
+        self.destroy()
+
     def _setup_universal_hotkeys(self):
         """Binds Ctrl+C/V/X/Z/A handling to physical keycodes (supports any language layout)."""
         self.bind('<Control-KeyPress>', self._universal_ctrl_handler)
@@ -113,7 +226,7 @@ class HaydeeGUI(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         # === LEFT PANEL (Settings) ===
-        self.left_frame = ctk.CTkFrame(self)
+        self.left_frame = ctk.CTkScrollableFrame(self)
         self.left_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
         ctk.CTkLabel(self.left_frame, text="⚙️ Settings", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=(20, 20))
@@ -149,6 +262,16 @@ class HaydeeGUI(ctk.CTk):
         self.combo_res = ctk.CTkComboBox(self.left_frame, values=["4K", "2K"])
         self.combo_res.pack(fill="x", padx=20, pady=(0, 15))
 
+        # DDS encode quality
+        ctk.CTkLabel(self.left_frame, text="DDS Encode Quality:").pack(anchor="w", padx=20)
+        self.combo_dds_quality = ctk.CTkComboBox(self.left_frame, values=list(DDS_QUALITY_LABELS))
+        self.combo_dds_quality.pack(fill="x", padx=20, pady=(0, 15))
+
+        # How an approved draft becomes the final mod
+        ctk.CTkLabel(self.left_frame, text="Finalize Drafts By:").pack(anchor="w", padx=20)
+        self.combo_finalize_mode = ctk.CTkComboBox(self.left_frame, values=list(FINALIZE_MODE_LABELS))
+        self.combo_finalize_mode.pack(fill="x", padx=20, pady=(0, 15))
+
         # Generation Model Name
         ctk.CTkLabel(self.left_frame, text="Generation AI Model:").pack(anchor="w", padx=20)
         self.entry_model = ctk.CTkEntry(self.left_frame, placeholder_text="gemini-3.1-flash-image-preview")
@@ -157,7 +280,30 @@ class HaydeeGUI(ctk.CTk):
         # Validation Model Name
         ctk.CTkLabel(self.left_frame, text="Validation AI Model:").pack(anchor="w", padx=20)
         self.entry_validator_model = ctk.CTkEntry(self.left_frame, placeholder_text="gemini-3.1-pro-preview")
-        self.entry_validator_model.pack(fill="x", padx=20, pady=(0, 20))
+        self.entry_validator_model.pack(fill="x", padx=20, pady=(0, 15))
+
+        # QA Loop Mode
+        ctk.CTkLabel(self.left_frame, text="QA Loop Mode:").pack(anchor="w", padx=20)
+        self.combo_qa_mode = ctk.CTkComboBox(self.left_frame, values=list(QA_MODE_LABELS))
+        self.combo_qa_mode.pack(fill="x", padx=20, pady=(0, 15))
+
+        # Best-of-N candidates & concurrency limit
+        self.frame_best_of_n = ctk.CTkFrame(self.left_frame, fg_color="transparent")
+        self.frame_best_of_n.pack(fill="x", padx=20, pady=(0, 15))
+        ctk.CTkLabel(self.frame_best_of_n, text="Candidates (N):").pack(side="left")
+        self.entry_best_of_n = ctk.CTkEntry(self.frame_best_of_n, width=45)
+        self.entry_best_of_n.pack(side="left", padx=(5, 10))
+        ctk.CTkLabel(self.frame_best_of_n, text="Parallel:").pack(side="left")
+        self.entry_max_parallel = ctk.CTkEntry(self.frame_best_of_n, width=45)
+        self.entry_max_parallel.pack(side="left", padx=(5, 0))
+
+        # Response cache for prompt ideas and QA verdicts
+        self.check_bypass_cache = ctk.CTkCheckBox(self.left_frame, text="Bypass AI response cache")
+        self.check_bypass_cache.pack(anchor="w", padx=20, pady=(0, 10))
+
+        # Decoded textures are passed to the AI in memory instead of through PNG temp files
+        self.check_in_memory_images = ctk.CTkCheckBox(self.left_frame, text="Keep decoded textures in memory")
+        self.check_in_memory_images.pack(anchor="w", padx=20, pady=(0, 20))
 
         # Save Button
         self.btn_save = ctk.CTkButton(self.left_frame, text="💾 Save Settings", command=self._save_settings)
@@ -183,20 +329,38 @@ class HaydeeGUI(ctk.CTk):
         self.tab_gen = self.tabview.add("✨ Generate Outfit")
         self.tab_prompts = self.tabview.add("💡 Prompt Ideas")
         self.tab_group = self.tabview.add("📦 Group Mods")
+        self.tab_batch = self.tabview.add("📋 Batch Queue")
+        self.tab_history = self.tabview.add("📊 Run History")
 
         self._build_generate_tab()
         self._build_prompts_tab()
         self._build_group_tab()
+        self._build_batch_tab()
+        self._build_history_tab()
 
-        # Progress bar (hidden by default)
-        self.progress_bar = ctk.CTkProgressBar(self.right_frame, mode="indeterminate")
+        # Progress bar and current stage / ETA (hidden by default)
+        self.progress_frame = ctk.CTkFrame(self.right_frame, fg_color="transparent")
+        self.progress_frame.grid_columnconfigure(0, weight=1)
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, mode="determinate")
         self.progress_bar.set(0)
+        self.progress_bar.grid(row=0, column=0, sticky="ew")
+        self.lbl_progress = ctk.CTkLabel(self.progress_frame, text="", text_color="gray")
+        self.lbl_progress.grid(row=0, column=1, padx=(10, 0))
+        self.btn_cancel = ctk.CTkButton(self.progress_frame, text="✖ Cancel", width=80, fg_color="#8B0000", hover_color="#A52A2A", command=self._cancel_task)
+        self.btn_cancel.grid(row=0, column=2, padx=(10, 0))
+        self._progress_tracker = None
+        # Token of the running task; a cancelled task is released at once and its thread only cleans up
+        self._cancel_token = None
 
         # Log Console
         ctk.CTkLabel(self.right_frame, text="Execution Console:").grid(row=1, column=0, sticky="w", padx=20)
         self.log_console = ctk.CTkTextbox(self.right_frame, height=180, state="disabled", fg_color="#1E1E1E", text_color="#00FF00")
         self.log_console.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="nsew")
 
+        # Shared Gemini rate limiter status
+        self.lbl_api_status = ctk.CTkLabel(self.right_frame, text="", text_color="gray")
+        self.lbl_api_status.grid(row=1, column=0, sticky="e", padx=20)
+
     def _build_generate_tab(self):
         self.tab_gen.grid_columnconfigure(0, weight=1)
         
@@ -220,47 +384,116 @@ class HaydeeGUI(ctk.CTk):
         self.check_gen_s.select()
 
         self.check_gen_n = ctk.CTkCheckBox(self.frame_options, text="Normal (Suit_N)")
-        self.check_gen_n.grid(row=0, column=2)
+        self.check_gen_n.grid(row=0, column=2, padx=(0, 15))
         self.check_gen_n.select()
 
-        self.btn_generate = ctk.CTkButton(self.tab_gen, text="Start Generation", height=40, font=ctk.CTkFont(weight="bold"), command=self._start_generation)
-        self.btn_generate.grid(row=5, column=0, pady=10)
+        self.check_stale_only = ctk.CTkCheckBox(self.frame_options, text="Rebuild stale only")
+        self.check_stale_only.grid(row=0, column=3)
+
+        self.frame_actions = ctk.CTkFrame(self.tab_gen, fg_color="transparent")
+        self.frame_actions.grid(row=5, column=0, pady=10)
+
+        self.btn_generate = ctk.CTkButton(self.frame_actions, text="Start Generation", height=40, font=ctk.CTkFont(weight="bold"), command=self._start_generation)
+        self.btn_generate.pack(side="left")
+
+        # Drafts iterate on the diffuse at a low resolution; Finalize builds the mod from the approved one
+        self.btn_draft = ctk.CTkButton(self.frame_actions, text="🧪 Draft", width=90, height=40, fg_color="#6C757D", command=self._start_draft)
+        self.btn_draft.pack(side="left", padx=(10, 0))
+        self.btn_finalize = ctk.CTkButton(self.frame_actions, text="✅ Finalize", width=90, height=40, fg_color="#2E7D32", hover_color="#1B5E20", command=self._start_finalize)
+        self.btn_finalize.pack(side="left", padx=(10, 0))
+
+        self.lbl_draft_preview = ctk.CTkLabel(self.tab_gen, text="", compound="top")
+        self.lbl_draft_preview.grid(row=6, column=0, pady=(0, 10))
+        self._draft_preview = None
 
     def _build_prompts_tab(self):
         self.tab_prompts.grid_columnconfigure(0, weight=1)
-        self.tab_prompts.grid_rowconfigure(3, weight=1)
+        self.tab_prompts.grid_rowconfigure(4, weight=1)
 
         ctk.CTkLabel(self.tab_prompts, text="Enter a theme or concept (e.g., 'Lollipop and Strawberry'):").grid(row=0, column=0, sticky="w", padx=20, pady=(10, 0))
         
         self.entry_theme = ctk.CTkEntry(self.tab_prompts, placeholder_text="Describe your desired style...")
         self.entry_theme.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
 
-        self.btn_gen_prompts = ctk.CTkButton(self.tab_prompts, text="💡 Generate Prompt Ideas", height=32, command=self._start_prompt_generation)
-        self.btn_gen_prompts.grid(row=2, column=0, pady=(0, 10))
+        frame_ideas = ctk.CTkFrame(self.tab_prompts, fg_color="transparent")
+        frame_ideas.grid(row=2, column=0, pady=(0, 10))
+
+        ctk.CTkLabel(frame_ideas, text="Concepts:").grid(row=0, column=0, padx=(0, 5))
+        self.combo_idea_count = ctk.CTkComboBox(frame_ideas, values=["3", "5", "10", "20"], width=70)
+        self.combo_idea_count.grid(row=0, column=1, padx=(0, 15))
+
+        self.btn_gen_prompts = ctk.CTkButton(frame_ideas, text="💡 Generate Prompt Ideas", height=32, command=self._start_prompt_generation)
+        self.btn_gen_prompts.grid(row=0, column=2)
+
+        self.entry_prompt_search = ctk.CTkEntry(self.tab_prompts, placeholder_text="🔍 Search saved prompts...")
+        self.entry_prompt_search.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 5))
+        self.entry_prompt_search.bind("<KeyRelease>", lambda event: self._render_all_prompt_cards())
 
         # Scrollable area for resulting idea cards
         self.prompts_scroll_frame = ctk.CTkScrollableFrame(self.tab_prompts, fg_color="transparent")
-        self.prompts_scroll_frame.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        self.prompts_scroll_frame.grid(row=4, column=0, sticky="nsew", padx=10, pady=(0, 10))
         self.prompts_scroll_frame.grid_columnconfigure(0, weight=1)
 
+        # Cards live in their own frame so the "Show more" button always stays below them
+        self.prompt_cards_frame = ctk.CTkFrame(self.prompts_scroll_frame, fg_color="transparent")
+        self.prompt_cards_frame.pack(fill="x")
+        self.btn_more_prompts = ctk.CTkButton(self.prompts_scroll_frame, text="Show more", fg_color="transparent", border_width=1, command=self._show_more_prompts)
+
+        self._prompt_cards = []
+        self._prompt_window = PROMPT_PAGE_SIZE
+        self._new_idea_count = 0
+
     def _render_all_prompt_cards(self, new_indexes=None):
+        """Brings the card list in line with the prompt store, only creating or destroying the cards that changed.
+
+        Only the first _prompt_window prompts matching the search are materialized; the rest are loaded page by page via "Show more".
+        """
         if new_indexes is None:
             new_indexes = []
-        for widget in self.prompts_scroll_frame.winfo_children():
-            widget.destroy()
-        
-        prompts = self.config_manager.config.get("saved_prompts", [])
-        for idx, prompt_data in enumerate(prompts):
-            self._create_card_widget(idx, prompt_data.get("name", "Unknown"), prompt_data.get("style", ""), is_new=(idx in new_indexes))
 
-    def _create_card_widget(self, index, name, style, is_new=False):
+        query = self.entry_prompt_search.get().strip()
+        visible = self.prompt_store.list(query, limit=self._prompt_window)
+        wanted_keys = [(p.get("name", "Unknown"), p.get("style", ""), idx in new_indexes) for idx, p in enumerate(visible)]
+        current_keys = [card.prompt_key for card in self._prompt_cards]
+
+        cards = []
+        matcher = difflib.SequenceMatcher(None, current_keys, wanted_keys, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                cards.extend(self._prompt_cards[i1:i2])
+                continue
+            for card in self._prompt_cards[i1:i2]:
+                card.destroy()
+            for key in wanted_keys[j1:j2]:
+                card = self._create_card_widget(*key)
+                if cards:
+                    card.pack(fill="x", padx=5, pady=5, after=cards[-1])
+                elif self._prompt_cards[i2:]:
+                    card.pack(fill="x", padx=5, pady=5, before=self._prompt_cards[i2])
+                else:
+                    card.pack(fill="x", padx=5, pady=5)
+                cards.append(card)
+        self._prompt_cards = cards
+
+        remaining = self.prompt_store.count(query) - len(visible)
+        if remaining > 0:
+            self.btn_more_prompts.configure(text=f"Show more ({remaining} remaining)")
+            self.btn_more_prompts.pack(pady=(5, 10))
+        else:
+            self.btn_more_prompts.pack_forget()
+
+    def _show_more_prompts(self):
+        self._prompt_window += PROMPT_PAGE_SIZE
+        self._render_all_prompt_cards()
+
+    def _create_card_widget(self, name, style, is_new=False):
         # Card Frame
         fg_color = "#2E3B4E" if is_new else "#2A2D2E"
         border_color = "#3A86FF" if is_new else "#3E3E3E"
         border_width = 2 if is_new else 1
         
-        card = ctk.CTkFrame(self.prompts_scroll_frame, fg_color=fg_color, border_width=border_width, border_color=border_color, corner_radius=10)
-        card.pack(fill="x", padx=5, pady=5)
+        card = ctk.CTkFrame(self.prompt_cards_frame, fg_color=fg_color, border_width=border_width, border_color=border_color, corner_radius=10)
+        card.prompt_key = (name, style, is_new)
         card.grid_columnconfigure(0, weight=1)
 
         # Header: Name + Badge New
@@ -274,8 +507,11 @@ class HaydeeGUI(ctk.CTk):
             badge = ctk.CTkLabel(header_frame, text=" NEW ", font=ctk.CTkFont(size=10, weight="bold"), fg_color="#E63946", text_color="white", corner_radius=5)
             badge.pack(side="left", padx=10)
             
-        btn_del = ctk.CTkButton(header_frame, text="🗑️ Delete", width=60, height=24, fg_color="transparent", hover_color="#E63946", border_width=1, border_color="#E63946", text_color="#E63946", command=lambda idx=index: self._delete_prompt(idx))
+        btn_del = ctk.CTkButton(header_frame, text="🗑️ Delete", width=60, height=24, fg_color="transparent", hover_color="#E63946", border_width=1, border_color="#E63946", text_color="#E63946", command=lambda n=name: self._delete_prompt(n))
         btn_del.pack(side="right")
+
+        btn_queue = ctk.CTkButton(header_frame, text="📋 Queue", width=60, height=24, fg_color="transparent", border_width=1, command=lambda n=name, s=style: self._queue_prompt(n, s))
+        btn_queue.pack(side="right", padx=(0, 5))
         
         # Style Textbox (readonly)
         tb_style = ctk.CTkTextbox(card, height=60, wrap="word", fg_color="transparent")
@@ -286,13 +522,10 @@ class HaydeeGUI(ctk.CTk):
         # Apply button
         btn_apply = ctk.CTkButton(card, text="✨ Apply to Generator", fg_color="#1F6AA5", hover_color="#144870", command=lambda n=name, s=style: self._apply_prompt(n, s))
         btn_apply.grid(row=2, column=0, sticky="e", padx=10, pady=(0, 10))
+        return card
 
-    def _delete_prompt(self, index):
-        prompts = self.config_manager.config.get("saved_prompts", [])
-        if 0 <= index < len(prompts):
-            del prompts[index]
-            self.config_manager.config["saved_prompts"] = prompts
-            self.config_manager.save()
+    def _delete_prompt(self, name):
+        if self.prompt_store.remove(name):
             self._render_all_prompt_cards()
 
     def _apply_prompt(self, name, style):
@@ -312,18 +545,239 @@ class HaydeeGUI(ctk.CTk):
 
         ctk.CTkLabel(self.tab_group, text="Source Mods (comma-separated, e.g. red, green, blue):").grid(row=2, column=0, sticky="w", padx=20)
         self.entry_source_mods = ctk.CTkEntry(self.tab_group)
-        self.entry_source_mods.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 15))
-
-        ctk.CTkLabel(self.tab_group, text="Slot Category Name (e.g. color):").grid(row=4, column=0, sticky="w", padx=20)
+        self.entry_source_mods.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 5))
+
+        # Installed mods picker (fed by the mod index)
+        frame_mod_filter = ctk.CTkFrame(self.tab_group, fg_color="transparent")
+        frame_mod_filter.grid(row=4, column=0, sticky="ew", padx=20, pady=(0, 5))
+        frame_mod_filter.grid_columnconfigure(0, weight=1)
+        self.entry_mod_filter = ctk.CTkEntry(frame_mod_filter, placeholder_text="🔍 Filter installed mods by name, author or slot...")
+        self.entry_mod_filter.grid(row=0, column=0, sticky="ew")
+        self.entry_mod_filter.bind("<KeyRelease>", lambda event: self._render_mod_list())
+        self.btn_refresh_mods = ctk.CTkButton(frame_mod_filter, text="🔄", width=40, command=self._refresh_mod_index)
+        self.btn_refresh_mods.grid(row=0, column=1, padx=(5, 0))
+
+        self.mods_scroll_frame = ctk.CTkScrollableFrame(self.tab_group, height=160)
+        self.mods_scroll_frame.grid(row=5, column=0, sticky="nsew", padx=20, pady=(0, 15))
+        self.mods_scroll_frame.grid_columnconfigure(0, weight=1)
+        self.tab_group.grid_rowconfigure(5, weight=1)
+        self._mod_index_refreshing = False
+        # Checkbox rows of the mod list, reused across renders; hidden rows are grid_remove()d
+        self._mod_rows = []
+        # (text, enabled) last shown by each row, so unchanged rows are not reconfigured
+        self._mod_row_states = []
+        self._mod_list_note = ctk.CTkLabel(self.mods_scroll_frame, text="", text_color="gray")
+
+        ctk.CTkLabel(self.tab_group, text="Slot Category Name (e.g. color):").grid(row=6, column=0, sticky="w", padx=20)
         self.entry_slot_category = ctk.CTkEntry(self.tab_group)
         self.entry_slot_category.insert(0, "color")
-        self.entry_slot_category.grid(row=5, column=0, sticky="ew", padx=20, pady=(0, 15))
+        self.entry_slot_category.grid(row=7, column=0, sticky="ew", padx=20, pady=(0, 15))
 
         self.check_delete_sources = ctk.CTkCheckBox(self.tab_group, text="Delete original source mods after successful grouping")
-        self.check_delete_sources.grid(row=6, column=0, sticky="w", padx=20, pady=(0, 20))
+        self.check_delete_sources.grid(row=8, column=0, sticky="w", padx=20, pady=(0, 20))
 
         self.btn_group = ctk.CTkButton(self.tab_group, text="Group Outfits", height=40, font=ctk.CTkFont(weight="bold"), command=self._start_grouping)
-        self.btn_group.grid(row=7, column=0, pady=10)
+        self.btn_group.grid(row=9, column=0, pady=10)
+
+    def _render_mod_list(self):
+        """Shows the mods matching the filter, reconfiguring the existing rows instead of recreating them."""
+        selected = set(parse_mod_list(self.entry_source_mods.get()))
+        results = self.mod_index.search(self.entry_mod_filter.get())
+        shown = results[:MOD_LIST_LIMIT]
+        for row, (name, info) in enumerate(shown):
+            maps = " ".join(key if info["maps"].get(key) else "-" for key in ("D", "S", "N"))
+            details = [f"[{maps}]", f"{info['size'] / (1024 * 1024):.0f} MB"]
+            if info.get("author"):
+                details.append(f"by {info['author']}")
+            if info.get("slot_categories"):
+                details.append(f"slots: {', '.join(info['slot_categories'])}")
+            # A mod without a diffuse texture cannot be grouped
+            enabled = bool(info["maps"].get("D")) and name.lower() != "haydee"
+            state = (f"{name}   {'  ·  '.join(details)}", enabled)
+
+            if row == len(self._mod_rows):
+                self._mod_rows.append(ctk.CTkCheckBox(self.mods_scroll_frame, text=""))
+                self._mod_row_states.append(None)
+            checkbox = self._mod_rows[row]
+            if self._mod_row_states[row] != state:
+                checkbox.configure(text=state[0], state="normal" if enabled else "disabled",
+                                   command=lambda n=name: self._toggle_source_mod(n))
+                self._mod_row_states[row] = state
+            # The user may have ticked the box or edited the Source Mods field since the last render
+            if name in selected and checkbox.get() != 1:
+                checkbox.select()
+            elif name not in selected and checkbox.get() == 1:
+                checkbox.deselect()
+            if not checkbox.winfo_manager():
+                checkbox.grid(row=row, column=0, sticky="w", pady=2)
+
+        for checkbox in self._mod_rows[len(shown):]:
+            checkbox.grid_remove()
+
+        note = ""
+        if len(results) > MOD_LIST_LIMIT:
+            note = f"... {len(results) - MOD_LIST_LIMIT} more, refine the filter"
+        elif not results:
+            note = "No matching mods." if self.mod_index.available() else "Set the Haydee game path to list installed mods."
+        if note:
+            self._mod_list_note.configure(text=note)
+            self._mod_list_note.grid(row=len(shown), column=0, sticky="w")
+        else:
+            self._mod_list_note.grid_remove()
+
+    def _toggle_source_mod(self, name):
+        mods = parse_mod_list(self.entry_source_mods.get())
+        if name in mods:
+            mods.remove(name)
+        else:
+            mods.append(name)
+        self.entry_source_mods.delete(0, "end")
+        self.entry_source_mods.insert(0, ", ".join(mods))
+
+    def _refresh_mod_index(self):
+        """Re-scans changed mods on a background thread and re-renders the list if anything changed."""
+        if self._mod_index_refreshing:
+            return
+        self._mod_index_refreshing = True
+
+        def worker():
+            try:
+                changed = self.mod_index.refresh()
+            except OSError as e:
+                self.logger.warning(f"Could not scan the Outfits folder: {e}")
+                changed = False
+            finally:
+                self._mod_index_refreshing = False
+            if changed:
+                self.after(0, self._render_mod_list)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _poll_mod_index(self):
+        self._refresh_mod_index()
+        self.after(MOD_INDEX_POLL_MS, self._poll_mod_index)
+
+    def _build_history_tab(self):
+        self.tab_history.grid_columnconfigure(0, weight=1)
+        self.tab_history.grid_rowconfigure(1, weight=1)
+
+        frame_history_controls = ctk.CTkFrame(self.tab_history, fg_color="transparent")
+        frame_history_controls.grid(row=0, column=0, sticky="ew", padx=20, pady=(10, 5))
+        ctk.CTkLabel(frame_history_controls, text="p50/p95 durations of past generation runs, per stage, model and resolution:").pack(side="left")
+        self.btn_refresh_history = ctk.CTkButton(frame_history_controls, text="🔄 Refresh", width=90, command=self._render_run_history)
+        self.btn_refresh_history.pack(side="right")
+
+        self.textbox_history = ctk.CTkTextbox(self.tab_history, state="disabled", wrap="none", font=ctk.CTkFont(family="Consolas", size=12))
+        self.textbox_history.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 10))
+        self._render_run_history()
+
+    def _render_run_history(self):
+        report = format_report(self.pipeline.run_history) if self.pipeline.run_history is not None else "Run history is disabled."
+        self.textbox_history.configure(state="normal")
+        self.textbox_history.delete("1.0", "end")
+        self.textbox_history.insert("1.0", report)
+        self.textbox_history.configure(state="disabled")
+
+    def _build_batch_tab(self):
+        self.tab_batch.grid_columnconfigure(0, weight=1)
+        self.tab_batch.grid_rowconfigure(4, weight=1)
+
+        ctk.CTkLabel(self.tab_batch, text="Outfits to queue, one per line (Name: style description):").grid(row=0, column=0, sticky="w", padx=20, pady=(10, 0))
+        self.textbox_batch = ctk.CTkTextbox(self.tab_batch, height=70)
+        self.textbox_batch.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
+
+        self.frame_batch_add = ctk.CTkFrame(self.tab_batch, fg_color="transparent")
+        self.frame_batch_add.grid(row=2, column=0, sticky="ew", padx=20, pady=(0, 10))
+        self.btn_batch_add = ctk.CTkButton(self.frame_batch_add, text="➕ Add to Queue", command=self._queue_pasted_list)
+        self.btn_batch_add.pack(side="left")
+        self.btn_batch_add_prompts = ctk.CTkButton(self.frame_batch_add, text="💡 Queue All Prompt Ideas", command=self._queue_all_prompts)
+        self.btn_batch_add_prompts.pack(side="left", padx=(10, 0))
+
+        self.frame_batch_controls = ctk.CTkFrame(self.tab_batch, fg_color="transparent")
+        self.frame_batch_controls.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 10))
+        ctk.CTkLabel(self.frame_batch_controls, text="Workers:").pack(side="left")
+        self.combo_batch_workers = ctk.CTkComboBox(self.frame_batch_controls, values=["1", "2", "3", "4"], width=70)
+        self.combo_batch_workers.pack(side="left", padx=(5, 10))
+        self.btn_batch_start = ctk.CTkButton(self.frame_batch_controls, text="▶ Start Queue", width=110, command=self._start_batch_queue)
+        self.btn_batch_start.pack(side="left")
+        self.btn_batch_stop = ctk.CTkButton(self.frame_batch_controls, text="⏹ Stop", width=70, fg_color="#6C757D", command=self.job_queue.stop)
+        self.btn_batch_stop.pack(side="left", padx=(5, 0))
+        self.btn_batch_clear = ctk.CTkButton(self.frame_batch_controls, text="🧹 Clear Done", width=100, fg_color="#6C757D", command=self.job_queue.clear_finished)
+        self.btn_batch_clear.pack(side="left", padx=(5, 0))
+        self.lbl_batch_status = ctk.CTkLabel(self.frame_batch_controls, text="")
+        self.lbl_batch_status.pack(side="right")
+
+        self.batch_scroll_frame = ctk.CTkScrollableFrame(self.tab_batch, fg_color="transparent")
+        self.batch_scroll_frame.grid(row=4, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        self.batch_scroll_frame.grid_columnconfigure(0, weight=1)
+
+    def _render_batch_jobs(self):
+        for widget in self.batch_scroll_frame.winfo_children():
+            widget.destroy()
+
+        status_colors = {"pending": "#A0A0A0", "running": "#3A86FF", "done": "#2A9D8F", "failed": "#E63946"}
+        for job in list(self.job_queue.jobs):
+            row = ctk.CTkFrame(self.batch_scroll_frame, fg_color="#2A2D2E", corner_radius=8)
+            row.pack(fill="x", padx=5, pady=3)
+
+            ctk.CTkLabel(row, text=job["name"], font=ctk.CTkFont(weight="bold")).pack(side="left", padx=10, pady=5)
+            status_text = job["status"].upper()
+            if job["attempts"] > 1:
+                status_text += f" (attempt {job['attempts']})"
+            ctk.CTkLabel(row, text=status_text, text_color=status_colors.get(job["status"], "white")).pack(side="left", padx=5)
+
+            if job["status"] != "running":
+                ctk.CTkButton(row, text="✖", width=30, height=24, fg_color="transparent", hover_color="#E63946", command=lambda job_id=job["id"]: self.job_queue.remove(job_id)).pack(side="right", padx=(0, 10))
+            if job["status"] == "failed":
+                ctk.CTkButton(row, text="↻ Retry", width=60, height=24, command=lambda job_id=job["id"]: self.job_queue.retry(job_id)).pack(side="right", padx=5)
+
+        counts = self.job_queue.counts()
+        state = "Running" if self.job_queue.is_running else "Idle"
+        self.lbl_batch_status.configure(text=f"{state} · {counts['pending']} pending · {counts['running']} running · {counts['done']} done · {counts['failed']} failed")
+
+    def _queue_prompt(self, name, style):
+        self.job_queue.add(name, style)
+        self.logger.info(f"Queued '{name}' for batch generation.")
+
+    def _queue_pasted_list(self):
+        entries = parse_job_lines(self.textbox_batch.get("1.0", "end-1c"))
+        missing_style = [name for name, style in entries if not style]
+        if not entries:
+            messagebox.showerror("Error", "Please enter at least one outfit (Name: style description).")
+            return
+        if missing_style:
+            messagebox.showerror("Error", f"Style description is missing for: {', '.join(missing_style)}")
+            return
+
+        for name, style in entries:
+            self.job_queue.add(name, style)
+        self.textbox_batch.delete("1.0", "end")
+        self.logger.info(f"Queued {len(entries)} outfit(s) for batch generation.")
+
+    def _queue_all_prompts(self):
+        prompts = self.prompt_store.list()
+        for prompt_data in prompts:
+            self.job_queue.add(prompt_data["name"], prompt_data["style"])
+        self.logger.info(f"Queued {len(prompts)} prompt idea(s) for batch generation.")
+
+    def _start_batch_queue(self):
+        self._save_settings(show_success=False)
+        if not self.config_manager.config["gemini_api_key"] or not self.config_manager.config["haydee_path"]:
+            return
+
+        try:
+            workers = max(1, int(self.combo_batch_workers.get()))
+        except ValueError:
+            workers = 1
+        self.config_manager.config["batch_workers"] = workers
+        self.config_manager.save()
+        self.job_queue.start(workers=workers)
+
+    def _resume_batch_queue(self):
+        """Picks up an interrupted batch from the previous session."""
+        if self.job_queue.was_running and self.job_queue.counts()["pending"]:
+            self.logger.info("Resuming the batch queue from the previous session...")
+            self.after(1000, self._start_batch_queue)
 
     def _browse_directory(self):
         dir_path = filedialog.askdirectory(title="Select Haydee Game Folder")
@@ -336,11 +790,26 @@ class HaydeeGUI(ctk.CTk):
         self.entry_path.insert(0, self.config_manager.config.get("haydee_path", ""))
         self.entry_author.insert(0, self.config_manager.config.get("author_name", ""))
         self.combo_res.set(self.config_manager.config.get("image_resolution", "4K"))
+        dds_quality = self.config_manager.config.get("dds_quality", "final")
+        self.combo_dds_quality.set(next((label for label, value in DDS_QUALITY_LABELS.items() if value == dds_quality), "Final (Lanczos)"))
+        finalize_mode = self.config_manager.config.get("finalize_mode", "upscale")
+        self.combo_finalize_mode.set(next((label for label, value in FINALIZE_MODE_LABELS.items() if value == finalize_mode), "Upscale the draft"))
         self.entry_model.insert(0, self.config_manager.config.get("model_name", "gemini-3.1-flash-image-preview"))
         self.entry_validator_model.insert(0, self.config_manager.config.get("validator_model", "gemini-3.1-pro-preview"))
+        qa_mode = self.config_manager.config.get("qa_mode", "sequential")
+        self.combo_qa_mode.set(next((label for label, value in QA_MODE_LABELS.items() if value == qa_mode), "Sequential"))
+        self.entry_best_of_n.insert(0, str(self.config_manager.config.get("best_of_n_candidates", 3)))
+        self.entry_max_parallel.insert(0, str(self.config_manager.config.get("max_parallel_requests", 3)))
+        self.combo_batch_workers.set(str(self.config_manager.config.get("batch_workers", 2)))
+        self.combo_idea_count.set(str(self.config_manager.config.get("prompt_ideas_count", 3)))
+        if self.config_manager.config.get("bypass_response_cache", False):
+            self.check_bypass_cache.select()
+        if self.config_manager.config.get("in_memory_images", True):
+            self.check_in_memory_images.select()
         
         # Load Prompt Ideas
         self._render_all_prompt_cards()
+        self._render_batch_jobs()
 
     def _save_settings(self, show_success=True):
         api_key = self.entry_api_key.get().strip()
@@ -363,31 +832,66 @@ class HaydeeGUI(ctk.CTk):
             self.entry_validator_model.delete(0, "end")
             self.entry_validator_model.insert(0, validator_model)
 
+        if api_key != self.config_manager.config.get("gemini_api_key"):
+            # Clients are keyed by settings, only a new key makes the cached ones obsolete
+            self.pipeline.clients.clear()
+
+        if haydee_path != self.config_manager.config.get("haydee_path"):
+            self.mod_index.set_outfits_dir(Path(haydee_path) / "Outfits")
+            self._render_mod_list()
+            self._refresh_mod_index()
+
         self.config_manager.config["gemini_api_key"] = api_key
         self.config_manager.config["haydee_path"] = haydee_path
         self.config_manager.config["author_name"] = author
         self.config_manager.config["image_resolution"] = res
+        self.config_manager.config["dds_quality"] = DDS_QUALITY_LABELS.get(self.combo_dds_quality.get(), "final")
+        self.config_manager.config["finalize_mode"] = FINALIZE_MODE_LABELS.get(self.combo_finalize_mode.get(), "upscale")
         self.config_manager.config["model_name"] = model
         self.config_manager.config["validator_model"] = validator_model
+        self.config_manager.config["qa_mode"] = QA_MODE_LABELS.get(self.combo_qa_mode.get(), "sequential")
+        self.config_manager.config["best_of_n_candidates"] = self._read_positive_int(self.entry_best_of_n, 3)
+        self.config_manager.config["max_parallel_requests"] = self._read_positive_int(self.entry_max_parallel, 3)
+        self.config_manager.config["bypass_response_cache"] = self.check_bypass_cache.get() == 1
+        self.config_manager.config["in_memory_images"] = self.check_in_memory_images.get() == 1
         self.config_manager.save()
 
         if show_success:
             messagebox.showinfo("Success", "Settings saved successfully!")
 
-    def _prepare_for_task(self):
-        """Helper to save config and block UI before a task"""
+    def _read_positive_int(self, entry, default):
+        """Reads a positive integer from an entry, writing the default back into the UI if it is invalid."""
+        try:
+            value = int(entry.get().strip())
+            if value >= 1:
+                return value
+        except ValueError:
+            pass
+        entry.delete(0, "end")
+        entry.insert(0, str(default))
+        return default
+
+    def _prepare_for_task(self, task=None):
+        """Helper to save config and block UI before a task; progress events of the given task drive the progress bar."""
         self._save_settings(show_success=False)
         if not self.config_manager.config["gemini_api_key"] or not self.config_manager.config["haydee_path"]:
              return False
 
         self.btn_generate.configure(state="disabled")
+        self.btn_draft.configure(state="disabled")
+        self.btn_finalize.configure(state="disabled")
         self.btn_group.configure(state="disabled")
         if hasattr(self, 'btn_gen_prompts'):
             self.btn_gen_prompts.configure(state="disabled")
         self.tabview.configure(state="disabled")
         
-        self.progress_bar.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 5))
-        self.progress_bar.start()
+        self.progress_frame.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 15))
+        self.progress_bar.set(0)
+        self.lbl_progress.configure(text="")
+        self._progress_tracker = ProgressTracker(self.pipeline.progress.history, task)
+        self.pipeline.progress.subscribe(self._progress_tracker)
+        self._update_progress()
+        self._cancel_token = CancelToken()
         
         self.log_console.configure(state="normal")
         self.log_console.delete("1.0", "end")
@@ -401,6 +905,7 @@ class HaydeeGUI(ctk.CTk):
         gen_d = self.check_gen_d.get() == 1
         gen_s = self.check_gen_s.get() == 1
         gen_n = self.check_gen_n.get() == 1
+        stale_only = self.check_stale_only.get() == 1
 
         if not mod_name:
             messagebox.showerror("Error", "Mod name is required.")
@@ -414,17 +919,9 @@ class HaydeeGUI(ctk.CTk):
             messagebox.showinfo("Info", "Nothing to generate. All options are disabled.")
             return
         
-        if self._prepare_for_task():
-            # Save or update the prompt idea
-            prompts = self.config_manager.config.get("saved_prompts", [])
-            existing_idx = next((i for i, p in enumerate(prompts) if p.get("name") == mod_name), None)
-            
-            if existing_idx is not None:
-                prompts.pop(existing_idx)
-                
-            prompts.insert(0, {"name": mod_name, "style": style})
-            self.config_manager.config["saved_prompts"] = prompts
-            self.config_manager.save()
+        if self._prepare_for_task(task=mod_name):
+            # Save or update the prompt idea (moves an existing prompt with the same name to the top)
+            self.prompt_store.add(mod_name, style)
             
             # Update the Prompt Ideas UI
             try:
@@ -434,83 +931,93 @@ class HaydeeGUI(ctk.CTk):
 
             threading.Thread(
                 target=self._run_generator_thread, 
-                args=(mod_name, style, gen_d, gen_s, gen_n), 
+                args=(mod_name, style, gen_d, gen_s, gen_n, stale_only, self._cancel_token), 
                 daemon=True
             ).start()
 
+    def _start_draft(self):
+        mod_name = self.entry_mod_name.get().strip()
+        style = self.textbox_style.get("1.0", "end-1c").strip()
+
+        if not mod_name or not style:
+            messagebox.showerror("Error", "Mod name and style description are required to generate a draft.")
+            return
+
+        if self._prepare_for_task(task=mod_name):
+            self.prompt_store.add(mod_name, style)
+            try:
+                self._render_all_prompt_cards(new_indexes=[0])
+            except Exception as e:
+                self.logger.warning(f"Failed to update prompt cards UI: {e}")
+
+            threading.Thread(target=self._run_draft_thread, args=(mod_name, style, self._cancel_token), daemon=True).start()
+
+    def _start_finalize(self):
+        mod_name = self.entry_mod_name.get().strip()
+        if not mod_name:
+            messagebox.showerror("Error", "Mod name is required.")
+            return
+
+        draft = self.pipeline.drafts.load(mod_name)
+        if draft is None:
+            messagebox.showerror("Error", f"No draft of '{mod_name}' found. Generate a draft first.")
+            return
+        allow_failed = False
+        if not draft["is_valid"]:
+            if not messagebox.askyesno("Draft failed QA", f"The draft of '{mod_name}' did not pass QA validation. Finalize it anyway?"):
+                return
+            allow_failed = True
+
+        gen_s = self.check_gen_s.get() == 1
+        gen_n = self.check_gen_n.get() == 1
+        if self._prepare_for_task(task=mod_name):
+            threading.Thread(target=self._run_finalize_thread, args=(mod_name, gen_s, gen_n, allow_failed, self._cancel_token), daemon=True).start()
+
     def _start_prompt_generation(self):
         theme = self.entry_theme.get().strip()
         if not theme:
             messagebox.showerror("Error", "Please enter a theme or concept first.")
             return
 
-        if self._prepare_for_task():
+        try:
+            count = max(1, int(self.combo_idea_count.get()))
+        except ValueError:
+            count = 3
+        self.combo_idea_count.set(str(count))
+        self.config_manager.config["prompt_ideas_count"] = count
+
+        if self._prepare_for_task(task=theme):
+            self._new_idea_count = 0
             threading.Thread(
                 target=self._run_prompt_thread,
-                args=(theme,),
+                args=(theme, self._cancel_token),
                 daemon=True
             ).start()
 
-    def _run_prompt_thread(self, theme):
+    def _run_prompt_thread(self, theme, cancel_token=None):
         try:
-            api_key = self.config_manager.config.get("gemini_api_key", "")
-            model_name = self.config_manager.config.get("validator_model", "gemini-3.1-pro-preview")
-            
-            if not api_key:
-                raise ValueError("API Key is missing.")
-
-            self.logger.info(f"Generating prompt ideas for theme: '{theme}' using {model_name}...")
-            
-            client = genai.Client(api_key=api_key)
-            
-            system_instruction = """You are an expert prompt engineer for an AI texture generator modifying a biomechanical female character named Haydee.
-Her original suit features synthetic skin, mechanical joints, and glossy armor plates.
-Generate 3 distinct, highly detailed, and creative outfit concepts based on the user's theme.
-Focus on vivid colors, specific material textures (e.g., glossy plastic, brushed metal, matte rubber, glowing LEDs), and distinct patterns.
-Return the result STRICTLY as a JSON array of objects. 
-Each object must have exactly two keys: 'name' (a short PascalCase string for the mod name without spaces, e.g., 'CandyPop') and 'style' (a detailed text prompt for the AI image generator, e.g., 'bright colorful lollipop candy theme, glossy plastic armor plates...').
-Do not include any other text, markdown formatting, or explanation. Just the raw JSON array."""
-
-            prompt_text = f"{system_instruction}\n\nUser Theme: {theme}"
-
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt_text,
+            # Each concept becomes a card as soon as it has been streamed
+            ideas = self.pipeline.generate_prompt_ideas(
+                theme, on_idea=lambda idea: self.after(0, lambda: self._handle_new_ideas([idea], append=True)),
+                cancel_token=cancel_token
             )
-            
-            response_text = response.text
-            
-            # Clean up potential markdown formatting block injected by LLM
-            if response_text.startswith("```"):
-                response_text = re.sub(r"^```(?:json)?\n|\n```$", "", response_text.strip(), flags=re.MULTILINE)
-            
-            try:
-                ideas = json.loads(response_text)
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Failed to parse LLM response: {response_text}")
-                raise ValueError(f"AI returned invalid JSON.")
-                
-            if not isinstance(ideas, list):
-                raise ValueError("AI did not return a JSON array.")
-                
-            self.logger.info(f"Successfully generated {len(ideas)} ideas.")
-            self.after(0, lambda: self._handle_new_ideas(ideas))
-            
+            self.logger.info(f"Received {len(ideas)} prompt ideas.")
+
+        except TaskCancelled:
+            self.logger.info("Prompt generation cancelled.")
         except Exception as e:
             self.logger.error(f"Prompt generation failed: {e}")
             self.after(0, lambda err=str(e): messagebox.showerror("Generation Error", err))
         finally:
-            self.after(0, self._restore_ui)
+            self.after(0, self._finish_task, cancel_token)
 
-    def _handle_new_ideas(self, ideas):
-        prompts = self.config_manager.config.get("saved_prompts", [])
+    def _handle_new_ideas(self, ideas, append=False):
+        """Adds ideas on top of the prompt list; with append=True the ideas of the running request stay marked as new."""
         valid_ideas = [i for i in ideas if "name" in i and "style" in i]
+        self.prompt_store.add_many(valid_ideas)
         
-        prompts = valid_ideas + prompts
-        self.config_manager.config["saved_prompts"] = prompts
-        self.config_manager.save()
-        
-        new_indexes = list(range(len(valid_ideas)))
+        self._new_idea_count = (self._new_idea_count if append else 0) + len(valid_ideas)
+        new_indexes = list(range(self._new_idea_count))
         self._render_all_prompt_cards(new_indexes=new_indexes)
         self.entry_theme.delete(0, "end")
 
@@ -523,151 +1030,134 @@ Do not include any other text, markdown formatting, or explanation. Just the raw
         if not multi_name or not source_mods or not slot_cat:
             messagebox.showerror("Error", "Multi-Mod Name, Source Mods, and Slot Category are required.")
             return
+
+        # Validate the sources up front against the last background scan instead of failing halfway through the
+        # grouping; the grouping itself re-checks the files, so a scan on the UI thread is not worth the freeze
+        if self.mod_index.available():
+            self._refresh_mod_index()
+            problems = self.mod_index.problems(parse_mod_list(source_mods))
+            if problems:
+                messagebox.showerror("Error", "\n".join(problems))
+                return
             
-        if self._prepare_for_task():
-            threading.Thread(target=self._run_grouping_thread, args=(multi_name, source_mods, slot_cat, delete_sources), daemon=True).start()
+        if self._prepare_for_task(task=multi_name):
+            threading.Thread(target=self._run_grouping_thread, args=(multi_name, source_mods, slot_cat, delete_sources, self._cancel_token), daemon=True).start()
 
-    def _run_generator_thread(self, mod_name, style, gen_d, gen_s, gen_n):
+    def _run_generator_thread(self, mod_name, style, gen_d, gen_s, gen_n, stale_only=False, cancel_token=None):
         try:
-            api_key = self.config_manager.config["gemini_api_key"]
-            haydee_path = Path(self.config_manager.config["haydee_path"])
-            author = self.config_manager.config.get("author_name", "")
-            res = self.config_manager.config["image_resolution"]
-            model_name = self.config_manager.config.get("model_name", "gemini-3.1-flash-image-preview")
-            validator_model = self.config_manager.config.get("validator_model", "gemini-3.1-pro-preview")
-            
-            outfits_dir = haydee_path / "Outfits"
-            base_dds = outfits_dir / "Haydee" / "Suit_D.dds"
-
-            builder = ModBuilder(mod_name, outfits_dir=outfits_dir, author=author if author else None)
-            builder.prepare_directory(clear_dir=gen_d)
-
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                base_png = temp_path / "base_Suit_D.png"
-                generated_d_png = temp_path / "generated_Suit_D.png"
-                generated_mask = temp_path / "material_mask.png"
-                generated_n_png = temp_path / "generated_normal.png"
-
-                client = GeminiModClient(api_key=api_key, image_resolution=res, model_name=model_name, validator_model=validator_model)
-                final_d_dds = builder.mod_dir / "Suit_D.dds"
-
-                if gen_d:
-                    if not base_dds.exists():
-                        raise FileNotFoundError(f"Base texture not found at {base_dds}. Please verify your game path.")
-                    ImageProcessor.dds_to_png(base_dds, base_png)
-                    
-                    # --- ДОБАВЛЕННЫЙ ЦИКЛ ВАЛИДАЦИИ (QA FEEDBACK LOOP) ---
-                    max_attempts = 3
-                    attempt = 1
-                    feedback = None
-                    is_valid = False
-
-                    while attempt <= max_attempts:
-                        self.logger.info(f"Generation attempt {attempt}/{max_attempts}...")
-                        
-                        client.generate_texture(
-                            base_image_path=base_png, 
-                            style=style, 
-                            output_path=generated_d_png,
-                            previous_feedback=feedback
-                        )
-
-                        validation_result = client.validate_texture(
-                            base_image_path=base_png,
-                            generated_image_path=generated_d_png, 
-                            style=style
-                        )
-
-                        if validation_result.is_valid:
-                            self.logger.info("✅ Texture passed QA validation!")
-                            is_valid = True
-                            break
-                        else:
-                            self.logger.warning(f"❌ Texture validation failed: {validation_result.feedback}")
-                            feedback = validation_result.feedback
-                            attempt += 1
-
-                    if not is_valid:
-                        self.logger.error(f"⚠️ Max retries ({max_attempts}) reached. Proceeding with the last generated texture, but it may contain structural flaws.")
-                    # -----------------------------------------------------
-
-                    ImageProcessor.img_to_dds(generated_d_png, final_d_dds, resolution=res)
-                else:
-                    if not final_d_dds.exists():
-                        if gen_s or gen_n:
-                            raise FileNotFoundError(
-                                f"Cannot generate Suit_S or Suit_N because Suit_D generation was skipped and "
-                                f"'{final_d_dds.name}' does not exist in the mod folder from previous runs."
-                            )
-                    else:
-                        if gen_s or gen_n:
-                            ImageProcessor.dds_to_png(final_d_dds, generated_d_png)
-
-                if gen_s:
-                    client.generate_material_mask(diffuse_image_path=generated_d_png, output_path=generated_mask)
-                    final_s_dds = builder.mod_dir / "Suit_S.dds"
-                    ImageProcessor.create_specular_map(generated_mask, final_s_dds, resolution=res)
-
-                if gen_n:
-                    client.generate_normal_map(diffuse_image_path=generated_d_png, output_path=generated_n_png)
-                    final_n_dds = builder.mod_dir / "Suit_N.dds"
-                    ImageProcessor.create_custom_normal_map(generated_n_png, final_n_dds, resolution=res)
-
-            builder.generate_mtl_file()
-            builder.generate_outfit_file()
-            
+            self.pipeline.generate_mod(mod_name, style, gen_d, gen_s, gen_n, stale_only=stale_only, cancel_token=cancel_token)
+
             self.logger.info(f"Mod '{mod_name}' generation completed successfully!")
             self.after(0, lambda: messagebox.showinfo("Done", f"Mod '{mod_name}' generation completed successfully!"))
-            
+
+        except TaskCancelled:
+            self.logger.info(f"Generation of '{mod_name}' cancelled.")
         except Exception as e:
             self.logger.error(f"Generation failed: {e}")
             self.after(0, lambda err=str(e): messagebox.showerror("Generation Error", err))
         finally:
-            self.after(0, self._restore_ui)
+            self.after(0, self._finish_task, cancel_token)
+            self.after(0, self._render_run_history)
 
-    def _run_grouping_thread(self, multimod_name, source_mods_str, slot_category, delete_sources):
+    def _run_draft_thread(self, mod_name, style, cancel_token=None):
         try:
-            haydee_path = Path(self.config_manager.config["haydee_path"])
-            author = self.config_manager.config.get("author_name", "")
-            outfits_dir = haydee_path / "Outfits"
-            
-            # Разделяем строку на список модов
-            source_mods = [m.strip() for m in source_mods_str.split(",") if m.strip()]
-            if not source_mods:
-                raise ValueError("No valid source mods provided.")
-            
-            self.logger.info(f"Starting to group mods: {source_mods} into '{multimod_name}'...")
-            
-            builder = MultiModBuilder(
-                multimod_name=multimod_name,
-                source_mods=source_mods,
-                outfits_dir=outfits_dir,
-                slot_category=slot_category,
-                author=author if author else None
-            )
-            
-            builder.validate_sources()
-            builder.prepare_directory()
-            builder.migrate_assets_and_generate_mtls()
-            builder.generate_outfit_file()
-            
-            if delete_sources:
-                builder.cleanup_sources()
-                
-            self.logger.info(f"Multi-mod '{multimod_name}' created successfully from {len(source_mods)} variants!")
+            draft = self.pipeline.generate_draft(mod_name, style, cancel_token=cancel_token)
+            preview = self._load_draft_preview(draft["image"])
+            self.after(0, self._show_draft, draft, preview)
+
+        except TaskCancelled:
+            self.logger.info(f"Draft of '{mod_name}' cancelled.")
+        except Exception as e:
+            self.logger.error(f"Draft generation failed: {e}")
+            self.after(0, lambda err=str(e): messagebox.showerror("Generation Error", err))
+        finally:
+            self.after(0, self._finish_task, cancel_token)
+            self.after(0, self._render_run_history)
+
+    def _run_finalize_thread(self, mod_name, gen_s, gen_n, allow_failed=False, cancel_token=None):
+        try:
+            self.pipeline.finalize_draft(mod_name, gen_s=gen_s, gen_n=gen_n, allow_failed=allow_failed, cancel_token=cancel_token)
+
+            self.logger.info(f"Mod '{mod_name}' finalized successfully!")
+            self.after(0, lambda: messagebox.showinfo("Done", f"Mod '{mod_name}' finalized successfully!"))
+
+        except TaskCancelled:
+            self.logger.info(f"Finalizing '{mod_name}' cancelled.")
+        except Exception as e:
+            self.logger.error(f"Finalize failed: {e}")
+            self.after(0, lambda err=str(e): messagebox.showerror("Generation Error", err))
+        finally:
+            self.after(0, self._finish_task, cancel_token)
+            self.after(0, self._render_run_history)
+
+    @staticmethod
+    def _load_draft_preview(image_path):
+        """Downscaled copy of a draft texture, loaded off the UI thread."""
+        # PIL is already loaded by the generation that produced the draft
+        from PIL import Image
+        with Image.open(image_path) as image:
+            image.thumbnail((DRAFT_PREVIEW_SIZE, DRAFT_PREVIEW_SIZE))
+            return image.copy()
+
+    def _show_draft(self, draft, preview):
+        self._draft_preview = ctk.CTkImage(light_image=preview, dark_image=preview, size=preview.size)
+        verdict = "passed QA" if draft["is_valid"] else "did not pass QA"
+        self.lbl_draft_preview.configure(image=self._draft_preview, text=f"{draft['mod']} · {draft['resolution']} draft · {verdict}")
+
+    def _run_grouping_thread(self, multimod_name, source_mods_str, slot_category, delete_sources, cancel_token=None):
+        try:
+            self.pipeline.group_mods(multimod_name, parse_mod_list(source_mods_str), slot_category, delete_sources, cancel_token=cancel_token)
             self.after(0, lambda: messagebox.showinfo("Done", f"Multi-mod '{multimod_name}' created successfully!"))
-            
+
+        except TaskCancelled:
+            self.logger.info(f"Grouping of '{multimod_name}' cancelled.")
         except Exception as e:
             self.logger.error(f"Grouping failed: {e}")
             self.after(0, lambda err=str(e): messagebox.showerror("Grouping Error", err))
         finally:
-            self.after(0, self._restore_ui)
+            self.after(0, self._finish_task, cancel_token)
+
+    def _cancel_task(self):
+        """Stops the running task at its next checkpoint.
+
+        The UI stays blocked until the task thread has finished rolling back, so a new run of the same mod cannot
+        overlap with the cancelled one.
+        """
+        if self._cancel_token is None or self._cancel_token.cancelled:
+            return
+        self._cancel_token.cancel()
+        self.logger.warning("Cancelling... Partial outputs will be rolled back.")
+        self.btn_cancel.configure(state="disabled")
+        self.lbl_progress.configure(text="Cancelling...")
+
+    def _finish_task(self, cancel_token):
+        """Releases the UI when the thread of the current task ends."""
+        if cancel_token is self._cancel_token:
+            self._restore_ui()
+
+    def _update_progress(self):
+        """Moves the progress bar and shows the running stage with an ETA built from previous stage durations."""
+        tracker = self._progress_tracker
+        if tracker is None:
+            return
+        fraction, seconds_left = tracker.snapshot()
+        self.progress_bar.set(fraction)
+        cancelling = self._cancel_token is not None and self._cancel_token.cancelled
+        if tracker.current and not cancelling:
+            self.lbl_progress.configure(text=f"{tracker.current} · {fraction:.0%} · ETA {format_duration(seconds_left)}")
+        self.after(500, self._update_progress)
 
     def _restore_ui(self):
-        self.progress_bar.stop()
-        self.progress_bar.grid_forget()
+        self._cancel_token = None
+        if self._progress_tracker is not None:
+            self.pipeline.progress.unsubscribe(self._progress_tracker)
+            self._progress_tracker = None
+        self.progress_bar.set(1)
+        self.progress_frame.grid_forget()
+        self.btn_cancel.configure(state="normal")
         self.btn_generate.configure(state="normal")
+        self.btn_draft.configure(state="normal")
+        self.btn_finalize.configure(state="normal")
         self.btn_group.configure(state="normal")
         if hasattr(self, 'btn_gen_prompts'):
             self.btn_gen_prompts.configure(state="normal")
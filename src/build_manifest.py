@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+from src.decode_cache import file_sha256
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+MANIFEST_NAME = "build_manifest.json"
+
+
+class BuildManifest:
+    """Per-mod record of the inputs each output (DDS maps, .mtl, .outfit) was built from.
+
+    An output is current when its recorded inputs equal the new ones and the file on disk is still the one that
+    was built. Size and mtime are compared first, so only touched files are re-hashed.
+    """
+
+    def __init__(self, mod_dir):
+        self.manifest_file = Path(mod_dir) / MANIFEST_NAME
+        # output name -> {"inputs": {...}, "sha256", "size", "mtime_ns", "built"}
+        self.outputs = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self.outputs = json.load(f).get("outputs", {})
+        except Exception as e:
+            logger.warning(f"Error loading build manifest: {e}")
+
+    def _save(self):
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"outputs": self.outputs}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.manifest_file)
+
+    def output_hash(self, name, path):
+        """Content hash of an output, taken from the manifest while the file is unchanged on disk."""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            entry = self.outputs.get(name)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        return file_sha256(path)
+
+    def is_current(self, name, inputs, path):
+        """Inputs that could not be hashed are None and never count as current."""
+        with self._lock:
+            entry = self.outputs.get(name)
+        if entry is None or None in inputs.values() or entry["inputs"] != inputs:
+            return False
+        return self.output_hash(name, path) == entry["sha256"]
+
+    def record(self, name, inputs, path):
+        """Stores the inputs a freshly built output came from. Failures only cost a rebuild, so they are logged."""
+        try:
+            stat = Path(path).stat()
+            entry = {"inputs": inputs, "sha256": file_sha256(path), "size": stat.st_size,
+                     "mtime_ns": stat.st_mtime_ns, "built": round(time.time(), 3)}
+            with self._lock:
+                self.outputs[name] = entry
+                self._save()
+        except OSError as e:
+            logger.warning(f"Could not record {name} in the build manifest: {e}")
@@ -0,0 +1,79 @@
+import threading
+
+
+class TaskCancelled(Exception):
+    """Raised at the next checkpoint of a task whose CancelToken was cancelled."""
+
+
+class CancelToken:
+    """Cooperative cancellation flag shared by every thread working on one task."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def check(self):
+        """Checkpoint between stages and retries: raises TaskCancelled once the task was cancelled."""
+        if self._event.is_set():
+            raise TaskCancelled("Cancelled by the user.")
+
+    def on_cancel(self, callback):
+        """Calls callback when the token is cancelled (right away if it already is). Returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def run_cancellable(token, func, *args, **kwargs):
+    """Runs a blocking call, such as a Gemini request, that cancelling the token abandons right away.
+
+    The SDK cannot abort a request in flight, so the call finishes on a daemon thread and its result is dropped,
+    while the caller gets TaskCancelled as soon as the token is cancelled.
+    """
+    if token is None:
+        return func(*args, **kwargs)
+    token.check()
+
+    done = threading.Event()
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    unregister = token.on_cancel(done.set)
+    try:
+        threading.Thread(target=target, daemon=True, name="cancellable-call").start()
+        done.wait()
+    finally:
+        unregister()
+    token.check()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
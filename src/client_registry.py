@@ -0,0 +1,93 @@
+import logging
+import threading
+from typing import TYPE_CHECKING
+
+from src.lazy_imports import deferred_imports
+
+if TYPE_CHECKING:
+    import httpx
+    from google import genai
+    from google.genai import types
+    from haydee_outfit_gen.gemini_client import GeminiModClient
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+# 10 minutes, image generation at 4K regularly takes several minutes
+DEFAULT_TIMEOUT_MS = 600000
+
+
+def _load_sdk():
+    import httpx
+    from google import genai
+    from google.genai import types
+    from haydee_outfit_gen.gemini_client import GeminiModClient
+
+    # Monkey-patch google-genai Client to increase the default timeout to 10 minutes (600,000 ms)
+    if not getattr(genai.Client.__init__, "_haydee_timeout_patch", False):
+        original_client_init = genai.Client.__init__
+
+        def new_client_init(self, *args, **kwargs):
+            if 'http_options' not in kwargs:
+                kwargs['http_options'] = {'timeout': DEFAULT_TIMEOUT_MS}
+            original_client_init(self, *args, **kwargs)
+        new_client_init._haydee_timeout_patch = True
+        genai.Client.__init__ = new_client_init
+
+    return {"httpx": httpx, "genai": genai, "types": types, "GeminiModClient": GeminiModClient}
+
+
+# google-genai, httpx and pydantic are only imported for the first request, keeping them off the startup path
+import_sdk, __getattr__ = deferred_imports(globals(), ("httpx", "genai", "types", "GeminiModClient"), _load_sdk)
+
+
+class ClientRegistry:
+    """App-scoped cache of Gemini clients, so tasks and batch items reuse the same HTTP connection pool.
+
+    Clients are keyed by their settings; call clear() when the settings change. Pass an httpx transport
+    (e.g. benchmarks.fake_gemini.FakeGeminiTransport) to route every request through it instead of the network,
+    and a limiter (AdaptiveRateLimiter) to send every generate_content(_stream) call through it.
+    """
+
+    def __init__(self, timeout_ms=DEFAULT_TIMEOUT_MS, transport=None, limiter=None):
+        self.timeout_ms = timeout_ms
+        self.transport = transport
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._genai_clients = {}
+        self._mod_clients = {}
+
+    def genai_client(self, api_key):
+        import_sdk()
+        key = (api_key, self.timeout_ms)
+        with self._lock:
+            client = self._genai_clients.get(key)
+            if client is None:
+                http_options = {"timeout": self.timeout_ms}
+                if self.transport is not None:
+                    http_options["httpx_client"] = httpx.Client(transport=self.transport, timeout=self.timeout_ms / 1000)
+                client = genai.Client(api_key=api_key, http_options=types.HttpOptions(**http_options))
+                if self.limiter is not None:
+                    client.models.generate_content = self.limiter.wrap(client.models.generate_content)
+                    client.models.generate_content_stream = self.limiter.wrap_stream(client.models.generate_content_stream)
+                self._genai_clients[key] = client
+                logger.debug("Created a new Gemini API client.")
+            return client
+
+    def mod_client(self, api_key, image_resolution, model_name, validator_model):
+        import_sdk()
+        key = (api_key, image_resolution, model_name, validator_model, self.timeout_ms)
+        with self._lock:
+            client = self._mod_clients.get(key)
+        if client is None:
+            client = GeminiModClient(api_key=api_key, image_resolution=image_resolution, model_name=model_name, validator_model=validator_model)
+            # Share one connection pool between every model and resolution using this key
+            client.client = self.genai_client(api_key)
+            with self._lock:
+                client = self._mod_clients.setdefault(key, client)
+        return client
+
+    def clear(self):
+        """Drops cached clients so the next task picks up new settings. Running tasks keep their client."""
+        with self._lock:
+            self._genai_clients.clear()
+            self._mod_clients.clear()
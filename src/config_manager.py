@@ -1,12 +1,30 @@
 import os
 import json
+import threading
 from pathlib import Path
 
 class ConfigManager:
-    def __init__(self):
-        app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~'))
-        self.config_dir = Path(app_data) / "HaydeeOutfitGenerator"
+    """Loads settings.json and persists changes atomically on a background thread.
+
+    Rapid successive save() calls are coalesced into a single write after save_delay seconds;
+    call flush() before exiting to write any pending changes immediately. Each call copies the settings,
+    so the write never sees the dict while the caller is still changing it.
+    """
+
+    def __init__(self, config_dir=None, save_delay=0.5):
+        if config_dir is None:
+            app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~'))
+            config_dir = Path(app_data) / "HaydeeOutfitGenerator"
+        self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / "settings.json"
+        self.save_delay = save_delay
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        # Copy of the settings taken by the latest save() or flush(), serialized by _write()
+        self._snapshot = None
         
         self.config = {
             "gemini_api_key": "",
@@ -15,7 +33,22 @@ class ConfigManager:
             "image_resolution": "4K",
             "model_name": "gemini-3.1-flash-image-preview",
             "validator_model": "gemini-3.1-pro-preview",
-            "saved_prompts": []
+            "qa_mode": "sequential",
+            "best_of_n_candidates": 3,
+            "max_parallel_requests": 3,
+            "api_requests_per_minute": 20,
+            "api_max_concurrency": 4,
+            "batch_workers": 2,
+            "group_workers": 4,
+            "prompt_ideas_count": 3,
+            "decode_cache_mb": 1024,
+            "response_cache_ttl_hours": 168,
+            "bypass_response_cache": False,
+            "in_memory_images": True,
+            "dds_quality": "final",
+            "dds_encode_workers": 0,
+            "draft_resolution": "2K",
+            "finalize_mode": "upscale"
         }
         self.load()
 
@@ -28,9 +61,46 @@ class ConfigManager:
                 print(f"Error loading config: {e}")
 
     def save(self):
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+        """Schedules a write, restarting the delay so that a burst of changes is written once."""
+        with self._lock:
+            self._dirty = True
+            self._snapshot = dict(self.config)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self._write)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes pending changes now, e.g. on application exit."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._snapshot = dict(self.config)
+        self._write()
+
+    def _write(self):
+        # Writes are serialized so an older snapshot can never replace a newer file
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._timer = None
+                snapshot = self._snapshot
+
+            tmp_file = self.config_file.with_name(f"{self.config_file.name}.tmp")
+            try:
+                data = json.dumps(snapshot, indent=4)
+                self.config_dir.mkdir(parents=True, exist_ok=True)
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+            except Exception as e:
+                print(f"Error saving config: {e}")
+                with self._lock:
+                    self._dirty = True
@@ -0,0 +1,123 @@
+import io
+import os
+import struct
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+# Magic number plus the 124 byte header Pillow writes for DXT5 (no DX10 extension)
+DDS_HEADER_SIZE = 128
+# Offset of the height field, the only header value that differs between a strip and the full texture
+DDS_HEIGHT_OFFSET = 12
+
+DEFAULT_STRIP_ROWS = 256
+
+# Resampling used to bring the AI output to the target size: "final" matches ImageProcessor byte for byte
+DDS_QUALITY_RESAMPLING = {"final": "LANCZOS", "preview": "BILINEAR"}
+# Divisor of the target size: "preview" textures have a quarter of the pixels, so they compress about 4x faster
+DDS_QUALITY_DOWNSCALE = {"final": 1, "preview": 2}
+
+
+def diffuse_texture(image):
+    return image
+
+
+def specular_texture(mask):
+    """Same channel packing as ImageProcessor.create_specular_map: R = roughness, G = specular, B = 0."""
+    from PIL import Image
+
+    mask_l = mask.convert("L")
+    r_channel = mask_l.point(lambda val: int(250 - (val / 255.0) * 200))
+    g_channel = mask_l.point(lambda val: int(20 + (val / 255.0) * 235))
+    b_channel = Image.new("L", mask_l.size, 0)
+    return Image.merge("RGB", (r_channel, g_channel, b_channel))
+
+
+def normal_texture(image):
+    """Same DXT5nm packing as ImageProcessor.create_custom_normal_map: G = Y axis, A = X axis, R and B muted."""
+    from PIL import Image
+
+    r, g, _ = image.convert("RGB").split()
+    neutral = Image.new("L", image.size, 128)
+    return Image.merge("RGBA", (neutral, g, neutral, r))
+
+
+TEXTURE_BUILDERS = {"diffuse": diffuse_texture, "specular": specular_texture, "normal": normal_texture}
+
+
+def _encode_strip(mode, size, data):
+    """Runs in a worker process: compresses one strip of rows to a complete DXT5 DDS file."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.frombytes(mode, size, data).save(buffer, format="DDS", pixel_format="DXT5")
+    return buffer.getvalue()
+
+
+class DDSEncoder:
+    """Builds the final Suit_D/S/N textures and compresses them to DXT5 on a shared process pool.
+
+    DXT5 compresses every 4x4 block on its own, so the texture is split into strips of rows that are encoded in
+    parallel and concatenated behind a single header, giving the same file as one ImageProcessor call. Strips of
+    all maps being encoded at the same time share the pool, which is started on first use.
+    """
+
+    def __init__(self, max_workers=None, strip_rows=DEFAULT_STRIP_ROWS):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.strip_rows = max(4, strip_rows - strip_rows % 4)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def encode(self, kind, source_path, dds_path, resolution="4K", quality="final"):
+        """Drop-in replacement for ImageProcessor.img_to_dds / create_specular_map / create_custom_normal_map.
+
+        With quality="preview" the texture is encoded at half the resolution's size.
+        """
+        from PIL import Image
+
+        if quality not in DDS_QUALITY_RESAMPLING:
+            raise ValueError(f"Unknown DDS quality '{quality}'. Expected one of: {', '.join(DDS_QUALITY_RESAMPLING)}.")
+        resample = getattr(Image.Resampling, DDS_QUALITY_RESAMPLING[quality])
+        target_size = (4096 if resolution == "4K" else 2048) // DDS_QUALITY_DOWNSCALE[quality]
+        with Image.open(source_path) as image:
+            texture = TEXTURE_BUILDERS[kind](image).resize((target_size, target_size), resample)
+
+        dds_path = Path(dds_path)
+        tmp_path = dds_path.with_name(f"{dds_path.name}.{threading.get_ident()}.tmp")
+        if self.max_workers <= 1:
+            texture.save(tmp_path, format="DDS", pixel_format="DXT5")
+        else:
+            self._write_strips(texture, tmp_path)
+        os.replace(tmp_path, dds_path)
+        logger.info(f"Encoded {dds_path.name} ({quality} quality).")
+
+    def _write_strips(self, texture, tmp_path):
+        pool = self._pool()
+        width, height = texture.size
+        futures = []
+        for top in range(0, height, self.strip_rows):
+            strip = texture.crop((0, top, width, min(top + self.strip_rows, height)))
+            futures.append(pool.submit(_encode_strip, strip.mode, strip.size, strip.tobytes()))
+
+        parts = [future.result() for future in futures]
+        header = parts[0][:DDS_HEADER_SIZE]
+        header = header[:DDS_HEIGHT_OFFSET] + struct.pack("<I", height) + header[DDS_HEIGHT_OFFSET + 4:]
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            for part in parts:
+                f.write(part[DDS_HEADER_SIZE:])
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.image_buffer import ImageBuffer
+from src.lazy_imports import deferred_imports
+
+if TYPE_CHECKING:
+    from haydee_outfit_gen.image_processor import ImageProcessor
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Decoded textures kept in memory for image_buffer(); a 4K texture takes 64 MB
+DEFAULT_MAX_BUFFERS = 4
+
+
+def _load_library():
+    from haydee_outfit_gen.image_processor import ImageProcessor
+    return {"ImageProcessor": ImageProcessor}
+
+
+import_library, __getattr__ = deferred_imports(globals(), ("ImageProcessor",), _load_library)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DecodeCache:
+    """Persistent DDS -> PNG decode cache keyed by source content hash and resolution, with LRU eviction.
+
+    image_buffer() serves the in-memory image mode from a smaller LRU of decoded buffers that lasts for the session.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_buffers=DEFAULT_MAX_BUFFERS):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.max_buffers = max_buffers
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # key -> {"size": bytes, "last_used": timestamp}, kept in least -> most recently used order
+        self.entries = {}
+        # source sha256 -> ImageBuffer, kept in least -> most recently used order
+        self.buffers = {}
+        # source path -> [size, mtime_ns, sha256], avoids re-hashing unchanged files
+        self.hash_memo = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.hash_memo = data.get("hash_memo", {})
+        except Exception as e:
+            logger.warning(f"Error loading decode cache index: {e}")
+
+    def _save_index(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"entries": self.entries, "hash_memo": self.hash_memo}, f)
+        os.replace(tmp_file, self.index_file)
+
+    def source_hash(self, path):
+        path = Path(path)
+        stat = path.stat()
+        memo_key = str(path.resolve())
+        memo = self.hash_memo.get(memo_key)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        digest = file_sha256(path)
+        with self._lock:
+            self.hash_memo[memo_key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.png"
+
+    def dds_to_png(self, dds_path, png_path, resolution="4K"):
+        """Drop-in replacement for ImageProcessor.dds_to_png. Returns True on a cache hit."""
+        key = f"{self.source_hash(dds_path)}_{resolution}"
+        cached_png = self._entry_path(key)
+
+        with self._lock:
+            hit = key in self.entries and cached_png.exists()
+            if hit:
+                self.entries[key] = self.entries.pop(key)
+                self.entries[key]["last_used"] = time.time()
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if hit:
+            logger.info(f"Decode cache hit for {Path(dds_path).name}.")
+            shutil.copyfile(cached_png, png_path)
+            with self._lock:
+                self._save_index()
+            return True
+
+        import_library()
+        ImageProcessor.dds_to_png(Path(dds_path), Path(png_path))
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_png = cached_png.with_name(f"{key}.{threading.get_ident()}.tmp")
+        shutil.copyfile(png_path, tmp_png)
+        os.replace(tmp_png, cached_png)
+
+        with self._lock:
+            self.entries.pop(key, None)
+            self.entries[key] = {"size": cached_png.stat().st_size, "last_used": time.time()}
+            self._evict()
+            self._save_index()
+        return False
+
+    def image_buffer(self, dds_path):
+        """In-memory counterpart of dds_to_png: returns the decoded texture as an ImageBuffer."""
+        key = self.source_hash(dds_path)
+        with self._lock:
+            buffer = self.buffers.pop(key, None)
+            if buffer is not None:
+                self.buffers[key] = buffer
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if buffer is not None:
+            logger.info(f"Decode cache hit for {Path(dds_path).name}.")
+            return buffer
+
+        buffer = ImageBuffer.from_dds(dds_path)
+        with self._lock:
+            self.buffers[key] = buffer
+            while len(self.buffers) > self.max_buffers:
+                del self.buffers[next(iter(self.buffers))]
+        return buffer
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits into max_bytes. Caller holds the lock."""
+        total = sum(entry["size"] for entry in self.entries.values())
+        for key, entry in list(self.entries.items()):
+            if total <= self.max_bytes:
+                break
+            try:
+                self._entry_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self.entries[key]
+            logger.info(f"Evicted decode cache entry {key[:12]}.")
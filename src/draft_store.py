@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import shutil
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+DRAFT_IMAGE = "draft_Suit_D.png"
+DRAFT_FILE = "draft.json"
+
+
+class DraftStore:
+    """Latest draft diffuse per mod: the preview-size texture plus the prompt and QA feedback that produced it.
+
+    A draft never touches the game's Outfits folder; it stays here until it is finalized, replaced by a new
+    draft of the same mod, or discarded.
+    """
+
+    def __init__(self, drafts_dir):
+        self.drafts_dir = Path(drafts_dir)
+
+    def _dir(self, mod_name):
+        return self.drafts_dir / mod_name.strip()
+
+    def save(self, mod_name, image_png, style, feedback, resolution, is_valid):
+        """Copies the generated texture into the store and returns the draft, replacing any previous one."""
+        draft_dir = self._dir(mod_name)
+        draft_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(image_png, draft_dir / DRAFT_IMAGE)
+        draft = {
+            "mod": mod_name,
+            "style": style,
+            "feedback": list(feedback),
+            "resolution": resolution,
+            "is_valid": is_valid,
+            "created": round(time.time(), 3),
+        }
+        tmp_file = draft_dir / f"{DRAFT_FILE}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(draft, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, draft_dir / DRAFT_FILE)
+        return dict(draft, image=draft_dir / DRAFT_IMAGE)
+
+    def load(self, mod_name):
+        """The mod's draft with its image path, or None if there is no usable draft."""
+        draft_dir = self._dir(mod_name)
+        if not (draft_dir / DRAFT_IMAGE).exists():
+            return None
+        try:
+            with open(draft_dir / DRAFT_FILE, 'r', encoding='utf-8') as f:
+                draft = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading the draft of '{mod_name}': {e}")
+            return None
+        return dict(draft, image=draft_dir / DRAFT_IMAGE)
+
+    def discard(self, mod_name):
+        shutil.rmtree(self._dir(mod_name), ignore_errors=True)
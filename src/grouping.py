@@ -0,0 +1,158 @@
+import os
+import errno
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.progress import ProgressReporter
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+
+def variant_mtl(multimod_name, mod):
+    """Material file for one variant, identical to the one written by MultiModBuilder."""
+    return f"""HD_DATA_TXT 300
+material
+{{
+	type OPAQUE;
+	twoSided false;
+	width 64.0;
+	height 64.0;
+	normalMap "Outfits\\{multimod_name}\\Suit_N.dds";
+	diffuseMap "Outfits\\{multimod_name}\\{mod}_d.dds";
+	specularMap "Outfits\\{multimod_name}\\{mod}_s.dds";
+	speculars 1.0 2.0 0.0;
+	surface Default;
+}}
+"""
+
+
+class ParallelGrouper:
+    """Validates and migrates the variants of a MultiModBuilder concurrently, with rollback on failure.
+
+    Variants are assembled in a staging directory that only replaces the multi-mod directory once every
+    variant succeeded. When the sources are going to be deleted anyway, textures are renamed instead of
+    copied (falling back to a copy across filesystems), and renamed files are moved back on failure.
+    Kept sources are always copied: hardlinks would let a later in-place regeneration of a source
+    texture silently change the grouped one.
+    """
+
+    def __init__(self, builder, workers=4, move_sources=False, progress=None, cancel_token=None):
+        self.builder = builder
+        self.workers = max(1, workers)
+        self.move_sources = move_sources
+        self.progress = progress if progress is not None else ProgressReporter()
+        self.cancel_token = cancel_token
+
+        self.staging_dir = builder.outfits_dir / f".{builder.multimod_name}.staging"
+        self.backup_dir = builder.outfits_dir / f".{builder.multimod_name}.backup"
+        self._moved = []
+        self._lock = threading.Lock()
+
+    def run(self):
+        mods = self.builder.source_mods
+        if self.builder.multimod_name.lower() in (mod.lower() for mod in mods):
+            raise ValueError("Multi-mod name must differ from the source mod names.")
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(mods)), thread_name_prefix="group-validate") as executor:
+            list(executor.map(self._validate_variant, mods))
+
+        if self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir)
+        self.staging_dir.mkdir(parents=True)
+
+        try:
+            self._migrate_all(mods)
+            if self.cancel_token is not None:
+                self.cancel_token.check()
+            with self.progress.stage(self.builder.multimod_name, "write", label=f"{self.builder.multimod_name}.outfit"):
+                self._commit()
+        except BaseException:
+            self._rollback()
+            raise
+
+        if self.move_sources:
+            self.builder.cleanup_sources()
+
+    def _validate_variant(self, mod):
+        if mod.lower() == "haydee":
+            raise ValueError("Cannot group the system 'Haydee' mod. Please remove it from the list.")
+        mod_path = self.builder.outfits_dir / mod
+        if not mod_path.exists():
+            raise FileNotFoundError(f"Source mod '{mod}' not found in {self.builder.outfits_dir}.")
+        dds_path = mod_path / "Suit_D.dds"
+        if not dds_path.exists():
+            raise FileNotFoundError(f"Texture file not found in source mod: {dds_path}")
+
+    def _migrate_all(self, mods):
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(mods)), thread_name_prefix="group-migrate")
+        futures = {executor.submit(self._migrate_variant, mod): mod for mod in mods}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                logger.info(f"[{done}/{len(mods)}] Migrated variant '{futures[future]}'.")
+        finally:
+            # On failure: drop variants that have not started and wait for the running ones before rolling back
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _migrate_variant(self, mod):
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+        source_dir = self.builder.outfits_dir / mod
+        with self.progress.stage(self.builder.multimod_name, "migrate", label=mod, output=self.staging_dir / f"{mod}_d.dds"):
+            self._transfer(source_dir / "Suit_D.dds", self.staging_dir / f"{mod}_d.dds")
+            # Old mods might not have a Suit_S generated
+            if (source_dir / "Suit_S.dds").exists():
+                self._transfer(source_dir / "Suit_S.dds", self.staging_dir / f"{mod}_s.dds")
+            (self.staging_dir / f"{mod}.mtl").write_text(variant_mtl(self.builder.multimod_name, mod), encoding="utf-8")
+
+    def _transfer(self, src, dst):
+        if self.move_sources:
+            try:
+                os.rename(src, dst)
+                with self._lock:
+                    self._moved.append((src, dst))
+                return
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        shutil.copy2(src, dst)
+
+    def _commit(self):
+        mod_dir = self.builder.mod_dir
+        outfit_path = self.builder.outfits_dir / f"{self.builder.multimod_name}.outfit"
+        previous_outfit = outfit_path.read_bytes() if outfit_path.exists() else None
+
+        if self.backup_dir.exists():
+            shutil.rmtree(self.backup_dir)
+        if mod_dir.exists():
+            logger.warning(f"Multi-mod directory '{self.builder.multimod_name}' already exists. Overwriting...")
+            os.rename(mod_dir, self.backup_dir)
+        os.rename(self.staging_dir, mod_dir)
+
+        try:
+            self.builder.generate_outfit_file()
+        except BaseException:
+            # Put everything back where _rollback expects it
+            os.rename(mod_dir, self.staging_dir)
+            if self.backup_dir.exists():
+                os.rename(self.backup_dir, mod_dir)
+            if previous_outfit is not None:
+                outfit_path.write_bytes(previous_outfit)
+            elif outfit_path.exists():
+                outfit_path.unlink()
+            raise
+
+        if self.backup_dir.exists():
+            shutil.rmtree(self.backup_dir)
+
+    def _rollback(self):
+        logger.warning("Grouping failed. Rolling back...")
+        for src, dst in reversed(self._moved):
+            try:
+                os.rename(dst, src)
+            except OSError as e:
+                logger.error(f"Could not restore {src}: {e}")
+        self._moved.clear()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
@@ -0,0 +1,38 @@
+import io
+import hashlib
+from pathlib import Path
+
+
+class ImageBuffer:
+    """Decoded image kept in memory as an uncompressed TIFF, handed to GeminiModClient instead of a PNG temp file.
+
+    The client only reads its input images through PIL's Image.open, which also accepts file objects. open()
+    returns an independent file object on every call, so concurrent generation and validation requests can
+    share one buffer.
+    """
+
+    def __init__(self, data, name="image.tiff"):
+        self.data = data
+        self.name = name
+        self._sha256 = None
+
+    @classmethod
+    def from_dds(cls, dds_path):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        with Image.open(dds_path) as image:
+            # Uncompressed, so encoding here and decoding in every API call is a plain copy, unlike PNG
+            image.save(buffer, format="TIFF")
+        return cls(buffer.getvalue(), name=Path(dds_path).name)
+
+    def open(self):
+        return io.BytesIO(self.data)
+
+    def sha256(self):
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    def __len__(self):
+        return len(self.data)
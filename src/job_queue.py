@@ -0,0 +1,209 @@
+import os
+import json
+import uuid
+import threading
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def parse_job_lines(text):
+    """Parses a pasted list of 'Name: style' (or 'Name | style') lines into (name, style) tuples."""
+    entries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        for separator in ("|", ":"):
+            if separator in line:
+                name, style = line.split(separator, 1)
+                break
+        else:
+            name, style = line, ""
+        name = name.strip()
+        if name:
+            entries.append((name, style.strip()))
+    return entries
+
+
+class JobQueue:
+    """Persistent generation queue processed by a pool of worker threads."""
+
+    def __init__(self, storage_file, runner, on_change=None, max_retries=1):
+        self.storage_file = Path(storage_file)
+        self.runner = runner
+        self.on_change = on_change
+        self.max_retries = max_retries
+
+        self.jobs = []
+        self.was_running = False
+        # Set by stop() and cleared by start(); a queue stopped by the user is not resumed on the next launch
+        self.stopped = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._active_workers = 0
+        self._threads = []
+        self.load()
+
+    # --- Persistence ---
+
+    def load(self):
+        if not self.storage_file.exists():
+            return
+        try:
+            with open(self.storage_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading batch queue: {e}")
+            return
+
+        self.jobs = data.get("jobs", [])
+        self.stopped = data.get("stopped", False)
+        self.was_running = data.get("running", False) and not self.stopped
+        # Jobs that were mid-flight when the app closed start over
+        for job in self.jobs:
+            if job.get("status") == RUNNING:
+                job["status"] = PENDING
+
+    def save(self):
+        with self._lock:
+            data = {"running": self.is_running, "stopped": self.stopped, "jobs": [dict(job) for job in self.jobs]}
+        tmp_file = self.storage_file.with_suffix(".tmp")
+        with self._save_lock:
+            try:
+                self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=4)
+                os.replace(tmp_file, self.storage_file)
+            except Exception as e:
+                logger.warning(f"Error saving batch queue: {e}")
+
+    def _changed(self):
+        self.save()
+        if self.on_change:
+            self.on_change()
+
+    # --- Job management ---
+
+    def add(self, name, style, gen_d=True, gen_s=True, gen_n=True):
+        job = {
+            "id": uuid.uuid4().hex,
+            "name": name,
+            "style": style,
+            "gen_d": gen_d,
+            "gen_s": gen_s,
+            "gen_n": gen_n,
+            "status": PENDING,
+            "attempts": 0,
+            "error": "",
+        }
+        with self._lock:
+            self.jobs.append(job)
+        self._changed()
+        return job
+
+    def retry(self, job_id):
+        with self._lock:
+            for job in self.jobs:
+                if job["id"] == job_id and job["status"] == FAILED:
+                    job["status"] = PENDING
+                    job["attempts"] = 0
+                    job["error"] = ""
+        self._changed()
+
+    def remove(self, job_id):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job["id"] != job_id or job["status"] == RUNNING]
+        self._changed()
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job["status"] != DONE]
+        self._changed()
+
+    def counts(self):
+        with self._lock:
+            counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self.jobs:
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+    # --- Workers ---
+
+    @property
+    def is_running(self):
+        return self._active_workers > 0 and not self._stop_event.is_set()
+
+    def start(self, workers=1):
+        if self._active_workers > 0:
+            return
+        self._stop_event.clear()
+        self.stopped = False
+        workers = max(1, int(workers))
+        self._active_workers = workers
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f"batch-worker-{i + 1}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Batch queue started with {workers} worker(s).")
+        self._changed()
+
+    def wait(self):
+        """Blocks until every worker has exited."""
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self):
+        """Lets the running jobs finish, but does not pick up any new ones."""
+        self._stop_event.set()
+        self.stopped = True
+        logger.info("Batch queue will stop after the running jobs finish.")
+        self._changed()
+
+    def _next_job(self):
+        with self._lock:
+            for job in self.jobs:
+                if job["status"] == PENDING:
+                    job["status"] = RUNNING
+                    job["attempts"] += 1
+                    return job
+        return None
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            job = self._next_job()
+            if job is None:
+                break
+            self._changed()
+
+            logger.info(f"[Batch] Starting '{job['name']}' (attempt {job['attempts']})...")
+            try:
+                self.runner(job["name"], job["style"], job["gen_d"], job["gen_s"], job["gen_n"])
+                job["status"] = DONE
+                job["error"] = ""
+                logger.info(f"[Batch] '{job['name']}' finished.")
+            except Exception as e:
+                job["error"] = str(e)
+                if job["attempts"] <= self.max_retries:
+                    job["status"] = PENDING
+                    logger.warning(f"[Batch] '{job['name']}' failed: {e}. Re-queued for retry.")
+                else:
+                    job["status"] = FAILED
+                    logger.error(f"[Batch] '{job['name']}' failed: {e}")
+            self._changed()
+
+        with self._lock:
+            self._active_workers -= 1
+            is_last = self._active_workers == 0
+        if is_last:
+            logger.info("Batch queue is idle.")
+            self._changed()
@@ -0,0 +1,28 @@
+import threading
+
+
+def deferred_imports(module_globals, names, loader):
+    """Defers a module's heavy imports (google-genai, PIL, the haydee_outfit_gen library) until first use.
+
+    loader() performs the imports and returns {name: object} for the given names. Returns (ensure, __getattr__):
+    ensure() puts every missing name into the module globals and must run before code uses them; assigning the
+    returned __getattr__ in the module (PEP 562) makes the names resolvable from outside, e.g. for mock.patch.
+    Names already present (such as test doubles) are left alone.
+    """
+    names = frozenset(names)
+    lock = threading.Lock()
+
+    def ensure():
+        if names.issubset(module_globals):
+            return
+        with lock:
+            for name, value in loader().items():
+                module_globals.setdefault(name, value)
+
+    def __getattr__(name):
+        if name not in names:
+            raise AttributeError(f"module {module_globals['__name__']!r} has no attribute {name!r}")
+        ensure()
+        return module_globals[name]
+
+    return ensure, __getattr__
@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+MAP_FILES = {"D": "Suit_D.dds", "S": "Suit_S.dds", "N": "Suit_N.dds"}
+SLOT_PATTERN = re.compile(r'slot\s+"([^"]*)"\s+"([^"]*)"\s*;')
+
+
+def parse_outfit_slots(text):
+    """Returns (author, slot categories) declared in an .outfit file."""
+    author = None
+    categories = []
+    for category, value in SLOT_PATTERN.findall(text):
+        if category == "mod by":
+            author = value
+        elif category not in categories:
+            categories.append(category)
+    return author, categories
+
+
+class ModIndex:
+    """Persistent index of the mods in haydee_path/Outfits, refreshed incrementally by an mtime scan.
+
+    Only mods whose directory or .outfit file changed since the last scan are re-read.
+    """
+
+    def __init__(self, index_file, outfits_dir=None):
+        self.index_file = Path(index_file)
+        self.outfits_dir = Path(outfits_dir) if outfits_dir else None
+        self.mods = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if self.outfits_dir is not None and data.get("outfits_dir") == str(self.outfits_dir):
+                self.mods = data.get("mods", {})
+        except Exception as e:
+            logger.warning(f"Error loading mod index: {e}")
+
+    def _save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"outfits_dir": str(self.outfits_dir), "mods": self.mods}, f)
+        os.replace(tmp_file, self.index_file)
+
+    def set_outfits_dir(self, outfits_dir):
+        """Points the index at another game installation, dropping the entries of the previous one."""
+        outfits_dir = Path(outfits_dir)
+        with self._lock:
+            if outfits_dir != self.outfits_dir:
+                self.outfits_dir = outfits_dir
+                self.mods = {}
+
+    def available(self):
+        return self.outfits_dir is not None and self.outfits_dir.is_dir()
+
+    @staticmethod
+    def _mtime_ns(path):
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_mod(self, mod_dir, outfit_mtime_ns):
+        maps = {}
+        for key, file_name in MAP_FILES.items():
+            try:
+                maps[key] = (mod_dir / file_name).stat().st_size
+            except OSError:
+                maps[key] = None
+
+        author, categories = None, []
+        if outfit_mtime_ns is not None:
+            try:
+                outfit_path = self.outfits_dir / f"{mod_dir.name}.outfit"
+                author, categories = parse_outfit_slots(outfit_path.read_text(encoding="utf-8", errors="replace"))
+            except OSError:
+                pass
+
+        return {
+            "dir_mtime_ns": self._mtime_ns(mod_dir),
+            "outfit_mtime_ns": outfit_mtime_ns,
+            "maps": maps,
+            "size": sum(size for size in maps.values() if size),
+            "author": author,
+            "slot_categories": categories,
+        }
+
+    def refresh(self):
+        """Updates changed, new and removed mods. Returns True if anything changed."""
+        if not self.available():
+            return False
+
+        with self._lock:
+            seen = set()
+            changed = False
+            with os.scandir(self.outfits_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir() or entry.name.startswith("."):
+                        continue
+                    name = entry.name
+                    seen.add(name)
+                    mod_dir = Path(entry.path)
+                    dir_mtime_ns = entry.stat().st_mtime_ns
+                    outfit_mtime_ns = self._mtime_ns(self.outfits_dir / f"{name}.outfit")
+
+                    cached = self.mods.get(name)
+                    if cached and cached["dir_mtime_ns"] == dir_mtime_ns and cached["outfit_mtime_ns"] == outfit_mtime_ns:
+                        continue
+                    self.mods[name] = self._read_mod(mod_dir, outfit_mtime_ns)
+                    changed = True
+
+            for name in set(self.mods) - seen:
+                del self.mods[name]
+                changed = True
+
+            if changed:
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"Error saving mod index: {e}")
+            return changed
+
+    def search(self, query=""):
+        """Returns (name, info) pairs whose name, author or slot category contains every word of the query."""
+        words = query.lower().split()
+        with self._lock:
+            items = sorted(self.mods.items(), key=lambda item: item[0].lower())
+        results = []
+        for name, info in items:
+            haystack = " ".join([name, info.get("author") or ""] + info.get("slot_categories", [])).lower()
+            if all(word in haystack for word in words):
+                results.append((name, info))
+        return results
+
+    def problems(self, names):
+        """Up-front validation of grouping sources, mirroring MultiModBuilder.validate_sources."""
+        problems = []
+        with self._lock:
+            for name in names:
+                info = self.mods.get(name)
+                if name.lower() == "haydee":
+                    problems.append("Cannot group the system 'Haydee' mod.")
+                elif info is None:
+                    problems.append(f"Source mod '{name}' not found.")
+                elif not info["maps"].get("D"):
+                    problems.append(f"Source mod '{name}' has no Suit_D.dds.")
+        return problems
@@ -0,0 +1,44 @@
+import os
+import shutil
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+
+class ModSnapshot:
+    """Backup of a mod folder and its .outfit file taken before a generation run, restored if the run is cancelled.
+
+    The backup lives next to the mod as a hidden folder, which the game and the mod index ignore. A run that is
+    going to clear the folder anyway moves it aside instead of copying it.
+    """
+
+    def __init__(self, mod_dir, outfit_file):
+        self.mod_dir = Path(mod_dir)
+        self.outfit_file = Path(outfit_file)
+        self.backup_dir = self.mod_dir.with_name(f".{self.mod_dir.name}.backup")
+        self._outfit = None
+
+    def take(self, move=False):
+        if self.backup_dir.exists():
+            shutil.rmtree(self.backup_dir)
+        if self.mod_dir.exists():
+            if move:
+                os.rename(self.mod_dir, self.backup_dir)
+            else:
+                shutil.copytree(self.mod_dir, self.backup_dir)
+        self._outfit = self.outfit_file.read_bytes() if self.outfit_file.exists() else None
+
+    def restore(self):
+        """Puts the mod back the way take() found it, dropping everything the run wrote."""
+        shutil.rmtree(self.mod_dir, ignore_errors=True)
+        if self.backup_dir.exists():
+            os.rename(self.backup_dir, self.mod_dir)
+        if self._outfit is not None:
+            self.outfit_file.write_bytes(self._outfit)
+        elif self.outfit_file.exists():
+            self.outfit_file.unlink()
+        logger.info(f"Rolled back '{self.mod_dir.name}' to its state before the run.")
+
+    def discard(self):
+        shutil.rmtree(self.backup_dir, ignore_errors=True)
@@ -0,0 +1,865 @@
+import json
+import re
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src import client_registry, decode_cache
+from src.client_registry import ClientRegistry
+from src.build_manifest import BuildManifest
+from src.cancellation import TaskCancelled, run_cancellable
+from src.dds_encoder import DDSEncoder
+from src.decode_cache import DecodeCache, file_sha256
+from src.draft_store import DraftStore
+from src.grouping import ParallelGrouper
+from src.image_buffer import ImageBuffer
+from src.json_stream import IncrementalJSONArrayParser
+from src.mod_snapshot import ModSnapshot
+from src.progress import ProgressReporter, StageHistory
+from src.rate_limiter import AdaptiveRateLimiter
+from src.response_cache import ResponseCache, cache_key
+from src.run_history import RunHistory, RunRecorder
+from src.lazy_imports import deferred_imports
+
+if TYPE_CHECKING:
+    from haydee_outfit_gen.mod_builder import ModBuilder, MultiModBuilder
+    from haydee_outfit_gen.image_processor import ImageProcessor
+    from haydee_outfit_gen.gemini_client import ValidationResult
+
+
+def _load_library():
+    # Importing any haydee_outfit_gen module also imports google-genai, pydantic and PIL
+    from haydee_outfit_gen.mod_builder import ModBuilder, MultiModBuilder
+    from haydee_outfit_gen.image_processor import ImageProcessor
+    from haydee_outfit_gen.gemini_client import ValidationResult
+    return {"ModBuilder": ModBuilder, "MultiModBuilder": MultiModBuilder, "ImageProcessor": ImageProcessor, "ValidationResult": ValidationResult}
+
+
+import_library, __getattr__ = deferred_imports(
+    globals(), ("ModBuilder", "MultiModBuilder", "ImageProcessor", "ValidationResult"), _load_library
+)
+
+
+def warm_imports():
+    """Imports the AI SDK and imaging libraries ahead of the first task, e.g. on a background thread at startup."""
+    import_library()
+    decode_cache.import_library()
+    client_registry.import_sdk()
+
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+PROMPT_IDEAS_INSTRUCTION = """You are an expert prompt engineer for an AI texture generator modifying a biomechanical female character named Haydee.
+Her original suit features synthetic skin, mechanical joints, and glossy armor plates.
+Generate {count} distinct, highly detailed, and creative outfit concepts based on the user's theme.
+Focus on vivid colors, specific material textures (e.g., glossy plastic, brushed metal, matte rubber, glowing LEDs), and distinct patterns.
+Return the result STRICTLY as a JSON array of objects.
+Each object must have exactly two keys: 'name' (a short PascalCase string for the mod name without spaces, e.g., 'CandyPop') and 'style' (a detailed text prompt for the AI image generator, e.g., 'bright colorful lollipop candy theme, glossy plastic armor plates...').
+Do not include any other text, markdown formatting, or explanation. Just the raw JSON array."""
+
+
+QA_MAX_ATTEMPTS = 3
+
+# Feedback of the all-pass verdict validate_texture returns when the validator API call fails
+VALIDATION_BYPASS_FEEDBACK = "Validation bypassed due to API error."
+
+# "finalize_mode" values: reuse the approved draft as the diffuse, or regenerate it at full resolution from the draft
+FINALIZE_MODES = ("upscale", "regenerate")
+
+
+def parse_mod_list(source_mods_str):
+    """Splits a comma-separated list of mod names."""
+    return [m.strip() for m in source_mods_str.split(",") if m.strip()]
+
+
+class OutfitPipeline:
+    """GUI-free generation, prompt idea and grouping workflows driven by the ConfigManager settings."""
+
+    def __init__(self, config, cache_dir=None, clients=None):
+        self.config = config
+        self.logger = logger
+        if clients is None:
+            limiter = AdaptiveRateLimiter(
+                requests_per_minute=int(config.get("api_requests_per_minute", 20)),
+                max_concurrency=int(config.get("api_max_concurrency", 4)),
+            )
+            clients = ClientRegistry(limiter=limiter)
+        self.clients = clients
+        self.dds_encoder = DDSEncoder(max_workers=int(config.get("dds_encode_workers", 0)) or None)
+        # task -> QA feedback of the failed validations, for the runs that keep it
+        self._qa_feedback = {}
+        self.drafts = DraftStore(Path(cache_dir) / "drafts" if cache_dir is not None else Path(tempfile.gettempdir()) / "haydee_drafts")
+        self.decode_cache = None
+        self.response_cache = None
+        self.run_history = None
+        self.progress = ProgressReporter(StageHistory(Path(cache_dir) / "stage_history.json" if cache_dir is not None else None))
+        if cache_dir is not None:
+            self.run_history = RunHistory(Path(cache_dir) / "run_history.json")
+            max_bytes = int(config.get("decode_cache_mb", 1024)) * 1024 * 1024
+            self.decode_cache = DecodeCache(Path(cache_dir) / "decoded", max_bytes=max_bytes)
+            self.response_cache = ResponseCache(
+                Path(cache_dir) / "responses.json",
+                ttl_seconds=float(config.get("response_cache_ttl_hours", 168)) * 3600,
+            )
+
+    @contextmanager
+    def _collect_feedback(self, task):
+        """Collects the feedback of every failed QA validation of the task into the yielded list."""
+        feedback = self._qa_feedback[task] = []
+        try:
+            yield feedback
+        finally:
+            if self._qa_feedback.get(task) is feedback:
+                del self._qa_feedback[task]
+
+    @contextmanager
+    def _stage(self, task, stage, label=None, output=None, cancel_token=None):
+        """progress.stage with a cancellation checkpoint before the stage starts."""
+        if cancel_token is not None:
+            cancel_token.check()
+        with self.progress.stage(task, stage, label=label, output=output) as details:
+            yield details
+
+    def _decode_dds(self, dds_path, png_path, res, task=None, cancel_token=None):
+        """Decodes a DDS texture for the API calls and returns the image to pass to them.
+
+        By default the decode stays in memory as an ImageBuffer. With in_memory_images disabled it is written to
+        png_path and png_path is returned. Both reuse a previous decode of identical content when possible.
+        """
+        import_library()
+        with self._stage(task, "decode", label=Path(dds_path).name, output=png_path, cancel_token=cancel_token) as details:
+            if self.config.get("in_memory_images", True):
+                image = None
+                if self.decode_cache is not None:
+                    try:
+                        image = self.decode_cache.image_buffer(dds_path)
+                    except OSError as e:
+                        self.logger.warning(f"Decode cache unavailable ({e}). Decoding directly.")
+                if image is None:
+                    image = ImageBuffer.from_dds(dds_path)
+                details["bytes"] = len(image)
+                return image
+            if self.decode_cache is not None:
+                try:
+                    self.decode_cache.dds_to_png(dds_path, png_path, resolution=res)
+                    return png_path
+                except OSError as e:
+                    self.logger.warning(f"Decode cache unavailable ({e}). Decoding directly.")
+            ImageProcessor.dds_to_png(dds_path, png_path)
+            return png_path
+
+    def _encode_dds(self, kind, source_png, dds_path, res, task=None, cancel_token=None):
+        """Builds and compresses one final texture on the DDS encoder's process pool."""
+        with self._stage(task, "encode", label=dds_path.name, output=dds_path, cancel_token=cancel_token):
+            self.dds_encoder.encode(kind, source_png, dds_path, resolution=res, quality=self.config.get("dds_quality", "final"))
+
+    def _generate_texture(self, client, task=None, label=None, cancel_token=None, **kwargs):
+        kwargs["base_image_path"] = _image_source(kwargs["base_image_path"])
+        with self._stage(task, "generate", label=label, output=kwargs["output_path"], cancel_token=cancel_token):
+            run_cancellable(cancel_token, client.generate_texture, **kwargs)
+
+    def _active_response_cache(self):
+        if self.config.get("bypass_response_cache", False):
+            return None
+        return self.response_cache
+
+    def _validate(self, client, base_png, generated_png, style, task=None, label=None, cancel_token=None):
+        """Runs QA validation, reusing the verdict for identical images, style and validator model."""
+        with self._stage(task, "validate", label=label, cancel_token=cancel_token):
+            validation_result = self._validate_cached(client, base_png, generated_png, style, cancel_token=cancel_token)
+        feedback = self._qa_feedback.get(task)
+        if feedback is not None and not validation_result.is_valid and validation_result.feedback:
+            feedback.append(validation_result.feedback)
+        return validation_result
+
+    def _validate_cached(self, client, base_png, generated_png, style, cancel_token=None):
+        import_library()
+        cache = self._active_response_cache()
+        key = None
+        if cache is not None:
+            try:
+                key = cache_key(self.config.get("validator_model", "gemini-3.1-pro-preview"), style,
+                                _content_hash(base_png), _content_hash(generated_png))
+            except (OSError, TypeError) as e:
+                self.logger.debug(f"Skipping the response cache for validation: {e}")
+            if key is not None:
+                cached = cache.get("validation", key)
+                if cached is not None:
+                    return ValidationResult(**cached)
+
+        validation_result = run_cancellable(
+            cancel_token, client.validate_texture,
+            base_image_path=_image_source(base_png),
+            generated_image_path=_image_source(generated_png),
+            style=style
+        )
+        if (key is not None and isinstance(validation_result, ValidationResult)
+                and validation_result.feedback != VALIDATION_BYPASS_FEEDBACK):
+            cache.put(key, validation_result.model_dump())
+        return validation_result
+
+    def generate_mod(self, mod_name, style, gen_d, gen_s, gen_n, stale_only=False, cancel_token=None):
+        """Runs the full generation pipeline for one mod and records its stage timings. Raises on failure.
+
+        With stale_only, selected outputs whose build manifest inputs are unchanged are skipped and the mod folder
+        is not cleared. Cancelling cancel_token stops the run at the next stage or API call, raising TaskCancelled,
+        and restores the mod folder to its state before the run.
+        """
+        with self._recorded_run(mod_name, self.config.get("image_resolution", "4K")):
+            self._generate_mod(mod_name, style, gen_d, gen_s, gen_n, stale_only, cancel_token)
+
+    @contextmanager
+    def _recorded_run(self, task, resolution):
+        """Records the stages of the block as one run in the run history and logs its timings."""
+        recorder = RunRecorder(
+            task,
+            resolution=resolution,
+            model=self.config.get("model_name", "gemini-3.1-flash-image-preview"),
+            validator_model=self.config.get("validator_model", "gemini-3.1-pro-preview"),
+            qa_mode=self.config.get("qa_mode", "sequential"),
+        )
+        self.progress.subscribe(recorder)
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.progress.unsubscribe(recorder)
+            run = recorder.finish(error)
+            totals = {}
+            for stage in run["stages"]:
+                totals[stage["stage"]] = totals.get(stage["stage"], 0) + stage["elapsed"]
+            self.logger.info(f"Run timings for '{task}': {run['elapsed']:.1f}s total ("
+                             f"{', '.join(f'{stage} {seconds:.1f}s' for stage, seconds in totals.items())}).")
+            if self.run_history is not None:
+                self.run_history.add(run)
+
+    def generate_draft(self, mod_name, style, cancel_token=None):
+        """Generates and QA-validates a diffuse at the draft resolution for fast iteration. Raises on failure.
+
+        Only the diffuse is made, no DDS is encoded and the mod folder is left alone. The texture is kept with its
+        style and QA feedback in the draft store and returned as a draft dict; finalize_draft() builds the mod from it.
+        """
+        import_library()
+        draft_res = self.config.get("draft_resolution", "2K")
+        api_key = self.config["gemini_api_key"]
+        model_name = self.config.get("model_name", "gemini-3.1-flash-image-preview")
+        validator_model = self.config.get("validator_model", "gemini-3.1-pro-preview")
+        base_dds = Path(self.config["haydee_path"]) / "Outfits" / "Haydee" / "Suit_D.dds"
+
+        with self._recorded_run(mod_name, draft_res), self._collect_feedback(mod_name) as feedback:
+            if not base_dds.exists():
+                raise FileNotFoundError(f"Base texture not found at {base_dds}. Please verify your game path.")
+            self.logger.info(f"Generating a {draft_res} draft of '{mod_name}'...")
+            self.progress.plan(mod_name, ["decode", "generate", "validate"])
+            client = self.clients.mod_client(api_key, draft_res, model_name, validator_model)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_path = Path(temp_dir)
+                base_png = self._decode_dds(base_dds, temp_path / "base_Suit_D.png", draft_res, task=mod_name, cancel_token=cancel_token)
+                draft_png = temp_path / "draft_Suit_D.png"
+                is_valid = self._run_qa(client, base_png, style, draft_png, task=mod_name, cancel_token=cancel_token)
+                draft = self.drafts.save(mod_name, draft_png, style=style, feedback=feedback,
+                                         resolution=draft_res, is_valid=is_valid)
+        self.logger.info(f"Draft of '{mod_name}' saved. Finalize it to build the mod at {self.config['image_resolution']}.")
+        return draft
+
+    def finalize_draft(self, mod_name, gen_s=True, gen_n=True, allow_failed=False, cancel_token=None):
+        """Builds the mod at full resolution from its draft, reusing the draft's style and QA feedback.
+
+        With finalize_mode "upscale" the approved draft itself becomes the diffuse; with "regenerate" the diffuse
+        is generated again at full resolution from the draft and QA-validated against the base Suit_D. A draft that
+        failed QA is refused unless allow_failed is set. Cancelling works as in generate_mod.
+        """
+        draft = self.drafts.load(mod_name)
+        if draft is None:
+            raise FileNotFoundError(f"No draft of '{mod_name}' found. Generate a draft first.")
+        if not draft["is_valid"] and not allow_failed:
+            raise ValueError(f"The draft of '{mod_name}' did not pass QA validation. Generate a new draft or confirm finalizing it anyway.")
+        with self._recorded_run(mod_name, self.config.get("image_resolution", "4K")):
+            self._generate_mod(mod_name, draft["style"], True, gen_s, gen_n, cancel_token=cancel_token, draft=draft)
+
+    def _generate_mod(self, mod_name, style, gen_d, gen_s, gen_n, stale_only=False, cancel_token=None, draft=None):
+        import_library()
+        author = self.config.get("author_name", "")
+        outfits_dir = Path(self.config["haydee_path"]) / "Outfits"
+        builder = ModBuilder(mod_name, outfits_dir=outfits_dir, author=author if author else None)
+        if cancel_token is None:
+            self._build_mod(builder, mod_name, style, gen_d, gen_s, gen_n, stale_only, draft, cancel_token)
+            return
+
+        # A run that clears the folder can move it aside instead of copying it
+        snapshot = ModSnapshot(builder.mod_dir, outfits_dir / f"{builder.mod_name}.outfit")
+        snapshot.take(move=gen_d and not stale_only)
+        try:
+            self._build_mod(builder, mod_name, style, gen_d, gen_s, gen_n, stale_only, draft, cancel_token)
+        except TaskCancelled:
+            snapshot.restore()
+            raise
+        finally:
+            snapshot.discard()
+
+    def _build_mod(self, builder, mod_name, style, gen_d, gen_s, gen_n, stale_only, draft=None, cancel_token=None):
+        api_key = self.config["gemini_api_key"]
+        author = self.config.get("author_name", "")
+        res = self.config["image_resolution"]
+        model_name = self.config.get("model_name", "gemini-3.1-flash-image-preview")
+        validator_model = self.config.get("validator_model", "gemini-3.1-pro-preview")
+
+        outfits_dir = Path(self.config["haydee_path"]) / "Outfits"
+        base_dds = outfits_dir / "Haydee" / "Suit_D.dds"
+
+        builder.prepare_directory(clear_dir=gen_d and not stale_only)
+        manifest = BuildManifest(builder.mod_dir)
+        d_inputs = {
+            "style": style,
+            "base": self._file_hash(base_dds) if gen_d else None,
+            "model": model_name,
+            "validator_model": validator_model,
+            "resolution": res,
+            "dds_quality": self.config.get("dds_quality", "final"),
+        }
+        finalize_mode = None
+        if draft is not None:
+            finalize_mode = self.config.get("finalize_mode", "upscale")
+            if finalize_mode not in FINALIZE_MODES:
+                raise ValueError(f"Unknown finalize mode '{finalize_mode}'. Use one of: {', '.join(FINALIZE_MODES)}.")
+            d_inputs.update(draft=self._file_hash(draft["image"]), finalize_mode=finalize_mode)
+        if stale_only:
+            gen_d, gen_s, gen_n = self._select_stale(manifest, builder.mod_dir, d_inputs, gen_d, gen_s, gen_n)
+        self.progress.plan(mod_name, self._plan_stages(gen_d, gen_s, gen_n, (builder.mod_dir / "Suit_D.dds").exists(), finalize_mode))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            base_png = temp_path / "base_Suit_D.png"
+            generated_d_png = temp_path / "generated_Suit_D.png"
+            diffuse_image = generated_d_png
+            generated_mask = temp_path / "material_mask.png"
+            generated_n_png = temp_path / "generated_normal.png"
+
+            client = self.clients.mod_client(api_key, res, model_name, validator_model)
+            final_d_dds = builder.mod_dir / "Suit_D.dds"
+
+            if gen_d and finalize_mode == "upscale":
+                # The encoder resizes the approved draft to the final resolution
+                self.logger.info(f"Upscaling the approved {draft['resolution']} draft to {res}...")
+                generated_d_png = diffuse_image = Path(draft["image"])
+            elif gen_d:
+                if not base_dds.exists():
+                    raise FileNotFoundError(f"Base texture not found at {base_dds}. Please verify your game path.")
+                base_png = self._decode_dds(base_dds, base_png, res, task=mod_name, cancel_token=cancel_token)
+                if finalize_mode == "regenerate":
+                    # The draft is the image the model restyles at full resolution, QA still compares with the base
+                    self.logger.info(f"Regenerating the approved {draft['resolution']} draft at {res}...")
+                    self._run_qa(client, base_png, style, generated_d_png, task=mod_name, cancel_token=cancel_token,
+                                 feedback="\n".join(draft["feedback"]) or None, source_image=Path(draft["image"]))
+                else:
+                    self._run_qa(client, base_png, style, generated_d_png, task=mod_name, cancel_token=cancel_token)
+            else:
+                if not final_d_dds.exists():
+                    if gen_s or gen_n:
+                        raise FileNotFoundError(
+                            f"Cannot generate Suit_S or Suit_N because Suit_D generation was skipped and "
+                            f"'{final_d_dds.name}' does not exist in the mod folder from previous runs."
+                        )
+                else:
+                    if gen_s or gen_n:
+                        diffuse_image = self._decode_dds(final_d_dds, generated_d_png, res, task=mod_name, cancel_token=cancel_token)
+
+            # Suit_S and Suit_N only depend on the final diffuse, so both branches run in parallel with its encode
+            branches = {}
+            if gen_d:
+                branches["Suit_D"] = lambda: self._encode_dds(
+                    "diffuse", generated_d_png, final_d_dds, res, task=mod_name, cancel_token=cancel_token
+                )
+            if gen_s:
+                branches["Suit_S"] = lambda: self._build_specular_map(
+                    client, diffuse_image, generated_mask, builder.mod_dir / "Suit_S.dds", res, task=mod_name, cancel_token=cancel_token
+                )
+            if gen_n:
+                branches["Suit_N"] = lambda: self._build_normal_map(
+                    client, diffuse_image, generated_n_png, builder.mod_dir / "Suit_N.dds", res, task=mod_name, cancel_token=cancel_token
+                )
+            finished = []
+            try:
+                self._run_map_branches(branches, finished=finished)
+            finally:
+                self._record_maps(manifest, builder.mod_dir, d_inputs if gen_d else None, finished)
+
+        mtl_file = builder.mod_dir / "Suit.mtl"
+        outfit_file = outfits_dir / f"{builder.mod_name}.outfit"
+        mtl_inputs = {"mod": builder.mod_name, "maps": [name for name in ("Suit_S.dds", "Suit_N.dds") if (builder.mod_dir / name).exists()]}
+        outfit_inputs = {"mod": builder.mod_name, "author": author}
+        with self._stage(mod_name, "write", label=f"{mod_name}.outfit", cancel_token=cancel_token):
+            if stale_only and manifest.is_current(mtl_file.name, mtl_inputs, mtl_file):
+                self.logger.info(f"{mtl_file.name} is up to date.")
+            else:
+                builder.generate_mtl_file()
+                manifest.record(mtl_file.name, mtl_inputs, mtl_file)
+            if stale_only and manifest.is_current(outfit_file.name, outfit_inputs, outfit_file):
+                self.logger.info(f"{outfit_file.name} is up to date.")
+            else:
+                builder.generate_outfit_file()
+                manifest.record(outfit_file.name, outfit_inputs, outfit_file)
+
+    def _file_hash(self, path):
+        """Content hash of an input file, or None if it cannot be read."""
+        try:
+            return self.decode_cache.source_hash(path) if self.decode_cache is not None else file_sha256(path)
+        except OSError:
+            return None
+
+    def _map_inputs(self, diffuse_hash):
+        """Suit_S and Suit_N are derived from the final Suit_D only."""
+        return {
+            "diffuse": diffuse_hash,
+            "model": self.config.get("model_name", "gemini-3.1-flash-image-preview"),
+            "resolution": self.config["image_resolution"],
+            "dds_quality": self.config.get("dds_quality", "final"),
+        }
+
+    def _select_stale(self, manifest, mod_dir, d_inputs, gen_d, gen_s, gen_n):
+        """Drops the selected maps that are already built from the current inputs."""
+        if gen_d and manifest.is_current("Suit_D.dds", d_inputs, mod_dir / "Suit_D.dds"):
+            self.logger.info("Suit_D.dds is up to date.")
+            gen_d = False
+
+        # A new diffuse makes both derived maps stale
+        if not gen_d:
+            map_inputs = self._map_inputs(manifest.output_hash("Suit_D.dds", mod_dir / "Suit_D.dds"))
+            if gen_s and manifest.is_current("Suit_S.dds", map_inputs, mod_dir / "Suit_S.dds"):
+                self.logger.info("Suit_S.dds is up to date.")
+                gen_s = False
+            if gen_n and manifest.is_current("Suit_N.dds", map_inputs, mod_dir / "Suit_N.dds"):
+                self.logger.info("Suit_N.dds is up to date.")
+                gen_n = False
+
+        if not (gen_d or gen_s or gen_n):
+            self.logger.info("All selected textures are up to date.")
+        return gen_d, gen_s, gen_n
+
+    def _record_maps(self, manifest, mod_dir, d_inputs, finished):
+        """Records the maps built by this run. d_inputs is None when the diffuse was not regenerated."""
+        if d_inputs is not None:
+            if "Suit_D" not in finished:
+                # The other maps came from a diffuse that never made it to disk
+                return
+            manifest.record("Suit_D.dds", d_inputs, mod_dir / "Suit_D.dds")
+        map_inputs = self._map_inputs(manifest.output_hash("Suit_D.dds", mod_dir / "Suit_D.dds"))
+        for name in ("Suit_S", "Suit_N"):
+            if name in finished:
+                manifest.record(f"{name}.dds", map_inputs, mod_dir / f"{name}.dds")
+
+    @staticmethod
+    def _plan_stages(gen_d, gen_s, gen_n, has_diffuse, finalize_mode=None):
+        """Stages generate_mod is expected to run, assuming the first texture passes QA."""
+        stages = []
+        if gen_d and finalize_mode == "upscale":
+            stages.append("encode")
+        elif gen_d:
+            stages += ["decode", "generate", "validate", "encode"]
+        elif (gen_s or gen_n) and has_diffuse:
+            stages.append("decode")
+        if gen_s:
+            stages += ["mask", "encode"]
+        if gen_n:
+            stages += ["normal", "encode"]
+        return stages + ["write"]
+
+    def _run_qa(self, client, base_png, style, output_png, task=None, cancel_token=None, feedback=None, source_image=None):
+        """Generates the diffuse with the configured QA loop mode, starting from feedback if given. Returns is_valid.
+
+        The model restyles source_image, which defaults to base_png; validation always compares with base_png.
+        """
+        max_attempts = QA_MAX_ATTEMPTS
+        qa_mode = self.config.get("qa_mode", "sequential")
+        if qa_mode == "best_of_n":
+            candidates = max(1, int(self.config.get("best_of_n_candidates", 3)))
+            is_valid = self._run_best_of_n_qa(
+                client, base_png, style, output_png, candidates,
+                concurrency=max(1, int(self.config.get("max_parallel_requests", 3))), task=task, cancel_token=cancel_token,
+                feedback=feedback, source_image=source_image
+            )
+            if not is_valid:
+                self.logger.error(f"⚠️ None of the {candidates} candidates passed QA validation. Proceeding with the best-scored texture, but it may contain structural flaws.")
+        else:
+            if qa_mode.startswith("speculative"):
+                is_valid = self._run_speculative_qa(
+                    client, base_png, style, output_png, max_attempts,
+                    restart_on_fail=(qa_mode == "speculative_restart"), task=task, cancel_token=cancel_token,
+                    feedback=feedback, source_image=source_image
+                )
+            else:
+                is_valid = self._run_sequential_qa(client, base_png, style, output_png, max_attempts, task=task,
+                                                   cancel_token=cancel_token, feedback=feedback, source_image=source_image)
+
+            if not is_valid:
+                self.logger.error(f"⚠️ Max retries ({max_attempts}) reached. Proceeding with the last generated texture, but it may contain structural flaws.")
+
+        # The run history records the verdict of the texture that was kept
+        self.progress.emit("qa", task=task, passed=is_valid)
+        return is_valid
+
+    def _run_sequential_qa(self, client, base_png, style, output_png, max_attempts, task=None, cancel_token=None, feedback=None, source_image=None):
+        # --- ДОБАВЛЕННЫЙ ЦИКЛ ВАЛИДАЦИИ (QA FEEDBACK LOOP) ---
+        attempt = 1
+
+        while attempt <= max_attempts:
+            self.logger.info(f"Generation attempt {attempt}/{max_attempts}...")
+
+            self._generate_texture(
+                client, task=task, cancel_token=cancel_token, label=f"attempt {attempt}",
+                base_image_path=base_png if source_image is None else source_image,
+                style=style,
+                output_path=output_png,
+                previous_feedback=feedback
+            )
+
+            validation_result = self._validate(client, base_png, output_png, style, task=task, cancel_token=cancel_token, label=f"attempt {attempt}")
+
+            if validation_result.is_valid:
+                self.logger.info("✅ Texture passed QA validation!")
+                return True
+            else:
+                self.logger.warning(f"❌ Texture validation failed: {validation_result.feedback}")
+                feedback = validation_result.feedback
+                attempt += 1
+
+        return False
+
+    def _run_speculative_qa(self, client, base_png, style, output_png, max_attempts, restart_on_fail=False, task=None, cancel_token=None,
+                            feedback=None, source_image=None):
+        """QA loop that generates attempt N+1 (without waiting for feedback) while attempt N is being validated.
+
+        If N passes, N+1 is discarded. If N fails, N+1 is either kept as the next candidate, or thrown away and
+        regenerated with N's feedback when restart_on_fail is set.
+        """
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qa-attempt")
+        attempts = []
+
+        def submit(feedback):
+            label = f"attempt {len(attempts) + 1}"
+            attempt = _SpeculativeAttempt(
+                executor, lambda **kwargs: self._generate_texture(client, task=task, cancel_token=cancel_token, label=label, **kwargs),
+                base_png if source_image is None else source_image, style, feedback
+            )
+            attempts.append(attempt)
+            return attempt
+
+        try:
+            self.logger.info(f"Generation attempt 1/{max_attempts}...")
+            current = submit(feedback)
+
+            for attempt_no in range(1, max_attempts + 1):
+                candidate_png = current.result()
+
+                speculative = None
+                if attempt_no < max_attempts:
+                    self.logger.info(f"Generation attempt {attempt_no + 1}/{max_attempts} started speculatively while attempt {attempt_no} is validated...")
+                    speculative = submit(feedback)
+
+                validation_result = self._validate(client, base_png, candidate_png, style, task=task, cancel_token=cancel_token, label=f"attempt {attempt_no}")
+
+                if validation_result.is_valid:
+                    self.logger.info("✅ Texture passed QA validation!")
+                    shutil.copyfile(candidate_png, output_png)
+                    if speculative is not None:
+                        self.logger.info(f"Discarding speculative attempt {attempt_no + 1}.")
+                    return True
+
+                self.logger.warning(f"❌ Texture validation failed: {validation_result.feedback}")
+                feedback = validation_result.feedback
+
+                if speculative is None:
+                    shutil.copyfile(candidate_png, output_png)
+                    return False
+
+                if restart_on_fail:
+                    self.logger.info(f"Discarding speculative attempt {attempt_no + 1} and regenerating it with QA feedback...")
+                    speculative.discard()
+                    speculative = submit(feedback)
+                current = speculative
+
+            return False
+        finally:
+            for attempt in attempts:
+                attempt.discard()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_best_of_n_qa(self, client, base_png, style, output_png, candidates, concurrency, task=None, cancel_token=None,
+                          feedback=None, source_image=None):
+        """Generates and validates N candidates in parallel.
+
+        Keeps the first candidate that passes QA, or the one passing the most checks if none pass.
+        """
+        self.logger.info(f"Generating {candidates} candidates ({min(candidates, concurrency)} at a time)...")
+        executor = ThreadPoolExecutor(max_workers=min(candidates, concurrency), thread_name_prefix="qa-candidate")
+        temp_dir = Path(tempfile.mkdtemp(prefix="haydee_candidates_"))
+
+        def run_candidate(index):
+            candidate_png = temp_dir / f"candidate_{index}.png"
+            label = f"candidate {index}"
+            self._generate_texture(client, task=task, cancel_token=cancel_token, label=label,
+                                   base_image_path=base_png if source_image is None else source_image, style=style,
+                                   output_path=candidate_png, previous_feedback=feedback)
+            validation_result = self._validate(client, base_png, candidate_png, style, task=task, cancel_token=cancel_token, label=label)
+            return candidate_png, validation_result
+
+        futures = {executor.submit(run_candidate, index): index for index in range(1, candidates + 1)}
+        best = None
+        errors = []
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    candidate_png, validation_result = future.result()
+                except TaskCancelled:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"Candidate {index}/{candidates} failed: {e}")
+                    errors.append(e)
+                    continue
+
+                if validation_result.is_valid:
+                    self.logger.info(f"✅ Candidate {index}/{candidates} passed QA validation!")
+                    shutil.copyfile(candidate_png, output_png)
+                    return True
+
+                score = validation_score(validation_result)
+                self.logger.warning(f"❌ Candidate {index}/{candidates} failed validation ({score}/3 checks passed): {validation_result.feedback}")
+                if best is None or score > best[0]:
+                    best = (score, index, candidate_png)
+
+            if best is None:
+                raise RuntimeError(f"All {candidates} candidates failed to generate: {errors[0]}") from errors[0]
+
+            score, index, candidate_png = best
+            self.logger.info(f"Keeping candidate {index}/{candidates} with the best QA score ({score}/3 checks passed).")
+            shutil.copyfile(candidate_png, output_png)
+            return False
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            _remove_when_done(futures, temp_dir)
+
+    def _build_specular_map(self, client, diffuse_png, mask_png, final_s_dds, res, task=None, cancel_token=None):
+        with self._stage(task, "mask", output=mask_png, cancel_token=cancel_token):
+            run_cancellable(cancel_token, client.generate_material_mask,
+                            diffuse_image_path=_image_source(diffuse_png), output_path=mask_png)
+        self._encode_dds("specular", mask_png, final_s_dds, res, task=task, cancel_token=cancel_token)
+
+    def _build_normal_map(self, client, diffuse_png, normal_png, final_n_dds, res, task=None, cancel_token=None):
+        with self._stage(task, "normal", output=normal_png, cancel_token=cancel_token):
+            run_cancellable(cancel_token, client.generate_normal_map,
+                            diffuse_image_path=_image_source(diffuse_png), output_path=normal_png)
+        self._encode_dds("normal", normal_png, final_n_dds, res, task=task, cancel_token=cancel_token)
+
+    def _run_map_branches(self, branches, finished=None):
+        """Runs independent map branches concurrently and waits for all of them before returning.
+
+        The names of the branches that succeeded are appended to finished, also when another one failed.
+        """
+        if not branches:
+            return
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="map-branch") as executor:
+            futures = {executor.submit(func): name for name, func in branches.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                    self.logger.info(f"{name} map finished.")
+                    if finished is not None:
+                        finished.append(name)
+                except TaskCancelled as e:
+                    errors.append((name, e))
+                except Exception as e:
+                    self.logger.error(f"{name} generation failed: {e}")
+                    errors.append((name, e))
+
+        for _, error in errors:
+            if isinstance(error, TaskCancelled):
+                raise error
+        if errors:
+            failed = ", ".join(name for name, _ in errors)
+            raise RuntimeError(f"Failed to generate {failed}: {errors[0][1]}") from errors[0][1]
+
+    def generate_prompt_ideas(self, theme, count=None, on_idea=None, cancel_token=None):
+        """Asks the validator model for outfit concepts and returns them as a list of {name, style} dicts.
+
+        The response is streamed; on_idea(idea) is called for every concept as soon as it is complete.
+        Cancelling cancel_token stops reading the stream and raises TaskCancelled.
+        """
+        api_key = self.config.get("gemini_api_key", "")
+        model_name = self.config.get("validator_model", "gemini-3.1-pro-preview")
+        if count is None:
+            count = max(1, int(self.config.get("prompt_ideas_count", 3)))
+
+        if not api_key:
+            raise ValueError("API Key is missing.")
+
+        self.logger.info(f"Generating {count} prompt ideas for theme: '{theme}' using {model_name}...")
+
+        client = self.clients.genai_client(api_key)
+
+        instruction = PROMPT_IDEAS_INSTRUCTION.format(count=count)
+        prompt_text = f"{instruction}\n\nUser Theme: {theme}"
+
+        cache = self._active_response_cache()
+        key = cache_key(model_name, instruction, theme)
+        if cache is not None:
+            cached = cache.get("prompt_ideas", key)
+            if cached is not None:
+                for idea in cached:
+                    if on_idea is not None:
+                        on_idea(idea)
+                self.logger.info(f"Reused {len(cached)} cached ideas.")
+                return cached
+
+        parser = IncrementalJSONArrayParser()
+        ideas = []
+        chunks = []
+        finish_reason = None
+        self.progress.plan(theme, ["prompt_ideas"])
+        with self._stage(theme, "prompt_ideas", label=model_name, cancel_token=cancel_token):
+            for chunk in client.models.generate_content_stream(model=model_name, contents=prompt_text):
+                if cancel_token is not None:
+                    cancel_token.check()
+                candidates = getattr(chunk, "candidates", None)
+                if candidates and getattr(candidates[0], "finish_reason", None) is not None:
+                    finish_reason = candidates[0].finish_reason
+                chunks.append(chunk.text or "")
+                for idea in parser.feed(chunk.text or ""):
+                    ideas.append(idea)
+                    if on_idea is not None:
+                        on_idea(idea)
+
+        if not parser.started:
+            # No array in the stream, parse the whole response to report what went wrong
+            response_text = "".join(chunks).strip()
+
+            # Clean up potential markdown formatting block injected by LLM
+            if response_text.startswith("```"):
+                response_text = re.sub(r"^```(?:json)?\n|\n```$", "", response_text, flags=re.MULTILINE)
+
+            try:
+                ideas = json.loads(response_text)
+            except json.JSONDecodeError:
+                self.logger.error(f"Failed to parse LLM response: {response_text}")
+                raise ValueError("AI returned invalid JSON.")
+
+            if not isinstance(ideas, list):
+                raise ValueError("AI did not return a JSON array.")
+
+        # A stream cut short (e.g. at the token limit) must not be reused, however many ideas it yielded
+        complete = (parser.finished or not parser.started) and finish_reason in (None, "STOP")
+        if not complete:
+            self.logger.warning(f"The prompt ideas response was incomplete (finish reason: {finish_reason}). "
+                                f"Keeping the {len(ideas)} complete idea(s) without caching them.")
+        elif cache is not None and ideas:
+            cache.put(key, ideas)
+
+        self.logger.info(f"Successfully generated {len(ideas)} ideas.")
+        return ideas
+
+    def group_mods(self, multimod_name, source_mods, slot_category, delete_sources, cancel_token=None):
+        """Groups existing mods into one multi-variant outfit. A cancelled grouping is rolled back like a failed one."""
+        import_library()
+        haydee_path = Path(self.config["haydee_path"])
+        author = self.config.get("author_name", "")
+        outfits_dir = haydee_path / "Outfits"
+
+        if not source_mods:
+            raise ValueError("No valid source mods provided.")
+
+        self.logger.info(f"Starting to group mods: {source_mods} into '{multimod_name}'...")
+
+        builder = MultiModBuilder(
+            multimod_name=multimod_name,
+            source_mods=source_mods,
+            outfits_dir=outfits_dir,
+            slot_category=slot_category,
+            author=author if author else None
+        )
+
+        workers = max(1, int(self.config.get("group_workers", 4)))
+        if workers > 1:
+            self.progress.plan(multimod_name, ["migrate"] * len(source_mods) + ["write"])
+            ParallelGrouper(builder, workers=workers, move_sources=delete_sources, progress=self.progress,
+                            cancel_token=cancel_token).run()
+        else:
+            self.progress.plan(multimod_name, ["group"])
+            with self._stage(multimod_name, "group", label=f"{len(source_mods)} variants", cancel_token=cancel_token):
+                builder.validate_sources()
+                builder.prepare_directory()
+                builder.migrate_assets_and_generate_mtls()
+                builder.generate_outfit_file()
+
+            if delete_sources:
+                builder.cleanup_sources()
+
+        self.logger.info(f"Multi-mod '{multimod_name}' created successfully from {len(source_mods)} variants!")
+
+
+def validation_score(validation_result):
+    """Number of passed QA checks, used to rank candidates that all failed validation."""
+    checks = ("is_face_valid", "is_torso_seams_valid", "is_legs_valid")
+    return sum(1 for check in checks if getattr(validation_result, check, False) is True)
+
+
+def _image_source(image):
+    """What GeminiModClient should open: a fresh file object for an in-memory image, otherwise the path."""
+    return image.open() if isinstance(image, ImageBuffer) else image
+
+
+def _content_hash(image):
+    return image.sha256() if isinstance(image, ImageBuffer) else file_sha256(image)
+
+
+def _remove_when_done(futures, path):
+    """Removes a temp directory once every future writing into it has finished or was cancelled."""
+    pending = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            pending[0] -= 1
+            if pending[0] == 0:
+                shutil.rmtree(path, ignore_errors=True)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
+
+class _SpeculativeAttempt:
+    """One diffuse generation running in the background, writing into its own temp directory.
+
+    The directory outlives the pipeline's TemporaryDirectory, so a discarded attempt that is still in flight
+    can finish writing safely; it is removed as soon as the attempt is done.
+    """
+
+    def __init__(self, executor, generate_texture, base_png, style, feedback):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="haydee_qa_"))
+        self.output_png = self.temp_dir / "generated_Suit_D.png"
+        self.future = executor.submit(
+            generate_texture,
+            base_image_path=base_png,
+            style=style,
+            output_path=self.output_png,
+            previous_feedback=feedback
+        )
+
+    def result(self):
+        self.future.result()
+        return self.output_png
+
+    def discard(self):
+        """Cancels the attempt if it has not started yet and removes its files once it is done."""
+        self.future.cancel()
+        self.future.add_done_callback(lambda _: shutil.rmtree(self.temp_dir, ignore_errors=True))
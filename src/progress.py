@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+# Seconds assumed for a stage that has never run on this machine
+DEFAULT_STAGE_SECONDS = {
+    "decode": 3.0,
+    "generate": 60.0,
+    "validate": 30.0,
+    "mask": 45.0,
+    "normal": 45.0,
+    "encode": 10.0,
+    "write": 0.1,
+    "prompt_ideas": 30.0,
+    "migrate": 2.0,
+    "group": 10.0,
+}
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class StageHistory:
+    """Moving average of how long each pipeline stage took, persisted between sessions for ETAs."""
+
+    def __init__(self, history_file=None, smoothing=0.3):
+        self.history_file = Path(history_file) if history_file else None
+        self.smoothing = smoothing
+        self.durations = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.history_file is None or not self.history_file.exists():
+            return
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                self.durations = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading stage history: {e}")
+
+    def _save(self):
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.history_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.durations, f)
+        os.replace(tmp_file, self.history_file)
+
+    def expected(self, stage):
+        with self._lock:
+            return self.durations.get(stage, DEFAULT_STAGE_SECONDS.get(stage, 10.0))
+
+    def record(self, stage, elapsed):
+        with self._lock:
+            previous = self.durations.get(stage)
+            self.durations[stage] = elapsed if previous is None else previous + self.smoothing * (elapsed - previous)
+            if self.history_file is not None:
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"Error saving stage history: {e}")
+
+
+class ProgressReporter:
+    """Fans structured pipeline events out to listeners.
+
+    Every event is a JSON-serializable dict: {"event": "plan" | "stage_start" | "stage_end" | "qa", "time", "task", ...}.
+    Stage ends carry the elapsed seconds, the size of the stage output in bytes (when it wrote a file) and a status.
+    A "qa" event reports whether the diffuse a QA loop kept passed validation.
+    """
+
+    def __init__(self, history=None):
+        self.history = history if history is not None else StageHistory()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def emit(self, event, **fields):
+        payload = {"event": event, "time": round(time.time(), 3)}
+        payload.update((key, value) for key, value in fields.items() if value is not None)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(payload)
+            except Exception as e:
+                logger.debug(f"Progress listener failed: {e}")
+
+    def plan(self, task, stages):
+        """Announces the stages a task is expected to run, so listeners can show a determinate progress."""
+        self.emit("plan", task=task, stages=list(stages))
+
+    @contextmanager
+    def stage(self, task, stage, label=None, output=None):
+        """Wraps one stage in stage_start / stage_end events.
+
+        The reported size is that of the output file, or the "bytes" set on the yielded dict for in-memory results.
+        """
+        self.emit("stage_start", task=task, stage=stage, label=label)
+        start = time.monotonic()
+        status = "error"
+        details = {}
+        try:
+            yield details
+            status = "ok"
+        finally:
+            elapsed = time.monotonic() - start
+            size = details.get("bytes")
+            if size is None and output is not None:
+                try:
+                    size = Path(output).stat().st_size
+                except OSError:
+                    pass
+            if status == "ok":
+                self.history.record(stage, elapsed)
+            self.emit("stage_end", task=task, stage=stage, label=label, elapsed=round(elapsed, 3), bytes=size, status=status)
+
+
+class ProgressTracker:
+    """Listener that turns the events of one task into a completed fraction and an ETA.
+
+    Planned stages that have not started yet and running stages count with their historical duration, so the
+    fraction grows smoothly while a long stage runs. Unplanned stages (e.g. QA retries) extend the total, but the
+    reported fraction never moves backwards.
+    """
+
+    def __init__(self, history, task):
+        self.history = history
+        self.task = task
+        self.current = None
+        self._remaining = []
+        self._running = {}
+        self._done = 0.0
+        self._fraction = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.get("task") != self.task:
+            return
+        with self._lock:
+            kind = event["event"]
+            if kind == "plan":
+                self._remaining = list(event["stages"])
+            elif kind == "stage_start":
+                stage = event["stage"]
+                if stage in self._remaining:
+                    self._remaining.remove(stage)
+                self._running[(stage, event.get("label"))] = time.monotonic()
+                self.current = f"{stage} {event['label']}" if event.get("label") else stage
+            elif kind == "stage_end":
+                stage = event["stage"]
+                self._running.pop((stage, event.get("label")), None)
+                self._done += self.history.expected(stage)
+
+    def snapshot(self):
+        """Returns (fraction done between 0 and 1, estimated seconds left)."""
+        now = time.monotonic()
+        with self._lock:
+            progressed = self._done
+            left = sum(self.history.expected(stage) for stage in self._remaining)
+            for (stage, _), started in self._running.items():
+                expected = self.history.expected(stage)
+                elapsed = min(now - started, expected * 0.95)
+                progressed += elapsed
+                left += expected - elapsed
+
+            total = progressed + left
+            if total > 0:
+                self._fraction = max(self._fraction, progressed / total)
+            return self._fraction, left
+
+
+def json_lines_listener(stream):
+    """Listener writing every event as one JSON line, for headless runs."""
+    lock = threading.Lock()
+
+    def listener(event):
+        with lock:
+            stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+            stream.flush()
+
+    return listener
@@ -0,0 +1,129 @@
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    style TEXT NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prompts_seq ON prompts (seq);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(name, style, content='prompts', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN
+    INSERT INTO prompts_fts (rowid, name, style) VALUES (new.id, new.name, new.style);
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN
+    INSERT INTO prompts_fts (prompts_fts, rowid, name, style) VALUES ('delete', old.id, old.name, old.style);
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_au AFTER UPDATE ON prompts BEGIN
+    INSERT INTO prompts_fts (prompts_fts, rowid, name, style) VALUES ('delete', old.id, old.name, old.style);
+    INSERT INTO prompts_fts (rowid, name, style) VALUES (new.id, new.name, new.style);
+END;
+"""
+
+
+class PromptStore:
+    """SQLite-backed prompt idea library: newest first, unique by name, with full-text search over styles."""
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 is not available, prompt search falls back to substring matching: {e}")
+                self.has_fts = False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _next_seq(self):
+        return self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM prompts").fetchone()[0]
+
+    def add(self, name, style):
+        """Adds a prompt at the top of the list, replacing any existing prompt with the same name."""
+        self.add_many([{"name": name, "style": style}])
+
+    def add_many(self, prompts):
+        """Adds prompts so that prompts[0] ends up at the top of the list."""
+        with self._lock, self._conn:
+            seq = self._next_seq()
+            for prompt in reversed(prompts):
+                self._conn.execute(
+                    "INSERT INTO prompts (name, style, seq) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET style = excluded.style, seq = excluded.seq",
+                    (prompt["name"], prompt["style"], seq)
+                )
+                seq += 1
+
+    def remove(self, name):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM prompts WHERE name = ?", (name,)).rowcount > 0
+
+    def get(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT name, style FROM prompts WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self, query=""):
+        sql, params = self._select("COUNT(*)", query)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def list(self, query="", limit=None):
+        """Returns prompts newest first, optionally filtered by a full-text query over names and styles."""
+        sql, params = self._select("prompts.name, prompts.style", query)
+        sql += " ORDER BY prompts.seq DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def _select(self, columns, query):
+        words = query.split()
+        if not words:
+            return f"SELECT {columns} FROM prompts", []
+        if self.has_fts:
+            # Quote every word so user input is never parsed as FTS syntax; prefix-match the last one
+            match = " ".join('"' + word.replace('"', '""') + '"' for word in words) + "*"
+            return (f"SELECT {columns} FROM prompts JOIN prompts_fts ON prompts_fts.rowid = prompts.id "
+                    f"WHERE prompts_fts MATCH ?"), [match]
+        conditions = " AND ".join("(prompts.name LIKE ? OR prompts.style LIKE ?)" for _ in words)
+        params = [pattern for word in words for pattern in (f"%{word}%", f"%{word}%")]
+        return f"SELECT {columns} FROM prompts WHERE {conditions}", params
+
+    def import_legacy(self, config_manager):
+        """One-time migration of the saved_prompts array from settings.json into the store."""
+        prompts = config_manager.config.pop("saved_prompts", None)
+        if prompts is None:
+            return 0
+
+        valid = [p for p in prompts if "name" in p and "style" in p]
+        # Keep the first (newest) occurrence of duplicated names and never overwrite prompts already in the store
+        seen = {p["name"] for p in self.list()}
+        unique = []
+        for prompt in valid:
+            if prompt["name"] not in seen:
+                seen.add(prompt["name"])
+                unique.append(prompt)
+        self.add_many(unique)
+        config_manager.save()
+        logger.info(f"Migrated {len(unique)} saved prompt(s) from settings.json to {self.db_file.name}.")
+        return len(unique)
@@ -0,0 +1,146 @@
+import time
+import logging
+import functools
+import threading
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+
+def is_quota_error(error):
+    error_str = str(error)
+    return "429" in error_str or "RESOURCE_EXHAUSTED" in error_str
+
+
+def is_throttle_error(error):
+    """Quota (429) and overload (503) errors, both mean every worker should slow down."""
+    error_str = str(error)
+    return is_quota_error(error) or "503" in error_str or "UNAVAILABLE" in error_str
+
+
+class AdaptiveRateLimiter:
+    """Token bucket with an AIMD-governed rate and concurrency limit, shared by every Gemini call.
+
+    Each success raises the rate additively; a 429/503 halves the rate and the concurrency limit and
+    pauses all workers for a shared, exponentially growing backoff. Quota errors are retried here,
+    503s are already retried by the library and only slow the limiter down.
+    """
+
+    def __init__(self, requests_per_minute=20, max_concurrency=4, max_retries=3,
+                 base_backoff=5.0, max_backoff=120.0, min_requests_per_minute=1):
+        self.max_rate = float(requests_per_minute)
+        self.min_rate = float(min(min_requests_per_minute, requests_per_minute))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.rate = self.max_rate
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.waiting = 0
+
+        self._tokens = float(self.max_concurrency)
+        self._last_refill = time.monotonic()
+        self._backoff = base_backoff
+        self._backoff_until = 0.0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def stats(self):
+        with self._cond:
+            return {"rate": self.rate, "limit": self.limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+    def _refill(self, now):
+        self._tokens = min(float(self.limit), self._tokens + (now - self._last_refill) * self.rate / 60)
+        self._last_refill = now
+
+    def acquire(self):
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self._backoff_until:
+                        self._cond.wait(self._backoff_until - now)
+                    elif self.in_flight < self.limit and self._tokens >= 1:
+                        self._tokens -= 1
+                        self.in_flight += 1
+                        return
+                    elif self.in_flight >= self.limit:
+                        self._cond.wait()
+                    else:
+                        self._cond.wait((1 - self._tokens) * 60 / self.rate)
+            finally:
+                self.waiting -= 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.limit = max(1, self.limit // 2)
+                self._tokens = 0.0
+                self._backoff_until = max(self._backoff_until, time.monotonic() + self._backoff)
+                self._backoff = min(self.max_backoff, self._backoff * 2)
+                self._successes = 0
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+                self._backoff = self.base_backoff
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        for attempt in range(1, self.max_retries + 2):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                self.release(throttled=throttled)
+                if throttled:
+                    logger.warning(f"Gemini API is throttling requests ({e}). Slowing down to {self.rate:.1f} requests/min.")
+                if is_quota_error(e) and attempt <= self.max_retries:
+                    continue
+                raise
+            self.release()
+            return result
+
+    def call_stream(self, func, *args, **kwargs):
+        """Like call() for streaming responses; the slot is held until the stream is exhausted or closed."""
+        for attempt in range(1, self.max_retries + 2):
+            self.acquire()
+            received = False
+            try:
+                for chunk in func(*args, **kwargs):
+                    received = True
+                    yield chunk
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                self.release(throttled=throttled)
+                if throttled:
+                    logger.warning(f"Gemini API is throttling requests ({e}). Slowing down to {self.rate:.1f} requests/min.")
+                # A stream can only be retried before anything was handed to the caller
+                if is_quota_error(e) and not received and attempt <= self.max_retries:
+                    continue
+                raise
+            except GeneratorExit:
+                self.release()
+                raise
+            self.release()
+            return
+
+    def wrap_stream(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call_stream(func, *args, **kwargs)
+        return wrapper
+
+    def wrap(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+
+def cache_key(*parts):
+    """Stable hash of the JSON-serializable parts that identify a request."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent cache for JSON-serializable AI responses with a TTL and LRU eviction.
+
+    Entries are grouped by kind ("prompt_ideas", "validation", ...) only for the hit/miss counters.
+    """
+
+    def __init__(self, cache_file, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_file = Path(cache_file)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+
+        self._lock = threading.Lock()
+        # key -> {"created": timestamp, "value": response}, kept in least -> most recently used order
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading response cache: {e}")
+
+    def _save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def _count(self, counters, kind):
+        counters[kind] = counters.get(kind, 0) + 1
+        logger.info(f"Response cache {'hit' if counters is self.hits else 'miss'} for {kind.replace('_', ' ')} "
+                    f"(hits: {self.hits.get(kind, 0)}, misses: {self.misses.get(kind, 0)}).")
+
+    def get(self, kind, key):
+        """Returns the cached response, or None if it is missing or expired."""
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and time.time() - entry["created"] > self.ttl_seconds:
+                self._save()
+                entry = None
+            if entry is None:
+                self._count(self.misses, kind)
+                return None
+            # Re-insert as most recently used
+            self.entries[key] = entry
+            self._count(self.hits, kind)
+            return entry["value"]
+
+    def put(self, key, value):
+        with self._lock:
+            self.entries.pop(key, None)
+            self.entries[key] = {"created": time.time(), "value": value}
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Error saving response cache: {e}")
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger("haydee_outfit_gen")
+
+DEFAULT_MAX_RUNS = 1000
+
+# Stages that call an AI model, and the run field naming that model
+MODEL_STAGES = {"generate": "model", "mask": "model", "normal": "model", "validate": "validator_model"}
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q between 0 and 100) of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class RunRecorder:
+    """Progress listener collecting the stage durations and the QA verdict of one generate_mod run.
+
+    qa_passed is None for runs that did not run a QA loop, e.g. when only Suit_S and Suit_N were rebuilt.
+    """
+
+    def __init__(self, mod_name, resolution, model, validator_model, qa_mode):
+        self.run = {
+            "mod": mod_name,
+            "started": round(time.time(), 3),
+            "resolution": resolution,
+            "model": model,
+            "validator_model": validator_model,
+            "qa_mode": qa_mode,
+            "qa_passed": None,
+            "stages": [],
+        }
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.get("task") != self.run["mod"]:
+            return
+        if event["event"] == "qa":
+            with self._lock:
+                self.run["qa_passed"] = event["passed"]
+            return
+        if event["event"] != "stage_end":
+            return
+        stage = {"stage": event["stage"], "elapsed": event["elapsed"], "status": event["status"]}
+        if event.get("label"):
+            stage["label"] = event["label"]
+        if event["stage"] in MODEL_STAGES:
+            stage["model"] = self.run[MODEL_STAGES[event["stage"]]]
+        with self._lock:
+            self.run["stages"].append(stage)
+
+    def finish(self, error=None):
+        with self._lock:
+            run = dict(self.run, stages=list(self.run["stages"]))
+        run["elapsed"] = round(time.monotonic() - self._start, 3)
+        run["attempts"] = sum(1 for stage in run["stages"] if stage["stage"] == "generate")
+        run["status"] = "failed" if error else "ok"
+        if error:
+            run["error"] = str(error)
+        return run
+
+
+class RunHistory:
+    """Persistent list of finished generation runs with their stage durations, capped at max_runs."""
+
+    def __init__(self, history_file, max_runs=DEFAULT_MAX_RUNS):
+        self.history_file = Path(history_file)
+        self.max_runs = max_runs
+        self.runs = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.history_file.exists():
+            return
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                self.runs = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading run history: {e}")
+
+    def _save(self):
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.history_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.runs, f, ensure_ascii=False)
+        os.replace(tmp_file, self.history_file)
+
+    def add(self, run):
+        with self._lock:
+            self.runs.append(run)
+            del self.runs[:-self.max_runs]
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Error saving run history: {e}")
+
+    def stage_stats(self):
+        """p50/p95 of successful stage durations per (stage, model, resolution), sorted by stage."""
+        groups = {}
+        with self._lock:
+            for run in self.runs:
+                for stage in run["stages"]:
+                    if stage["status"] == "ok":
+                        key = (stage["stage"], stage.get("model", ""), run["resolution"])
+                        groups.setdefault(key, []).append(stage["elapsed"])
+        return [
+            {"stage": stage, "model": model, "resolution": resolution, "count": len(values),
+             "p50": percentile(values, 50), "p95": percentile(values, 95)}
+            for (stage, model, resolution), values in sorted(groups.items())
+        ]
+
+    def run_stats(self):
+        """Total run time percentiles, QA pass rate and average attempts per (model, validator model, resolution).
+
+        The pass rate counts the runs whose kept texture passed QA, out of the runs that ran a QA loop, and is None
+        when none did. Whether a run crashed is its status, which does not affect the pass rate.
+        """
+        groups = {}
+        with self._lock:
+            for run in self.runs:
+                groups.setdefault((run["model"], run["validator_model"], run["resolution"]), []).append(run)
+        stats = []
+        for (model, validator_model, resolution), runs in sorted(groups.items()):
+            elapsed = [run["elapsed"] for run in runs]
+            verdicts = [run["qa_passed"] for run in runs if run.get("qa_passed") is not None]
+            stats.append({
+                "model": model, "validator_model": validator_model, "resolution": resolution, "count": len(runs),
+                "p50": percentile(elapsed, 50), "p95": percentile(elapsed, 95),
+                "pass_rate": sum(verdicts) / len(verdicts) if verdicts else None,
+                "attempts": sum(run["attempts"] for run in runs) / len(runs),
+            })
+        return stats
+
+
+def format_report(history):
+    """Plain-text tables of the run and stage statistics, shared by the GUI and the CLI."""
+    if not history.runs:
+        return "No generation runs recorded yet."
+
+    lines = [f"Runs ({len(history.runs)} recorded)", ""]
+    lines.append(f"{'Model':<32} {'Validator':<26} {'Res':<4} {'Runs':>5} {'p50':>8} {'p95':>8} {'Pass':>6} {'Tries':>6}")
+    for row in history.run_stats():
+        pass_rate = "-" if row["pass_rate"] is None else f"{row['pass_rate']:.0%}"
+        lines.append(
+            f"{row['model']:<32} {row['validator_model']:<26} {row['resolution']:<4} {row['count']:>5} "
+            f"{row['p50']:>7.1f}s {row['p95']:>7.1f}s {pass_rate:>6} {row['attempts']:>6.1f}"
+        )
+
+    lines += ["", "Stages", ""]
+    lines.append(f"{'Stage':<10} {'Model':<32} {'Res':<4} {'Count':>6} {'p50':>8} {'p95':>8}")
+    for row in history.stage_stats():
+        lines.append(
+            f"{row['stage']:<10} {row['model'] or '-':<32} {row['resolution']:<4} {row['count']:>6} "
+            f"{row['p50']:>7.1f}s {row['p95']:>7.1f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+
+class StartupTimer:
+    """Named checkpoints since process start, reported once the app is ready.
+
+    In a PyInstaller one-file build, the time the bootloader spent unpacking the bundle before Python started
+    is estimated from the creation time of its temp directory.
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.marks = []
+        self.unpack_seconds = None
+        bundle_dir = getattr(sys, "_MEIPASS", None)
+        if bundle_dir and os.path.basename(bundle_dir).startswith("_MEI"):
+            try:
+                self.unpack_seconds = max(0.0, time.time() - (time.perf_counter() - self.started) - os.path.getctime(bundle_dir))
+            except OSError:
+                pass
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.started))
+
+    def report(self):
+        parts = [f"{name} {elapsed:.2f}s" for name, elapsed in self.marks]
+        if self.unpack_seconds is not None:
+            parts.insert(0, f"one-file unpack ~{self.unpack_seconds:.2f}s")
+        return f"Startup timing: {' → '.join(parts)}"
@@ -1,9 +1,10 @@
 import pytest
+import logging
 from unittest.mock import patch
 
 # Mock settings load to avoid creating real AppData files during tests
 @pytest.fixture(scope="module", autouse=True)
-def mock_config_manager():
+def mock_config_manager(tmp_path_factory):
     # Setup initial mock data
     mock_config = {
         "gemini_api_key": "test_key",
@@ -15,8 +16,12 @@ def mock_config_manager():
     }
     
     # When ConfigManager is instantiated, inject our mock config
+    config_dir = tmp_path_factory.mktemp("config")
+
     def mock_init(self):
         self.config = mock_config.copy()
+        self.config_dir = config_dir
+        self.config_file = config_dir / "settings.json"
         
     with patch("src.config_manager.ConfigManager.load"), \
          patch("src.config_manager.ConfigManager.save"), \
@@ -29,6 +34,7 @@ def _patch_mainloop():
         yield
 
 from src.app import HaydeeGUI
+from src.image_buffer import ImageBuffer
 
 @pytest.fixture(scope="module")
 def app():
@@ -116,6 +122,28 @@ def test_save_settings_defaults_autofill(app, mocker):
     assert app.config_manager.config["model_name"] == "gemini-3.1-flash-image-preview"
     assert app.config_manager.config["validator_model"] == "gemini-3.1-pro-preview"
 
+def test_save_settings_qa_mode(app, mocker):
+    """Verify that the QA loop mode and best-of-N settings are saved, with invalid numbers reset to defaults."""
+    mocker.patch("src.app.messagebox.showinfo")
+    mocker.patch.object(app.config_manager, "save")
+
+    app.entry_api_key.delete(0, "end")
+    app.entry_api_key.insert(0, "test_key")
+    app.entry_path.delete(0, "end")
+    app.entry_path.insert(0, "C:\\Test\\Path")
+    app.combo_qa_mode.set("Best-of-N (parallel candidates)")
+    app.entry_best_of_n.delete(0, "end")
+    app.entry_best_of_n.insert(0, "5")
+    app.entry_max_parallel.delete(0, "end")
+    app.entry_max_parallel.insert(0, "zero")
+
+    app._save_settings()
+
+    assert app.config_manager.config["qa_mode"] == "best_of_n"
+    assert app.config_manager.config["best_of_n_candidates"] == 5
+    assert app.config_manager.config["max_parallel_requests"] == 3
+    assert app.entry_max_parallel.get() == "3"
+
 def test_start_generation_validation(app, mocker):
     """Verify validation logic for start_generation with various skip checkboxes."""
     mock_messagebox_error = mocker.patch("src.app.messagebox.showerror")
@@ -161,7 +189,7 @@ def test_start_generation_blocks_ui(app, mocker):
     # Check that thread was started with correct arguments
     mock_thread.assert_called_once()
     _, kwargs = mock_thread.call_args
-    assert kwargs['args'] == ("TestMod", "Cyberpunk style", True, False, True)
+    assert kwargs['args'] == ("TestMod", "Cyberpunk style", True, False, True, False, app._cancel_token)
 
     # Check that the button is disabled
     assert app.btn_generate.cget("state") == "disabled"
@@ -171,12 +199,13 @@ def test_start_generation_saves_prompt(app, mocker):
     """Verify that starting generation saves or updates the prompt idea correctly."""
     mocker.patch("src.app.threading.Thread")
     mock_render = mocker.patch.object(app, "_render_all_prompt_cards")
-    mock_save = mocker.patch.object(app.config_manager, "save")
-    
-    app.config_manager.config["saved_prompts"] = [
+
+    for prompt in app.prompt_store.list():
+        app.prompt_store.remove(prompt["name"])
+    app.prompt_store.add_many([
         {"name": "OldMod", "style": "OldStyle"},
         {"name": "ExistingMod", "style": "ExistingStyle"}
-    ]
+    ])
     
     # First test: Add a completely new prompt
     app.entry_mod_name.delete(0, "end")
@@ -185,16 +214,13 @@ def test_start_generation_saves_prompt(app, mocker):
     app.textbox_style.insert("1.0", "NewStyle")
     app.check_gen_d.select()
     
-    # Needs to return True for _prepare_for_task
-    # mock_save is patched so it won't actually save, but config is in memory
     app._start_generation()
     
-    assert mock_save.called
-    assert len(app.config_manager.config["saved_prompts"]) == 3
-    assert app.config_manager.config["saved_prompts"][0] == {"name": "NewMod", "style": "NewStyle"}
+    prompts = app.prompt_store.list()
+    assert len(prompts) == 3
+    assert prompts[0] == {"name": "NewMod", "style": "NewStyle"}
     mock_render.assert_called_with(new_indexes=[0])
     
-    mock_save.reset_mock()
     mock_render.reset_mock()
 
     # Second test: Update an existing prompt (ExistingMod)
@@ -205,12 +231,11 @@ def test_start_generation_saves_prompt(app, mocker):
     
     app._start_generation()
     
-    assert mock_save.called
-    assert len(app.config_manager.config["saved_prompts"]) == 3
-    assert app.config_manager.config["saved_prompts"][0] == {"name": "ExistingMod", "style": "UpdatedStyle"}
-    # The old ExistingMod should have been removed from index 2
-    assert app.config_manager.config["saved_prompts"][1] == {"name": "NewMod", "style": "NewStyle"}
-    assert app.config_manager.config["saved_prompts"][2] == {"name": "OldMod", "style": "OldStyle"}
+    assert app.prompt_store.list() == [
+        {"name": "ExistingMod", "style": "UpdatedStyle"},
+        {"name": "NewMod", "style": "NewStyle"},
+        {"name": "OldMod", "style": "OldStyle"},
+    ]
     mock_render.assert_called_with(new_indexes=[0])
 
 def test_start_grouping_blocks_ui(app, mocker):
@@ -286,7 +311,8 @@ def test_universal_hotkeys(app, mocker):
 def test_google_genai_monkey_patch():
     """Verify that the google-genai Client timeout is patched securely to 600,000 ms."""
     from google import genai
-    import src.app # Ensure the patch runs
+    from src.pipeline import warm_imports
+    warm_imports() # The patch runs when the SDK is first imported
     
     # With no http_options provided, it should use the patched timeout
     client = genai.Client(api_key="test_dummy_key")
@@ -308,12 +334,15 @@ def test_run_generator_thread_success(app, mocker):
     mock_after = mocker.patch.object(app, "after")
     
     # Isolate filesystem operations
-    mocker.patch("src.app.Path.exists", return_value=True)
-    mocker.patch("src.app.ModBuilder")
-    mocker.patch("src.app.ImageProcessor")
-    mocker.patch("src.app.tempfile.TemporaryDirectory")
-    
-    mock_client_class = mocker.patch("src.app.GeminiModClient")
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mocker.patch("src.pipeline.ModBuilder")
+    mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mocker.patch.object(app.pipeline.dds_encoder, "encode")
+    
+    app.pipeline.clients.clear()
+    mock_client_class = mocker.patch("src.client_registry.GeminiModClient")
     mock_client_instance = mock_client_class.return_value
     
     # Execute the thread logic
@@ -328,12 +357,15 @@ def test_run_generator_thread_failure(app, mocker):
     """Verify that generator throws an error correctly catching exceptions."""
     mock_after = mocker.patch.object(app, "after")
     
-    mocker.patch("src.app.Path.exists", return_value=True)
-    mocker.patch("src.app.ModBuilder")
-    mocker.patch("src.app.ImageProcessor")
-    mocker.patch("src.app.tempfile.TemporaryDirectory")
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mocker.patch("src.pipeline.ModBuilder")
+    mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mocker.patch.object(app.pipeline.dds_encoder, "encode")
     
-    mock_client_class = mocker.patch("src.app.GeminiModClient")
+    app.pipeline.clients.clear()
+    mock_client_class = mocker.patch("src.client_registry.GeminiModClient")
     mock_client_instance = mock_client_class.return_value
     
     mock_error = Exception("API Failed")
@@ -345,6 +377,27 @@ def test_run_generator_thread_failure(app, mocker):
     assert mock_client_instance.generate_texture.call_count == 1
     assert mock_after.called
 
+def test_run_generator_thread_maps_in_parallel(app, mocker):
+    """Verify that Suit_S and Suit_N branches both run after the diffuse and before the MTL is written."""
+    mocker.patch.object(app, "after")
+
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mock_builder = mocker.patch("src.pipeline.ModBuilder").return_value
+    mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mock_encode = mocker.patch.object(app.pipeline.dds_encoder, "encode")
+
+    app.pipeline.clients.clear()
+    mock_client_instance = mocker.patch("src.client_registry.GeminiModClient").return_value
+
+    app._run_generator_thread("TestMod", "Style", True, True, True)
+
+    mock_client_instance.generate_material_mask.assert_called_once()
+    mock_client_instance.generate_normal_map.assert_called_once()
+    assert sorted(call.args[0] for call in mock_encode.call_args_list) == ["diffuse", "normal", "specular"]
+    mock_builder.generate_mtl_file.assert_called_once()
+
 def test_start_prompt_generation_validation(app, mocker):
     """Verify validation logic for start_prompt_generation."""
     mock_messagebox_error = mocker.patch("src.app.messagebox.showerror")
@@ -372,41 +425,47 @@ def test_start_prompt_generation_blocks_ui(app, mocker):
 def test_run_prompt_thread_success(app, mocker):
     """Verify that the prompt generator thread queries Gemini and parses the response successfully."""
     mock_after = mocker.patch.object(app, "after")
+    mocker.patch.dict(app.config_manager.config, {"bypass_response_cache": True})
     
-    mock_client_class = mocker.patch("src.app.genai.Client")
+    app.pipeline.clients.clear()
+    mock_client_class = mocker.patch("src.client_registry.genai.Client")
     mock_client_instance = mock_client_class.return_value
     mock_response = mocker.Mock()
     mock_response.text = '```json\n[{"name": "CyberNeon", "style": "Glowing neon lights"}]\n```'
-    mock_client_instance.models.generate_content.return_value = mock_response
+    mock_generate = mock_client_instance.models.generate_content_stream
+    mock_generate.return_value = [mock_response]
     
     app._run_prompt_thread("Cyberpunk")
     
-    assert mock_client_instance.models.generate_content.called
-    assert mock_after.called
+    assert mock_generate.called
+    # One call to add the streamed idea, one to restore the UI
+    assert mock_after.call_count == 2
 
 def test_run_prompt_thread_failure(app, mocker):
     """Verify that prompt generator catches JSON parsing or API errors correctly."""
     mock_after = mocker.patch.object(app, "after")
     mock_logger = mocker.patch.object(app, "logger")
     
-    mock_client_class = mocker.patch("src.app.genai.Client")
+    app.pipeline.clients.clear()
+    mock_client_class = mocker.patch("src.client_registry.genai.Client")
     mock_client_instance = mock_client_class.return_value
     mock_response = mocker.Mock()
     mock_response.text = 'This is not JSON'
-    mock_client_instance.models.generate_content.return_value = mock_response
+    mock_generate = mock_client_instance.models.generate_content_stream
+    mock_generate.return_value = [mock_response]
     
     app._run_prompt_thread("Cyberpunk")
     
-    assert mock_client_instance.models.generate_content.called
+    assert mock_generate.called
     assert mock_logger.error.called
     assert mock_after.called
 
 def test_handle_new_ideas(app, mocker):
-    """Verify that new ideas are appended to saved_prompts and UI is re-rendered."""
+    """Verify that new ideas are added on top of the prompt store and UI is re-rendered."""
     mock_render = mocker.patch.object(app, "_render_all_prompt_cards")
-    mock_save = mocker.patch.object(app.config_manager, "save")
     
-    app.config_manager.config["saved_prompts"] = []
+    for prompt in app.prompt_store.list():
+        app.prompt_store.remove(prompt["name"])
     
     ideas = [
         {"name": "Test1", "style": "Style1"},
@@ -415,28 +474,72 @@ def test_handle_new_ideas(app, mocker):
     
     app._handle_new_ideas(ideas)
     
-    assert mock_save.called
-    assert len(app.config_manager.config["saved_prompts"]) == 2
-    assert app.config_manager.config["saved_prompts"][0]["name"] == "Test1"
+    prompts = app.prompt_store.list()
+    assert len(prompts) == 2
+    assert prompts[0]["name"] == "Test1"
     mock_render.assert_called_once_with(new_indexes=[0, 1])
 
+def test_handle_streamed_ideas_stay_marked_new(app, mocker):
+    """Verify that ideas streamed by one request are all highlighted as new."""
+    mock_render = mocker.patch.object(app, "_render_all_prompt_cards")
+    app._new_idea_count = 0
+
+    app._handle_new_ideas([{"name": "Stream1", "style": "Style1"}], append=True)
+    app._handle_new_ideas([{"name": "Stream2", "style": "Style2"}], append=True)
+
+    mock_render.assert_called_with(new_indexes=[0, 1])
+
 def test_delete_prompt(app, mocker):
-    """Verify that deleting a prompt removes it from saved_prompts and re-renders UI."""
+    """Verify that deleting a prompt removes it from the prompt store and re-renders UI."""
     mock_render = mocker.patch.object(app, "_render_all_prompt_cards")
-    mock_save = mocker.patch.object(app.config_manager, "save")
     
-    app.config_manager.config["saved_prompts"] = [
+    for prompt in app.prompt_store.list():
+        app.prompt_store.remove(prompt["name"])
+    app.prompt_store.add_many([
         {"name": "Test1", "style": "Style1"},
         {"name": "Test2", "style": "Style2"}
-    ]
+    ])
     
-    app._delete_prompt(0)
+    app._delete_prompt("Test1")
     
-    assert mock_save.called
-    assert len(app.config_manager.config["saved_prompts"]) == 1
-    assert app.config_manager.config["saved_prompts"][0]["name"] == "Test2"
+    assert app.prompt_store.list() == [{"name": "Test2", "style": "Style2"}]
     assert mock_render.called
 
+def test_prompt_cards_update_incrementally(app, mocker):
+    """Verify that deleting a prompt destroys only its card and keeps the other card widgets."""
+    for prompt in app.prompt_store.list():
+        app.prompt_store.remove(prompt["name"])
+    app.prompt_store.add_many([{"name": f"Test{i}", "style": f"Style{i}"} for i in range(3)])
+    app._render_all_prompt_cards()
+    first, second, third = app._prompt_cards
+
+    app._delete_prompt("Test1")
+
+    assert app._prompt_cards == [first, third]
+    assert not second.winfo_exists()
+
+    app._handle_new_ideas([{"name": "Fresh", "style": "New style"}])
+
+    assert app._prompt_cards[1:] == [first, third]
+    assert app._prompt_cards[0].prompt_key == ("Fresh", "New style", True)
+
+def test_prompt_cards_are_windowed(app, mocker):
+    """Verify that only one page of cards is materialized until 'Show more' is used."""
+    mocker.patch("src.app.PROMPT_PAGE_SIZE", 5)
+    app._prompt_window = 5
+    for prompt in app.prompt_store.list():
+        app.prompt_store.remove(prompt["name"])
+    app.prompt_store.add_many([{"name": f"Test{i}", "style": f"Style{i}"} for i in range(12)])
+
+    app._render_all_prompt_cards()
+    assert len(app._prompt_cards) == 5
+    assert app.btn_more_prompts.cget("text") == "Show more (7 remaining)"
+
+    app._show_more_prompts()
+    app._show_more_prompts()
+    assert [card.prompt_key[0] for card in app._prompt_cards] == [f"Test{i}" for i in range(12)]
+    assert not app.btn_more_prompts.winfo_ismapped()
+
 def test_apply_prompt(app):
     """Verify that applying a prompt updates the generation tab fields."""
     app.entry_mod_name.insert(0, "OldName")
@@ -447,3 +550,289 @@ def test_apply_prompt(app):
     assert app.tabview.get() == "✨ Generate Outfit"
     assert app.entry_mod_name.get() == "NewName"
     assert app.textbox_style.get("1.0", "end-1c") == "NewStyle"
+
+def test_queue_pasted_list(app, mocker):
+    """Verify that pasted 'Name: style' lines are added to the batch queue."""
+    mock_add = mocker.patch.object(app.job_queue, "add")
+
+    app.textbox_batch.delete("1.0", "end")
+    app.textbox_batch.insert("1.0", "BerryJuice: purple berry latex\nKiwiSlice | green kiwi armor\n")
+
+    app._queue_pasted_list()
+
+    assert mock_add.call_args_list == [
+        mocker.call("BerryJuice", "purple berry latex"),
+        mocker.call("KiwiSlice", "green kiwi armor"),
+    ]
+    assert app.textbox_batch.get("1.0", "end-1c") == ""
+
+def test_queue_pasted_list_requires_style(app, mocker):
+    """Verify that lines without a style description are rejected."""
+    mock_messagebox_error = mocker.patch("src.app.messagebox.showerror")
+    mock_add = mocker.patch.object(app.job_queue, "add")
+
+    app.textbox_batch.delete("1.0", "end")
+    app.textbox_batch.insert("1.0", "NoStyleMod")
+
+    app._queue_pasted_list()
+
+    mock_messagebox_error.assert_called_once_with("Error", "Style description is missing for: NoStyleMod")
+    mock_add.assert_not_called()
+
+def test_start_batch_queue_uses_worker_count(app, mocker):
+    """Verify that the batch queue starts with the selected number of workers."""
+    mocker.patch.object(app.config_manager, "save")
+    mock_start = mocker.patch.object(app.job_queue, "start")
+
+    app.entry_api_key.delete(0, "end")
+    app.entry_api_key.insert(0, "test_key")
+    app.entry_path.delete(0, "end")
+    app.entry_path.insert(0, "C:\\Test\\Path")
+    app.combo_batch_workers.set("3")
+
+    app._start_batch_queue()
+
+    mock_start.assert_called_once_with(workers=3)
+    assert app.config_manager.config["batch_workers"] == 3
+
+class FakeTextbox:
+    """Minimal stand-in for a CTkTextbox that tracks its text and scheduled callbacks."""
+
+    def __init__(self):
+        self.text = ""
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append(func)
+
+    def configure(self, **kwargs):
+        pass
+
+    def insert(self, index, text):
+        self.text += text
+
+    def index(self, index):
+        return f"{self.text.count(chr(10)) + 1}.0"
+
+    def delete(self, start, end):
+        lines = self.text.split("\n")
+        self.text = "\n".join(lines[int(end.split(".")[0]) - 1:])
+
+    def see(self, index):
+        pass
+
+def test_log_handler_batches_records(mocker):
+    """Verify that records from worker threads are written in one insert per flush interval."""
+    from src.app import CustomTextHandler
+    textbox = FakeTextbox()
+    handler = CustomTextHandler(textbox, flush_interval_ms=100, max_lines=50)
+    insert_spy = mocker.spy(textbox, "insert")
+
+    for i in range(10):
+        handler.emit(logging.makeLogRecord({"msg": f"line {i}"}))
+    textbox.scheduled.pop(0)()
+
+    insert_spy.assert_called_once()
+    assert textbox.text.splitlines() == [f"line {i}" for i in range(10)]
+    assert textbox.scheduled == [handler._drain]
+
+def test_log_handler_caps_console_lines():
+    """Verify that the pending queue and the console both keep only the newest max_lines lines."""
+    from src.app import CustomTextHandler
+    textbox = FakeTextbox()
+    handler = CustomTextHandler(textbox, max_lines=5)
+
+    for i in range(8):
+        handler.emit(logging.makeLogRecord({"msg": f"line {i}"}))
+    handler.flush_pending()
+    assert textbox.text.splitlines() == ["line 3", "line 4", "line 5", "line 6", "line 7"]
+
+    handler.emit(logging.makeLogRecord({"msg": "line 8"}))
+    handler.flush_pending()
+    assert textbox.text.splitlines() == ["line 4", "line 5", "line 6", "line 7", "line 8"]
+
+def test_on_close_flushes_settings(app, mocker):
+    """Verify that pending settings are written before the window is destroyed."""
+    mock_flush = mocker.patch.object(app.config_manager, "flush")
+    mocker.patch.object(app.prompt_store, "close")
+    mock_destroy = mocker.patch.object(app, "destroy")
+
+    app._on_close()
+
+    mock_flush.assert_called_once()
+    mock_destroy.assert_called_once()
+
+def test_api_status_shows_limiter_stats(app, mocker):
+    """Verify that the rate limiter's rate and queue depth are shown in the UI."""
+    mocker.patch.object(app, "after")
+    mocker.patch.object(app.pipeline.clients.limiter, "stats", return_value={"rate": 12.0, "limit": 2, "in_flight": 1, "waiting": 3})
+
+    app._update_api_status()
+
+    assert app.lbl_api_status.cget("text") == "API: 12 req/min · 1/2 active · 3 waiting"
+
+def test_start_grouping_validates_sources_up_front(app, mocker):
+    """Verify that grouping is refused before any work starts when the mod index knows a source is unusable."""
+    mock_thread = mocker.patch("src.app.threading.Thread")
+    mock_error = mocker.patch("src.app.messagebox.showerror")
+    mocker.patch.object(app.mod_index, "available", return_value=True)
+    mocker.patch.object(app.mod_index, "refresh")
+    mock_refresh = mocker.patch.object(app, "_refresh_mod_index")
+    mocker.patch.object(app.mod_index, "problems", return_value=["Source mod 'blue' has no Suit_D.dds."])
+    app.entry_multi_name.delete(0, "end")
+    app.entry_multi_name.insert(0, "Rainbow")
+    app.entry_source_mods.delete(0, "end")
+    app.entry_source_mods.insert(0, "red, blue")
+
+    app._start_grouping()
+
+    app.mod_index.problems.assert_called_once_with(["red", "blue"])
+    mock_error.assert_called_once_with("Error", "Source mod 'blue' has no Suit_D.dds.")
+    assert not mock_thread.called
+    # The index is rescanned in the background, never on the UI thread
+    app.mod_index.refresh.assert_not_called()
+    mock_refresh.assert_called_once()
+
+def test_mod_list_reuses_rows(app, mocker):
+    """Verify that re-rendering the mod list reconfigures and hides the existing rows instead of recreating them."""
+    def mod(d=True):
+        return {"maps": {"D": 1 if d else 0, "S": 1, "N": 1}, "size": 1024 * 1024}
+    search = mocker.patch.object(app.mod_index, "search", return_value=[("red", mod()), ("blue", mod()), ("green", mod(d=False))])
+    app.entry_source_mods.delete(0, "end")
+    app.entry_source_mods.insert(0, "blue")
+
+    app._render_mod_list()
+    rows = list(app._mod_rows)
+    assert [row.get() for row in rows] == [0, 1, 0]
+    assert rows[2].cget("state") == "disabled"
+
+    search.return_value = [("blue", mod())]
+    app._render_mod_list()
+
+    assert app._mod_rows == rows
+    assert rows[0].cget("text").startswith("blue") and rows[0].get() == 1
+    assert [row.winfo_manager() for row in rows] == ["grid", "", ""]
+
+def test_toggle_source_mod(app):
+    """Verify that ticking mods in the installed mods list edits the Source Mods field."""
+    app.entry_source_mods.delete(0, "end")
+    app.entry_source_mods.insert(0, "red")
+
+    app._toggle_source_mod("blue")
+    assert app.entry_source_mods.get() == "red, blue"
+    app._toggle_source_mod("red")
+    assert app.entry_source_mods.get() == "blue"
+
+def test_progress_bar_follows_task_events(app, mocker):
+    """Verify that the progress bar and stage label are driven by the progress events of the running task."""
+    mocker.patch.object(app, "after")
+    mocker.patch.object(app, "_save_settings")
+    app.pipeline.progress.history.durations = {"generate": 30.0, "validate": 10.0}
+
+    assert app._prepare_for_task(task="NeonSurge")
+    app.pipeline.progress.plan("NeonSurge", ["generate", "validate"])
+    app.pipeline.progress.emit("stage_end", task="NeonSurge", stage="generate", label="attempt 1")
+    app.pipeline.progress.emit("stage_start", task="NeonSurge", stage="validate", label="attempt 1")
+    app._update_progress()
+
+    assert app.progress_bar.get() == pytest.approx(0.75, abs=0.01)
+    assert app.lbl_progress.cget("text").startswith("validate attempt 1 · 75% · ETA")
+
+    tracker = app._progress_tracker
+    app._restore_ui()
+    app.pipeline.progress.emit("stage_start", task="NeonSurge", stage="generate")
+    assert tracker.current == "validate attempt 1"
+
+def test_cancel_keeps_ui_blocked_until_rollback(app, mocker):
+    """Verify that Cancel cancels the running task's token and the UI is only released once its thread has ended."""
+    mocker.patch.object(app, "after")
+    mocker.patch.object(app, "_save_settings")
+    app.config_manager.config.update({"gemini_api_key": "key", "haydee_path": "C:\\Game"})
+
+    assert app._prepare_for_task(task="NeonSurge")
+    token = app._cancel_token
+    assert app.btn_generate.cget("state") == "disabled"
+
+    app._cancel_task()
+
+    assert token.cancelled
+    assert app.btn_generate.cget("state") == "disabled"
+    assert app.btn_cancel.cget("state") == "disabled"
+    assert app.lbl_progress.cget("text") == "Cancelling..."
+
+    app._finish_task(token)
+    assert app.btn_generate.cget("state") == "normal"
+    assert app.btn_cancel.cget("state") == "normal"
+
+def test_start_draft_blocks_ui(app, mocker):
+    """Verify that a draft needs a name and a style and locks the generate actions while it runs."""
+    mock_thread = mocker.patch("src.app.threading.Thread")
+    mock_error = mocker.patch("src.app.messagebox.showerror")
+    mocker.patch.object(app, "_render_all_prompt_cards")
+    app.entry_mod_name.delete(0, "end")
+    app.entry_mod_name.insert(0, "NeonSurge")
+    app.textbox_style.delete("1.0", "end")
+
+    app._start_draft()
+    mock_error.assert_called_with("Error", "Mod name and style description are required to generate a draft.")
+
+    app.textbox_style.insert("1.0", "neon")
+    app._start_draft()
+
+    assert mock_thread.call_args.kwargs["args"] == ("NeonSurge", "neon", app._cancel_token)
+    assert app.btn_draft.cget("state") == "disabled"
+    assert app.btn_finalize.cget("state") == "disabled"
+    app._restore_ui()
+
+def test_finalize_asks_before_using_a_failed_draft(app, mocker):
+    """Verify that finalizing a draft that failed QA needs a confirmation, which is passed on to the pipeline."""
+    mock_thread = mocker.patch("src.app.threading.Thread")
+    mock_ask = mocker.patch("src.app.messagebox.askyesno", return_value=False)
+    mocker.patch.object(app.pipeline.drafts, "load", return_value={"is_valid": False})
+    app.entry_mod_name.delete(0, "end")
+    app.entry_mod_name.insert(0, "NeonSurge")
+
+    app._start_finalize()
+    mock_ask.assert_called_once()
+    mock_thread.assert_not_called()
+
+    mock_ask.return_value = True
+    app._start_finalize()
+    mod_name, _, _, allow_failed, _ = mock_thread.call_args.kwargs["args"]
+    assert (mod_name, allow_failed) == ("NeonSurge", True)
+    app._restore_ui()
+
+def test_run_draft_thread_shows_preview(app, mocker, tmp_path):
+    """Verify that a finished draft is shown in the Generate tab with its QA verdict."""
+    from PIL import Image
+    image_path = tmp_path / "draft_Suit_D.png"
+    Image.new("RGB", (1024, 512)).save(image_path)
+    draft = {"mod": "NeonSurge", "resolution": "2K", "is_valid": True, "image": image_path}
+    mocker.patch.object(app.pipeline, "generate_draft", return_value=draft)
+    mock_after = mocker.patch.object(app, "after")
+
+    app._run_draft_thread("NeonSurge", "neon")
+    show = next(call.args for call in mock_after.call_args_list if call.args[1] == app._show_draft)
+    show[1](*show[2:])
+
+    assert app._draft_preview.cget("size") == (256, 128)
+    assert app.lbl_draft_preview.cget("text") == "NeonSurge · 2K draft · passed QA"
+
+def test_run_history_tab_shows_report(app, mocker):
+    """Verify that the Run History tab renders the stage statistics report."""
+    mocker.patch("src.app.format_report", return_value="generate  flash  4K  p50 40.0s")
+
+    app._render_run_history()
+
+    assert app.textbox_history.get("1.0", "end-1c") == "generate  flash  4K  p50 40.0s"
+
+def test_warm_up_logs_startup_report(app, mocker):
+    """Verify that the background warm-up imports the SDK and logs the startup timing report."""
+    mock_warm = mocker.patch("src.app.warm_imports")
+    mock_logger = mocker.patch.object(app, "logger")
+
+    app._warm_up()
+
+    mock_warm.assert_called_once()
+    assert app.startup_timer.marks[-1][0] == "AI SDK ready"
+    assert mock_logger.info.call_args.args[0].startswith("Startup timing:")
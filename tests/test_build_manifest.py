@@ -0,0 +1,46 @@
+from src.build_manifest import MANIFEST_NAME, BuildManifest
+
+
+def test_output_is_current_until_inputs_or_file_change(tmp_path):
+    """Verify that an output stays current only for identical inputs and an unchanged file."""
+    output = tmp_path / "Suit_D.dds"
+    output.write_bytes(b"diffuse")
+    inputs = {"style": "neon", "base": "abc", "resolution": "4K"}
+
+    manifest = BuildManifest(tmp_path)
+    assert not manifest.is_current("Suit_D.dds", inputs, output)
+    manifest.record("Suit_D.dds", inputs, output)
+
+    manifest = BuildManifest(tmp_path)
+    assert manifest.is_current("Suit_D.dds", inputs, output)
+    assert not manifest.is_current("Suit_D.dds", dict(inputs, style="rust"), output)
+
+    output.write_bytes(b"edited by hand")
+    assert not manifest.is_current("Suit_D.dds", inputs, output)
+
+
+def test_touched_but_identical_output_is_current(tmp_path):
+    output = tmp_path / "Suit.mtl"
+    output.write_text("material", encoding="utf-8")
+    manifest = BuildManifest(tmp_path)
+    manifest.record("Suit.mtl", {"mod": "Neon"}, output)
+
+    output.write_text("material", encoding="utf-8")
+    assert manifest.is_current("Suit.mtl", {"mod": "Neon"}, output)
+
+
+def test_unhashable_inputs_are_never_current(tmp_path):
+    output = tmp_path / "Suit_S.dds"
+    output.write_bytes(b"specular")
+    manifest = BuildManifest(tmp_path)
+    manifest.record("Suit_S.dds", {"diffuse": None}, output)
+
+    assert not manifest.is_current("Suit_S.dds", {"diffuse": None}, output)
+
+
+def test_record_of_missing_output_is_skipped(tmp_path):
+    manifest = BuildManifest(tmp_path)
+    manifest.record("Suit_N.dds", {"diffuse": "abc"}, tmp_path / "Suit_N.dds")
+
+    assert manifest.outputs == {}
+    assert not (tmp_path / MANIFEST_NAME).exists()
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from src.cancellation import CancelToken, TaskCancelled, run_cancellable
+
+
+def test_check_raises_after_cancel():
+    token = CancelToken()
+    token.check()
+    token.cancel()
+
+    assert token.cancelled
+    with pytest.raises(TaskCancelled):
+        token.check()
+
+
+def test_on_cancel_runs_callbacks_once_and_unregisters():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("first"))
+    unregister = token.on_cancel(lambda: calls.append("removed"))
+    unregister()
+
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append("late"))
+
+    assert calls == ["first", "late"]
+
+
+def test_run_cancellable_abandons_blocking_call():
+    """Verify that cancelling returns control right away while the blocking call is still running."""
+    token = CancelToken()
+    release = threading.Event()
+    threading.Timer(0.05, token.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(TaskCancelled):
+        run_cancellable(token, release.wait, 10)
+    release.set()
+
+    assert time.monotonic() - start < 5
+
+
+def test_run_cancellable_returns_results_and_errors():
+    token = CancelToken()
+    assert run_cancellable(token, lambda value: value * 2, 21) == 42
+    assert run_cancellable(None, lambda: "direct") == "direct"
+    with pytest.raises(ValueError, match="boom"):
+        run_cancellable(token, lambda: (_ for _ in ()).throw(ValueError("boom")))
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+import cli
+from src.prompt_store import PromptStore
+
+
+@pytest.fixture
+def mock_pipeline(mocker):
+    return mocker.patch("cli.OutfitPipeline").return_value
+
+
+def test_generate_command(tmp_path, mock_pipeline):
+    """Verify that flags override settings and map toggles are passed to the pipeline."""
+    exit_code = cli.main([
+        "--config-dir", str(tmp_path), "--api-key", "cli_key", "--haydee-path", "C:\\Game",
+        "generate", "NeonSurge", "--style", "neon", "--skip-s",
+    ])
+
+    assert exit_code == 0
+    mock_pipeline.generate_mod.assert_called_once_with("NeonSurge", "neon", True, False, True, stale_only=False)
+
+
+def test_temp_files_flag_disables_in_memory_images(tmp_path, mocker):
+    pipeline_class = mocker.patch("cli.OutfitPipeline")
+    cli.main(["--config-dir", str(tmp_path), "--haydee-path", "C:\\Game", "--temp-files", "generate", "NeonSurge", "--style", "neon"])
+
+    assert pipeline_class.call_args.args[0]["in_memory_images"] is False
+
+
+def test_generate_stale_only(tmp_path, mock_pipeline):
+    cli.main(["--config-dir", str(tmp_path), "--haydee-path", "C:\\Game", "generate", "NeonSurge", "--skip-d", "--stale-only"])
+
+    mock_pipeline.generate_mod.assert_called_once_with("NeonSurge", "", False, True, True, stale_only=True)
+
+
+def test_draft_then_finalize(tmp_path, mock_pipeline):
+    """Verify that drafts and finalize runs reach the pipeline with the draft settings."""
+    base = ["--config-dir", str(tmp_path), "--haydee-path", "C:\\Game", "--finalize-mode", "regenerate"]
+    assert cli.main(base + ["draft", "NeonSurge", "--style", "neon"]) == 0
+    assert cli.main(base + ["finalize", "NeonSurge", "--skip-n"]) == 0
+
+    mock_pipeline.generate_draft.assert_called_once_with("NeonSurge", "neon")
+    mock_pipeline.finalize_draft.assert_called_once_with("NeonSurge", gen_s=True, gen_n=False, allow_failed=False)
+
+
+def test_generate_requires_style(tmp_path, mock_pipeline):
+    """Verify that a diffuse run without a style fails instead of calling the API."""
+    exit_code = cli.main(["--config-dir", str(tmp_path), "--haydee-path", "C:\\Game", "generate", "NeonSurge"])
+
+    assert exit_code == 1
+    mock_pipeline.generate_mod.assert_not_called()
+
+
+def test_missing_game_path(tmp_path, mock_pipeline):
+    exit_code = cli.main(["--config-dir", str(tmp_path), "group", "Rainbow", "--sources", "red, blue"])
+
+    assert exit_code == 2
+    mock_pipeline.group_mods.assert_not_called()
+
+
+def test_ideas_command_saves_prompts(tmp_path, mock_pipeline, capsys):
+    """Verify that ideas are printed as JSON and optionally saved to the prompt store."""
+    mock_pipeline.generate_prompt_ideas.return_value = [{"name": "CandyPop", "style": "glossy candy"}]
+
+    exit_code = cli.main(["--config-dir", str(tmp_path), "--api-key", "cli_key", "ideas", "Candy", "--save"])
+
+    assert exit_code == 0
+    assert json.loads(capsys.readouterr().out) == [{"name": "CandyPop", "style": "glossy candy"}]
+    assert PromptStore(tmp_path / "prompts.db").list() == [{"name": "CandyPop", "style": "glossy candy"}]
+
+
+def test_overrides_are_not_saved(tmp_path, mock_pipeline, monkeypatch):
+    """Verify that flags and the environment API key reach the pipeline without being written to settings.json."""
+    settings = {"haydee_path": "C:\\Game", "image_resolution": "4K", "saved_prompts": [{"name": "Old", "style": "old"}]}
+    (tmp_path / "settings.json").write_text(json.dumps(settings), encoding="utf-8")
+    monkeypatch.setenv("GEMINI_API_KEY", "env_key")
+    mock_pipeline.generate_prompt_ideas.return_value = [{"name": "CandyPop", "style": "glossy candy"}]
+
+    exit_code = cli.main(["--config-dir", str(tmp_path), "--resolution", "2K", "ideas", "Candy", "--save"])
+
+    assert exit_code == 0
+    config = cli.OutfitPipeline.call_args.args[0]
+    assert config["gemini_api_key"] == "env_key" and config["image_resolution"] == "2K"
+    saved = json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))
+    assert saved["gemini_api_key"] == "" and saved["image_resolution"] == "4K"
+    assert "saved_prompts" not in saved
+    assert {p["name"] for p in PromptStore(tmp_path / "prompts.db").list()} == {"Old", "CandyPop"}
+
+
+def test_batch_command_reports_failures(tmp_path, mock_pipeline):
+    """Verify that the batch command drains the queue and fails when a job failed."""
+    jobs_file = tmp_path / "jobs.txt"
+    jobs_file.write_text("GoodMod: good style\nBadMod: bad style\n", encoding="utf-8")
+
+    def generate_mod(name, *args):
+        if name == "BadMod":
+            raise RuntimeError("API Failed")
+    mock_pipeline.generate_mod.side_effect = generate_mod
+
+    exit_code = cli.main([
+        "--config-dir", str(tmp_path), "--haydee-path", "C:\\Game",
+        "batch", "--file", str(jobs_file), "--workers", "2",
+    ])
+
+    assert exit_code == 1
+    names = [call.args[0] for call in mock_pipeline.generate_mod.call_args_list]
+    assert names.count("GoodMod") == 1
+    assert names.count("BadMod") == 2
+
+
+def test_progress_json_writes_events(tmp_path, mock_pipeline):
+    """Verify that --progress-json subscribes a JSON lines writer to the pipeline events."""
+    events_file = tmp_path / "events.jsonl"
+
+    def group_mods(*args):
+        listener = mock_pipeline.progress.subscribe.call_args.args[0]
+        listener({"event": "stage_end", "task": "Rainbow", "stage": "write", "elapsed": 0.1})
+    mock_pipeline.group_mods.side_effect = group_mods
+
+    exit_code = cli.main([
+        "--config-dir", str(tmp_path), "--haydee-path", "C:\\Game", "--progress-json", str(events_file),
+        "group", "Rainbow", "--sources", "red, blue",
+    ])
+
+    assert exit_code == 0
+    assert [json.loads(line) for line in events_file.read_text(encoding="utf-8").splitlines()] == [
+        {"event": "stage_end", "task": "Rainbow", "stage": "write", "elapsed": 0.1}
+    ]
+
+
+def test_history_command_prints_stats(tmp_path, mock_pipeline, capsys):
+    """Verify that the history command works without a game path and can print JSON."""
+    mock_pipeline.run_history.run_stats.return_value = [{"model": "flash", "p50": 40.0}]
+    mock_pipeline.run_history.stage_stats.return_value = []
+
+    exit_code = cli.main(["--config-dir", str(tmp_path), "history", "--json"])
+
+    assert exit_code == 0
+    assert json.loads(capsys.readouterr().out) == {"runs": [{"model": "flash", "p50": 40.0}], "stages": []}
@@ -0,0 +1,100 @@
+import pytest
+
+from src.client_registry import ClientRegistry
+from benchmarks.fake_gemini import FakeGeminiTransport
+from src.pipeline import OutfitPipeline
+
+
+@pytest.fixture
+def transport():
+    return FakeGeminiTransport(text_response='[{"name": "CandyPop", "style": "glossy candy"}]')
+
+
+@pytest.fixture
+def registry(transport):
+    return ClientRegistry(transport=transport)
+
+
+def test_clients_are_reused_per_settings(registry):
+    """Verify that clients are cached by their settings and share one connection pool per API key."""
+    first = registry.mod_client("key", "4K", "image-model", "validator")
+
+    assert registry.mod_client("key", "4K", "image-model", "validator") is first
+    assert registry.genai_client("key") is first.client
+
+    other_model = registry.mod_client("key", "2K", "other-model", "validator")
+    assert other_model is not first
+    assert other_model.client is first.client
+
+    assert registry.genai_client("other_key") is not first.client
+
+    registry.clear()
+    assert registry.mod_client("key", "4K", "image-model", "validator") is not first
+
+
+def test_pipeline_reuses_client_across_tasks(transport, registry):
+    """Verify that repeated tasks go through one cached client, served by the local transport."""
+    pipeline = OutfitPipeline({"gemini_api_key": "key", "validator_model": "validator"}, clients=registry)
+
+    for _ in range(3):
+        assert pipeline.generate_prompt_ideas("Candy") == [{"name": "CandyPop", "style": "glossy candy"}]
+
+    assert len(registry._genai_clients) == 1
+    assert [model for model, _ in transport.requests] == ["validator"] * 3
+
+
+def test_fake_transport_serves_textures_and_validation(tmp_path, registry, transport):
+    """Verify that GeminiModClient runs end to end against the local transport."""
+    from PIL import Image
+
+    base_png = tmp_path / "base.png"
+    Image.new("RGBA", (64, 64), (0, 0, 0, 255)).save(base_png)
+    client = registry.mod_client("key", "2K", "image-model", "validator")
+
+    client.generate_texture(base_png, "Style", tmp_path / "out.png")
+    result = client.validate_texture(base_png, tmp_path / "out.png", "Style")
+
+    with Image.open(tmp_path / "out.png") as generated:
+        assert generated.size == (2048, 2048)
+    assert result.is_valid
+    assert [model for model, _ in transport.requests] == ["image-model", "validator"]
+
+
+def test_fake_transport_simulates_latency(tmp_path, mocker):
+    """Verify that image and text requests are delayed by their configured latency."""
+    from PIL import Image
+
+    mock_sleep = mocker.patch("benchmarks.fake_gemini.time.sleep")
+    registry = ClientRegistry(transport=FakeGeminiTransport(latency=0.5, image_latency=2.0))
+    base_png = tmp_path / "base.png"
+    Image.new("RGBA", (64, 64), (0, 0, 0, 255)).save(base_png)
+    client = registry.mod_client("key", "2K", "image-model", "validator")
+
+    client.generate_texture(base_png, "Style", tmp_path / "out.png")
+    client.validate_texture(base_png, tmp_path / "out.png", "Style")
+
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [2.0, 0.5]
+
+
+def test_bypassed_validation_is_not_cached(tmp_path, transport, registry):
+    """Verify that the all-pass verdict returned when the validator API fails is not reused from the cache."""
+    from PIL import Image
+
+    pipeline = OutfitPipeline({"gemini_api_key": "key", "validator_model": "validator"},
+                              cache_dir=tmp_path / "cache", clients=registry)
+    client = registry.mod_client("key", "2K", "image-model", "validator")
+    base_png, generated_png = tmp_path / "base.png", tmp_path / "out.png"
+    Image.new("RGBA", (64, 64), (0, 0, 0, 255)).save(base_png)
+    Image.new("RGBA", (64, 64), (255, 0, 0, 255)).save(generated_png)
+    transport.error_statuses.append(400)
+    transport.json_response = {
+        "is_face_valid": False, "is_torso_seams_valid": True, "is_legs_valid": True, "feedback": "Visor on the helmet"
+    }
+
+    bypassed = pipeline._validate(client, base_png, generated_png, "Style")
+    validated = pipeline._validate(client, base_png, generated_png, "Style")
+    cached = pipeline._validate(client, base_png, generated_png, "Style")
+
+    assert bypassed.is_valid and bypassed.feedback == "Validation bypassed due to API error."
+    assert not validated.is_valid and cached == validated
+    assert len(transport.requests) == 2
@@ -0,0 +1,65 @@
+import json
+import os
+
+from src.config_manager import ConfigManager
+
+
+def test_saves_are_coalesced(tmp_path, mocker):
+    """Verify that a burst of saves results in a single write of the latest settings."""
+    config_manager = ConfigManager(config_dir=tmp_path, save_delay=60)
+    replace_spy = mocker.spy(os, "replace")
+
+    for name in ["A", "B", "C"]:
+        config_manager.config["author_name"] = name
+        config_manager.save()
+    assert not (tmp_path / "settings.json").exists()
+
+    config_manager.flush()
+    config_manager.flush()
+
+    assert replace_spy.call_count == 1
+    assert json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))["author_name"] == "C"
+
+
+def test_save_writes_in_background(tmp_path):
+    config_manager = ConfigManager(config_dir=tmp_path, save_delay=0)
+    config_manager.config["author_name"] = "Tester"
+    config_manager.save()
+    config_manager._timer.join(timeout=5)
+
+    assert ConfigManager(config_dir=tmp_path).config["author_name"] == "Tester"
+
+
+def test_failed_write_keeps_previous_file(tmp_path, mocker):
+    """Verify that a crash mid-write leaves the previous settings.json intact and retries on the next flush."""
+    config_manager = ConfigManager(config_dir=tmp_path)
+    config_manager.config["author_name"] = "Original"
+    config_manager.save()
+    config_manager.flush()
+
+    config_manager.config["author_name"] = "Changed"
+    config_manager.save()
+    mocker.patch("src.config_manager.os.fsync", side_effect=OSError("Disk full"))
+    config_manager.flush()
+
+    assert ConfigManager(config_dir=tmp_path).config["author_name"] == "Original"
+
+    mocker.stopall()
+    config_manager.flush()
+    assert ConfigManager(config_dir=tmp_path).config["author_name"] == "Changed"
+
+
+def test_write_uses_settings_from_save_time(tmp_path):
+    """Verify that the background write serializes a copy, not the dict the caller keeps changing."""
+    config_manager = ConfigManager(config_dir=tmp_path, save_delay=60)
+    config_manager.config["author_name"] = "Saved"
+    config_manager.save()
+    config_manager.config["author_name"] = "Being edited"
+    config_manager.config["new_key"] = True
+
+    config_manager._timer.cancel()
+    config_manager._write()
+
+    saved = json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))
+    assert saved["author_name"] == "Saved"
+    assert "new_key" not in saved
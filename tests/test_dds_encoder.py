@@ -0,0 +1,57 @@
+import pytest
+from PIL import Image
+
+from src.dds_encoder import DDS_HEADER_SIZE, DDSEncoder
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    encoder = DDSEncoder(max_workers=2, strip_rows=512)
+    yield encoder
+    encoder.shutdown()
+
+
+@pytest.fixture
+def source_png(tmp_path):
+    gradient = Image.linear_gradient("L").resize((300, 300))
+    path = tmp_path / "generated.png"
+    Image.merge("RGB", (gradient, gradient.rotate(90), gradient.rotate(45))).save(path)
+    return path
+
+
+@pytest.mark.parametrize("kind, library_call", [
+    ("diffuse", "img_to_dds"),
+    ("specular", "create_specular_map"),
+    ("normal", "create_custom_normal_map"),
+])
+def test_strip_encoding_matches_library(encoder, source_png, tmp_path, kind, library_call):
+    """Verify that encoding in parallel strips writes exactly the file ImageProcessor would have written."""
+    from haydee_outfit_gen.image_processor import ImageProcessor
+    getattr(ImageProcessor, library_call)(source_png, tmp_path / "expected.dds", resolution="2K")
+
+    encoder.encode(kind, source_png, tmp_path / "Suit.dds", resolution="2K")
+
+    assert (tmp_path / "Suit.dds").read_bytes() == (tmp_path / "expected.dds").read_bytes()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_preview_quality_encodes_at_half_size(encoder, tmp_path):
+    """Verify that a preview of a full-size AI output compresses a quarter of the pixels of the final texture."""
+    gradient = Image.linear_gradient("L").resize((2048, 2048))
+    source_png = tmp_path / "generated.png"
+    Image.merge("RGB", (gradient, gradient.rotate(90), gradient.rotate(45))).save(source_png)
+
+    encoder.encode("diffuse", source_png, tmp_path / "final.dds", resolution="2K")
+    encoder.encode("diffuse", source_png, tmp_path / "preview.dds", resolution="2K", quality="preview")
+
+    final, preview = (tmp_path / "final.dds").read_bytes(), (tmp_path / "preview.dds").read_bytes()
+    assert len(preview) - DDS_HEADER_SIZE == (len(final) - DDS_HEADER_SIZE) // 4
+    with Image.open(tmp_path / "final.dds") as image:
+        assert image.size == (2048, 2048)
+    with Image.open(tmp_path / "preview.dds") as image:
+        assert image.size == (1024, 1024)
+
+
+def test_unknown_quality_is_rejected(encoder, source_png, tmp_path):
+    with pytest.raises(ValueError, match="Unknown DDS quality"):
+        encoder.encode("diffuse", source_png, tmp_path / "Suit_D.dds", quality="ultra")
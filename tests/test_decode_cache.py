@@ -0,0 +1,57 @@
+import pytest
+from PIL import Image
+
+from src.decode_cache import DecodeCache
+
+
+def make_dds(path, color):
+    Image.new("RGBA", (64, 64), color).save(path, format="DDS", pixel_format="DXT5")
+    return path
+
+
+@pytest.fixture
+def decode_spy(mocker):
+    from haydee_outfit_gen.image_processor import ImageProcessor
+    return mocker.spy(ImageProcessor, "dds_to_png")
+
+
+def test_second_decode_is_a_hit(tmp_path, decode_spy):
+    """Verify that identical content is decoded only once, even from a different file."""
+    cache = DecodeCache(tmp_path / "cache")
+    first = make_dds(tmp_path / "Suit_D.dds", (255, 0, 0, 255))
+    copy = make_dds(tmp_path / "Copy_D.dds", (255, 0, 0, 255))
+
+    assert cache.dds_to_png(first, tmp_path / "a.png") is False
+    assert cache.dds_to_png(copy, tmp_path / "b.png") is True
+
+    assert decode_spy.call_count == 1
+    assert (tmp_path / "b.png").read_bytes() == (tmp_path / "a.png").read_bytes()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_is_keyed_by_resolution_and_persisted(tmp_path, decode_spy):
+    """Verify that entries survive a new cache instance and differ per resolution."""
+    source = make_dds(tmp_path / "Suit_D.dds", (0, 255, 0, 255))
+    DecodeCache(tmp_path / "cache").dds_to_png(source, tmp_path / "a.png", resolution="4K")
+
+    cache = DecodeCache(tmp_path / "cache")
+    assert cache.dds_to_png(source, tmp_path / "b.png", resolution="4K") is True
+    assert cache.dds_to_png(source, tmp_path / "c.png", resolution="2K") is False
+    assert decode_spy.call_count == 2
+
+
+def test_lru_eviction(tmp_path):
+    """Verify that the least recently used entry is evicted once the size limit is exceeded."""
+    sources = [make_dds(tmp_path / f"{i}.dds", (i * 80, 0, 0, 255)) for i in range(3)]
+    cache = DecodeCache(tmp_path / "cache")
+    cache.dds_to_png(sources[0], tmp_path / "0.png")
+    entry_size = next(iter(cache.entries.values()))["size"]
+    cache.max_bytes = entry_size * 2 + entry_size // 2
+
+    cache.dds_to_png(sources[1], tmp_path / "1.png")
+    cache.dds_to_png(sources[0], tmp_path / "0b.png")  # touch entry 0 so entry 1 becomes the LRU
+    cache.dds_to_png(sources[2], tmp_path / "2.png")
+
+    keys = {key.split("_")[0] for key in cache.entries}
+    assert keys == {cache.source_hash(sources[0]), cache.source_hash(sources[2])}
+    assert len(list((tmp_path / "cache").glob("*.png"))) == 2
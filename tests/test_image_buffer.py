@@ -0,0 +1,35 @@
+import hashlib
+
+from PIL import Image
+
+from src.image_buffer import ImageBuffer
+
+
+def test_from_dds_round_trips_pixels(tmp_path):
+    """Verify that a decoded DDS opens with PIL exactly like the PNG the library would have written."""
+    source = tmp_path / "Suit_D.dds"
+    Image.new("RGBA", (64, 64), (255, 0, 0, 255)).save(source, format="DDS", pixel_format="DXT5")
+    reference = tmp_path / "reference.png"
+    with Image.open(source) as image:
+        image.save(reference, format="PNG")
+
+    buffer = ImageBuffer.from_dds(source)
+
+    with Image.open(buffer.open()) as decoded, Image.open(reference) as expected:
+        assert (decoded.size, decoded.mode) == (expected.size, expected.mode)
+        assert decoded.tobytes() == expected.tobytes()
+    assert buffer.name == "Suit_D.dds"
+
+
+def test_open_returns_independent_streams():
+    """Verify that concurrent readers of one buffer do not share a file position."""
+    buffer = ImageBuffer(b"pixels")
+    first = buffer.open()
+    assert first.read(3) == b"pix"
+    assert buffer.open().read() == b"pixels"
+    assert first.read() == b"els"
+
+
+def test_sha256_matches_content():
+    assert ImageBuffer(b"pixels").sha256() == hashlib.sha256(b"pixels").hexdigest()
+    assert len(ImageBuffer(b"pixels")) == 6
@@ -0,0 +1,108 @@
+import json
+import threading
+
+from src.job_queue import JobQueue, parse_job_lines
+
+
+def run_to_completion(queue, workers=1, timeout=5):
+    """Starts the queue and waits for its worker threads to drain it."""
+    idle = threading.Event()
+    queue.on_change = lambda: idle.set() if queue._active_workers == 0 else None
+    queue.start(workers=workers)
+    assert idle.wait(timeout)
+
+
+def test_parse_job_lines():
+    """Verify that both separators are supported and blank/comment lines are skipped."""
+    text = "CandyPop: glossy candy armor\n\n# comment\nNeonSurge | neon cyberpunk: glowing\nNoStyle"
+
+    assert parse_job_lines(text) == [
+        ("CandyPop", "glossy candy armor"),
+        ("NeonSurge", "neon cyberpunk: glowing"),
+        ("NoStyle", ""),
+    ]
+
+
+def test_queue_runs_all_jobs(tmp_path):
+    """Verify that every pending job is handed to the runner and marked as done."""
+    calls = []
+    queue = JobQueue(tmp_path / "queue.json", runner=lambda *args: calls.append(args))
+    queue.add("ModA", "StyleA")
+    queue.add("ModB", "StyleB", gen_s=False)
+
+    run_to_completion(queue, workers=2)
+
+    assert sorted(calls) == [("ModA", "StyleA", True, True, True), ("ModB", "StyleB", True, False, True)]
+    assert queue.counts()["done"] == 2
+
+
+def test_queue_retries_then_fails(tmp_path):
+    """Verify that a failing job is retried once and then marked as failed with its error."""
+    def runner(*args):
+        raise RuntimeError("API Failed")
+
+    queue = JobQueue(tmp_path / "queue.json", runner=runner, max_retries=1)
+    job = queue.add("BadMod", "Style")
+
+    run_to_completion(queue)
+
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == "API Failed"
+
+    queue.retry(job["id"])
+    assert job["status"] == "pending"
+    assert job["attempts"] == 0
+
+
+def test_queue_survives_restart(tmp_path):
+    """Verify that an interrupted queue reloads its jobs and resumes running jobs as pending."""
+    storage = tmp_path / "queue.json"
+    storage.write_text(json.dumps({
+        "running": True,
+        "jobs": [
+            {"id": "1", "name": "ModA", "style": "A", "gen_d": True, "gen_s": True, "gen_n": True,
+             "status": "running", "attempts": 1, "error": ""},
+            {"id": "2", "name": "ModB", "style": "B", "gen_d": True, "gen_s": True, "gen_n": True,
+             "status": "done", "attempts": 1, "error": ""},
+        ],
+    }), encoding="utf-8")
+
+    queue = JobQueue(storage, runner=lambda *args: None)
+
+    assert queue.was_running
+    assert [job["status"] for job in queue.jobs] == ["pending", "done"]
+
+    queue.clear_finished()
+    saved = json.loads(storage.read_text(encoding="utf-8"))
+    assert [job["name"] for job in saved["jobs"]] == ["ModA"]
+    assert saved["running"] is False
+
+
+def test_stopped_queue_is_not_resumed(tmp_path):
+    """Verify that a queue stopped while a job is still running stays stopped after a restart."""
+    storage = tmp_path / "queue.json"
+    started, release = threading.Event(), threading.Event()
+
+    def runner(*args):
+        started.set()
+        release.wait(5)
+
+    queue = JobQueue(storage, runner=runner)
+    queue.add("ModA", "A")
+    queue.add("ModB", "B")
+    queue.start()
+    assert started.wait(5)
+
+    queue.stop()
+    # The app closes before the running job finishes
+    restarted = JobQueue(storage, runner=runner)
+    release.set()
+    queue.wait()
+
+    assert not restarted.was_running
+    assert [job["status"] for job in restarted.jobs] == ["pending", "pending"]
+
+    restarted.start()
+    restarted.wait()
+    assert not JobQueue(storage, runner=runner).stopped
@@ -0,0 +1,18 @@
+from src.json_stream import IncrementalJSONArrayParser
+
+
+def test_objects_are_emitted_when_complete():
+    """Verify that nested braces, brackets and escaped quotes inside strings do not confuse the parser."""
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('```json\n[{"name": "A", "style": "x {y} [z]') == []
+    assert parser.feed(' \\"q\\""}, {"name": "B", "tags": {"a": 1}') == [{"name": "A", "style": 'x {y} [z] "q"'}]
+    assert parser.feed('}]\n```') == [{"name": "B", "tags": {"a": 1}}]
+    assert parser.finished
+
+
+def test_text_without_array_is_ignored():
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('{"name": "Solo"}') == []
+    assert not parser.started
@@ -0,0 +1,82 @@
+import os
+
+from src.mod_index import ModIndex, parse_outfit_slots
+
+
+def make_mod(outfits_dir, name, maps=("D", "S", "N"), slots='slot "mod by" "Alice";'):
+    mod_dir = outfits_dir / name
+    mod_dir.mkdir(parents=True)
+    for key in maps:
+        (mod_dir / f"Suit_{key}.dds").write_bytes(b"x" * 10)
+    (outfits_dir / f"{name}.outfit").write_text(f"outfit\n{{\n\t{slots}\n}}\n", encoding="utf-8")
+    return mod_dir
+
+
+def test_parse_outfit_slots():
+    text = 'slot "mod by" "Alice"; slot "color" "red"; slot "color" "blue"; slot "head" "x";'
+    assert parse_outfit_slots(text) == ("Alice", ["color", "head"])
+
+
+def test_refresh_indexes_mods_and_skips_hidden(tmp_path):
+    outfits = tmp_path / "Outfits"
+    make_mod(outfits, "Red")
+    make_mod(outfits, "Blue", maps=("D",), slots='slot "color" "blue";')
+    (outfits / ".Rainbow.staging").mkdir()
+    index = ModIndex(tmp_path / "mod_index.json", outfits)
+
+    assert index.refresh() is True
+    assert set(index.mods) == {"Red", "Blue"}
+    assert index.mods["Red"]["author"] == "Alice"
+    assert index.mods["Red"]["size"] == 30
+    assert index.mods["Blue"]["maps"] == {"D": 10, "S": None, "N": None}
+    assert index.mods["Blue"]["slot_categories"] == ["color"]
+    assert index.refresh() is False
+
+
+def test_refresh_rereads_only_changed_mods(tmp_path, mocker):
+    outfits = tmp_path / "Outfits"
+    make_mod(outfits, "Red")
+    blue_dir = make_mod(outfits, "Blue")
+    ModIndex(tmp_path / "mod_index.json", outfits).refresh()
+
+    # A reloaded index starts from the persisted entries
+    index = ModIndex(tmp_path / "mod_index.json", outfits)
+    read_mod = mocker.spy(index, "_read_mod")
+    (blue_dir / "Suit_S.dds").unlink()
+    stat = blue_dir.stat()
+    os.utime(blue_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    make_mod(outfits, "Green")
+    (outfits / "Red.outfit").unlink()
+    (outfits / "Red").rename(outfits / "Old")
+
+    assert index.refresh() is True
+    assert sorted(call.args[0].name for call in read_mod.call_args_list) == ["Blue", "Green", "Old"]
+    assert set(index.mods) == {"Blue", "Green", "Old"}
+    assert index.mods["Blue"]["maps"]["S"] is None
+
+
+def test_index_for_another_installation_is_not_reused(tmp_path):
+    outfits = tmp_path / "Outfits"
+    make_mod(outfits, "Red")
+    ModIndex(tmp_path / "mod_index.json", outfits).refresh()
+
+    index = ModIndex(tmp_path / "mod_index.json", tmp_path / "Other")
+    assert index.mods == {}
+    assert index.refresh() is False
+
+
+def test_search_and_problems(tmp_path):
+    outfits = tmp_path / "Outfits"
+    make_mod(outfits, "NeonRed", slots='slot "mod by" "Alice"; slot "color" "red";')
+    make_mod(outfits, "blue", maps=("S",), slots='slot "mod by" "Bob";')
+    index = ModIndex(tmp_path / "mod_index.json", outfits)
+    index.refresh()
+
+    assert [name for name, _ in index.search()] == ["blue", "NeonRed"]
+    assert [name for name, _ in index.search("alice COLOR")] == ["NeonRed"]
+    assert index.search("bob red") == []
+    assert index.problems(["NeonRed", "blue", "Missing", "Haydee"]) == [
+        "Source mod 'blue' has no Suit_D.dds.",
+        "Source mod 'Missing' not found.",
+        "Cannot group the system 'Haydee' mod.",
+    ]
@@ -0,0 +1,653 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.cancellation import CancelToken, TaskCancelled
+from src.image_buffer import ImageBuffer
+from src.pipeline import OutfitPipeline, parse_mod_list
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def config():
+    return {
+        "gemini_api_key": "test_key",
+        "haydee_path": "C:\\Test\\Path",
+        "author_name": "TestAuthor",
+        "image_resolution": "4K",
+        "model_name": "test_model_v1",
+        "validator_model": "gemini-3.1-pro-preview",
+    }
+
+
+@pytest.fixture
+def pipeline(config):
+    return OutfitPipeline(config)
+
+
+def test_headless_import_skips_tkinter():
+    """Verify that the headless entry point never imports customtkinter or tkinter."""
+    code = "import sys, cli; print(any(m.split('.')[0] in ('tkinter', 'customtkinter') for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_startup_import_defers_sdk():
+    """Verify that importing the GUI and CLI modules does not import google-genai or the generator library."""
+    code = ("import sys, cli, src.app; "
+            "print(sorted(m for m in ('google.genai', 'haydee_outfit_gen', 'httpx', 'pydantic') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_warm_imports_resolves_library_names():
+    import src.pipeline
+    from haydee_outfit_gen.mod_builder import ModBuilder
+
+    src.pipeline.warm_imports()
+    assert src.pipeline.ModBuilder is ModBuilder
+    assert src.pipeline.client_registry.genai.Client.__init__._haydee_timeout_patch
+
+
+def test_parse_mod_list():
+    assert parse_mod_list(" red, green ,,blue ") == ["red", "green", "blue"]
+
+
+def test_generate_mod_retries_with_feedback(pipeline, mocker):
+    """Verify that a failed QA validation feeds its feedback into the next generation attempt."""
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mock_builder = mocker.patch("src.pipeline.ModBuilder").return_value
+    mock_processor = mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mock_encode = mocker.patch.object(pipeline.dds_encoder, "encode")
+
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.validate_texture.side_effect = [
+        mocker.Mock(is_valid=False, feedback="Face detected"),
+        mocker.Mock(is_valid=True, feedback=""),
+    ]
+
+    pipeline.generate_mod("TestMod", "Style", True, False, False)
+
+    assert mock_client.generate_texture.call_count == 2
+    assert mock_client.generate_texture.call_args.kwargs["previous_feedback"] == "Face detected"
+    # The decoded base texture is handed over in memory, never through a PNG temp file
+    mock_processor.dds_to_png.assert_not_called()
+    assert mock_client.generate_texture.call_args.kwargs["base_image_path"].read() == b"decoded"
+    assert mock_client.validate_texture.call_args.kwargs["base_image_path"].read() == b"decoded"
+    assert mock_encode.call_args.args[0] == "diffuse"
+    mock_builder.prepare_directory.assert_called_once_with(clear_dir=True)
+    mock_builder.generate_outfit_file.assert_called_once()
+
+
+class FakeQAClient:
+    """Writes 'attempt-<n>' into each generated texture and replays a list of validation verdicts."""
+
+    def __init__(self, verdicts):
+        self.verdicts = list(verdicts)
+        self.feedbacks = []
+        self._lock = threading.Lock()
+
+    def generate_texture(self, base_image_path, style, output_path, previous_feedback=None):
+        with self._lock:
+            self.feedbacks.append(previous_feedback)
+            number = len(self.feedbacks)
+        Path(output_path).write_text(f"attempt-{number}", encoding="utf-8")
+
+    def validate_texture(self, base_image_path, generated_image_path, style):
+        is_valid, feedback = self.verdicts.pop(0)
+        return SimpleNamespace(is_valid=is_valid, feedback=feedback)
+
+
+def test_speculative_qa_discards_next_attempt_on_pass(pipeline, tmp_path):
+    client = FakeQAClient([(True, "")])
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_speculative_qa(client, tmp_path / "base.png", "Style", output, 3) is True
+    assert output.read_text(encoding="utf-8") == "attempt-1"
+
+
+def test_speculative_qa_keeps_next_attempt_on_fail(pipeline, tmp_path):
+    """Verify that in keep mode the speculative attempt becomes the next candidate."""
+    client = FakeQAClient([(False, "Face detected"), (True, "")])
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_speculative_qa(client, tmp_path / "base.png", "Style", output, 3) is True
+    assert output.read_text(encoding="utf-8") == "attempt-2"
+    assert client.feedbacks[:2] == [None, None]
+
+
+def test_speculative_qa_restarts_with_feedback(pipeline, tmp_path):
+    """Verify that in restart mode the speculative attempt is replaced by one that uses the QA feedback."""
+    client = FakeQAClient([(False, "Face detected"), (True, "")])
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_speculative_qa(client, tmp_path / "base.png", "Style", output, 3, restart_on_fail=True) is True
+    # The kept candidate is the regenerated attempt, which received the QA feedback
+    number = int(output.read_text(encoding="utf-8").split("-")[1])
+    assert number > 1
+    assert client.feedbacks[number - 1] == "Face detected"
+
+
+def test_speculative_qa_gives_up_after_max_attempts(pipeline, tmp_path):
+    client = FakeQAClient([(False, "Bad legs")] * 2)
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_speculative_qa(client, tmp_path / "base.png", "Style", output, 2) is False
+    assert output.read_text(encoding="utf-8") == "attempt-2"
+    assert len(client.feedbacks) == 2
+
+
+class FakeCandidateClient:
+    """Validates each candidate according to the verdict registered for its candidate number."""
+
+    def __init__(self, verdicts):
+        self.verdicts = verdicts
+
+    def generate_texture(self, base_image_path, style, output_path, previous_feedback=None):
+        if self.verdicts[self._number(output_path)] is None:
+            raise RuntimeError("API Failed")
+        Path(output_path).write_text(Path(output_path).stem, encoding="utf-8")
+
+    def validate_texture(self, base_image_path, generated_image_path, style):
+        face, torso, legs = self.verdicts[self._number(generated_image_path)]
+        return SimpleNamespace(
+            is_face_valid=face, is_torso_seams_valid=torso, is_legs_valid=legs,
+            is_valid=face and torso and legs, feedback="Structural flaws"
+        )
+
+    @staticmethod
+    def _number(path):
+        return int(Path(path).stem.split("_")[1])
+
+
+def test_best_of_n_keeps_passing_candidate(pipeline, tmp_path):
+    client = FakeCandidateClient({1: (True, False, True), 2: (True, True, True), 3: (False, False, False)})
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_best_of_n_qa(client, tmp_path / "base.png", "Style", output, 3, concurrency=3) is True
+    assert output.read_text(encoding="utf-8") == "candidate_2"
+
+
+def test_best_of_n_keeps_best_scored_candidate(pipeline, tmp_path):
+    """Verify that the candidate passing the most checks wins when none pass, and failed generations are skipped."""
+    client = FakeCandidateClient({1: (True, False, False), 2: (True, True, False), 3: None})
+    output = tmp_path / "out.png"
+
+    assert pipeline._run_best_of_n_qa(client, tmp_path / "base.png", "Style", output, 3, concurrency=2) is False
+    assert output.read_text(encoding="utf-8") == "candidate_2"
+
+
+def test_best_of_n_all_candidates_fail(pipeline, tmp_path):
+    client = FakeCandidateClient({1: None, 2: None})
+
+    with pytest.raises(RuntimeError, match="All 2 candidates failed"):
+        pipeline._run_best_of_n_qa(client, tmp_path / "base.png", "Style", tmp_path / "out.png", 2, concurrency=2)
+
+
+def test_run_map_branches_reports_each_failure(pipeline, mocker):
+    """Verify that a failing map branch is logged and does not stop the other branch."""
+    mock_logger = mocker.patch.object(pipeline, "logger")
+    finished = []
+
+    def failing_branch():
+        raise RuntimeError("Mask API Failed")
+
+    branches = {
+        "Suit_S": failing_branch,
+        "Suit_N": lambda: finished.append("Suit_N"),
+    }
+
+    with pytest.raises(RuntimeError, match="Suit_S"):
+        pipeline._run_map_branches(branches)
+
+    assert finished == ["Suit_N"]
+    mock_logger.error.assert_called_once_with("Suit_S generation failed: Mask API Failed")
+
+
+def stream_chunks(text, size=7):
+    return [SimpleNamespace(text=text[i:i + size]) for i in range(0, len(text), size)]
+
+
+def test_generate_prompt_ideas_streams_each_idea(pipeline, mocker):
+    """Verify that fenced, chunked JSON is parsed incrementally and every idea is reported as soon as it is complete."""
+    mock_client = mocker.patch("src.client_registry.genai.Client").return_value
+    response = '```json\n[{"name": "CyberNeon", "style": "Glowing {neon} \\"lights\\""}, {"name": "Rust", "style": "Old metal"}]\n```'
+    chunks = stream_chunks(response)
+    received = []
+
+    def stream(**kwargs):
+        for index, chunk in enumerate(chunks):
+            received.append(("chunk", index))
+            yield chunk
+
+    mock_stream = mock_client.models.generate_content_stream
+    mock_stream.side_effect = stream
+
+    ideas = pipeline.generate_prompt_ideas("Cyberpunk", count=5, on_idea=lambda idea: received.append(("idea", idea["name"])))
+
+    assert ideas == [{"name": "CyberNeon", "style": 'Glowing {neon} "lights"'}, {"name": "Rust", "style": "Old metal"}]
+    # The first idea is reported before the rest of the response has arrived
+    assert received.index(("idea", "CyberNeon")) < received.index(("chunk", len(chunks) - 1))
+    assert "Generate 5 distinct" in mock_stream.call_args.kwargs["contents"]
+
+
+def test_generate_mod_emits_stage_events(pipeline, mocker, tmp_path):
+    """Verify that every generation stage is planned and reported with start and end events."""
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mocker.patch("src.pipeline.ModBuilder").return_value.mod_dir = tmp_path
+    mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mocker.patch.object(pipeline.dds_encoder, "encode")
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.validate_texture.return_value = mocker.Mock(is_valid=True, feedback="")
+    events = []
+    pipeline.progress.subscribe(events.append)
+
+    pipeline.generate_mod("TestMod", "Style", True, True, False)
+
+    assert events[0] == {"event": "plan", "time": events[0]["time"], "task": "TestMod",
+                         "stages": ["decode", "generate", "validate", "encode", "mask", "encode", "write"]}
+    ends = [(e["stage"], e.get("label")) for e in events if e["event"] == "stage_end"]
+    assert ends[:3] == [("decode", "Suit_D.dds"), ("generate", "attempt 1"), ("validate", "attempt 1")]
+    # The Suit_D encode overlaps the Suit_S branch, which encodes after its mask
+    assert sorted(ends[3:-1]) == [("encode", "Suit_D.dds"), ("encode", "Suit_S.dds"), ("mask", None)]
+    assert ends.index(("mask", None)) < ends.index(("encode", "Suit_S.dds"))
+    assert ends[-1] == ("write", "TestMod.outfit")
+    assert all(e["task"] == "TestMod" and e["status"] == "ok" for e in events if e["event"] == "stage_end")
+
+
+def test_generate_mod_records_failed_runs(config, mocker, tmp_path):
+    """Verify that a failed run is still persisted with its settings, attempts and stage durations."""
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path)
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mocker.patch("src.pipeline.ModBuilder").return_value.mod_dir = tmp_path
+    mocker.patch("src.pipeline.ImageProcessor")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.validate_texture.side_effect = RuntimeError("Validator down")
+
+    with pytest.raises(RuntimeError, match="Validator down"):
+        pipeline.generate_mod("TestMod", "Style", True, False, False)
+
+    run = pipeline.run_history.runs[-1]
+    assert (run["mod"], run["resolution"], run["model"], run["status"], run["attempts"]) == ("TestMod", "4K", "test_model_v1", "failed", 1)
+    assert [(stage["stage"], stage["status"]) for stage in run["stages"]] == [("decode", "ok"), ("generate", "ok"), ("validate", "error")]
+
+
+def test_generate_mod_records_qa_verdict(config, mocker, tmp_path):
+    """Verify that a run shipping a texture that never passed QA completes but is recorded as not passing QA."""
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path)
+    mocker.patch("src.pipeline.Path.exists", return_value=True)
+    mocker.patch("src.pipeline.ModBuilder").return_value.mod_dir = tmp_path
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch("src.pipeline.tempfile.TemporaryDirectory")
+    mocker.patch.object(pipeline.dds_encoder, "encode")
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.validate_texture.return_value = mocker.Mock(is_valid=False, feedback="Seams")
+
+    pipeline.generate_mod("TestMod", "Style", True, False, False)
+    mock_client.validate_texture.return_value = mocker.Mock(is_valid=True, feedback="")
+    pipeline.generate_mod("TestMod", "Style", True, False, False)
+
+    assert [(run["status"], run["qa_passed"]) for run in pipeline.run_history.runs] == [("ok", False), ("ok", True)]
+
+
+def test_generate_prompt_ideas_invalid_json(pipeline, mocker):
+    """Verify that a non-JSON response raises a readable error."""
+    mock_client = mocker.patch("src.client_registry.genai.Client").return_value
+    mock_client.models.generate_content_stream.return_value = stream_chunks("This is not JSON")
+
+    with pytest.raises(ValueError, match="invalid JSON"):
+        pipeline.generate_prompt_ideas("Cyberpunk")
+
+
+def test_generate_prompt_ideas_requires_array(pipeline, mocker):
+    mock_client = mocker.patch("src.client_registry.genai.Client").return_value
+    mock_client.models.generate_content_stream.return_value = stream_chunks('{"name": "Solo", "style": "One"}')
+
+    with pytest.raises(ValueError, match="JSON array"):
+        pipeline.generate_prompt_ideas("Cyberpunk")
+
+
+def test_group_mods(pipeline, mocker):
+    """Verify the grouping steps and that sources are only removed on request."""
+    pipeline.config["group_workers"] = 1
+    mock_builder_class = mocker.patch("src.pipeline.MultiModBuilder")
+    mock_builder = mock_builder_class.return_value
+
+    pipeline.group_mods("Rainbow", ["red", "blue"], "color", delete_sources=False)
+
+    assert mock_builder_class.call_args.kwargs["source_mods"] == ["red", "blue"]
+    mock_builder.migrate_assets_and_generate_mtls.assert_called_once()
+    mock_builder.cleanup_sources.assert_not_called()
+
+    with pytest.raises(ValueError, match="No valid source mods"):
+        pipeline.group_mods("Rainbow", [], "color", delete_sources=False)
+
+
+def make_outfits(tmp_path, mods):
+    outfits_dir = tmp_path / "Outfits"
+    for mod in mods:
+        (outfits_dir / mod).mkdir(parents=True)
+        (outfits_dir / mod / "Suit_D.dds").write_bytes(f"{mod}-d".encode())
+        (outfits_dir / mod / "Suit_S.dds").write_bytes(f"{mod}-s".encode())
+        (outfits_dir / f"{mod}.outfit").write_text(mod, encoding="utf-8")
+    return outfits_dir
+
+
+def test_parallel_grouping_matches_serial_output(config, tmp_path):
+    """Verify that the parallel grouper writes the same files as the library's serial grouping."""
+    mods = [f"mod{i}" for i in range(6)]
+    serial_dir = make_outfits(tmp_path / "serial", mods)
+    parallel_dir = make_outfits(tmp_path / "parallel", mods)
+
+    OutfitPipeline({**config, "haydee_path": str(tmp_path / "serial"), "group_workers": 1}).group_mods("Pack", mods, "color", False)
+    OutfitPipeline({**config, "haydee_path": str(tmp_path / "parallel"), "group_workers": 3}).group_mods("Pack", mods, "color", False)
+
+    serial_files = {p.name: p.read_bytes() for p in (serial_dir / "Pack").iterdir()}
+    assert {p.name: p.read_bytes() for p in (parallel_dir / "Pack").iterdir()} == serial_files
+    assert (parallel_dir / "Pack.outfit").read_bytes() == (serial_dir / "Pack.outfit").read_bytes()
+    assert (parallel_dir / "mod0" / "Suit_D.dds").exists()
+
+
+def test_parallel_grouping_moves_deleted_sources(config, tmp_path, mocker):
+    outfits_dir = make_outfits(tmp_path, ["red", "blue"])
+    copy_spy = mocker.patch("src.grouping.shutil.copy2")
+    pipeline = OutfitPipeline({**config, "haydee_path": str(tmp_path), "group_workers": 2})
+
+    pipeline.group_mods("Rainbow", ["red", "blue"], "color", delete_sources=True)
+
+    copy_spy.assert_not_called()
+    assert (outfits_dir / "Rainbow" / "red_d.dds").read_bytes() == b"red-d"
+    assert not (outfits_dir / "red").exists()
+    assert not (outfits_dir / "blue.outfit").exists()
+
+
+def test_parallel_grouping_rolls_back_on_failure(config, tmp_path, mocker):
+    """Verify that a failing variant restores moved sources and keeps the previous multi-mod."""
+    outfits_dir = make_outfits(tmp_path, ["red", "green", "blue"])
+    (outfits_dir / "Rainbow").mkdir()
+    (outfits_dir / "Rainbow" / "old.mtl").write_text("old", encoding="utf-8")
+    original_write = Path.write_text
+
+    def failing_write(self, *args, **kwargs):
+        if self.name == "green.mtl":
+            raise OSError("Disk full")
+        return original_write(self, *args, **kwargs)
+
+    mocker.patch.object(Path, "write_text", failing_write)
+    pipeline = OutfitPipeline({**config, "haydee_path": str(tmp_path), "group_workers": 3})
+
+    with pytest.raises(OSError, match="Disk full"):
+        pipeline.group_mods("Rainbow", ["red", "green", "blue"], "color", delete_sources=True)
+
+    for mod in ["red", "green", "blue"]:
+        assert (outfits_dir / mod / "Suit_D.dds").read_bytes() == f"{mod}-d".encode()
+        assert (outfits_dir / mod / "Suit_S.dds").exists()
+    assert [p.name for p in (outfits_dir / "Rainbow").iterdir()] == ["old.mtl"]
+    assert not (outfits_dir / ".Rainbow.staging").exists()
+
+
+def test_cancelled_grouping_rolls_back(config, tmp_path):
+    """Verify that a grouping cancelled before its variants are migrated leaves the sources untouched."""
+    outfits_dir = make_outfits(tmp_path, ["red", "blue"])
+    pipeline = OutfitPipeline({**config, "haydee_path": str(tmp_path), "group_workers": 2})
+    token = CancelToken()
+    token.cancel()
+
+    with pytest.raises(TaskCancelled):
+        pipeline.group_mods("Rainbow", ["red", "blue"], "color", delete_sources=True, cancel_token=token)
+
+    assert (outfits_dir / "red" / "Suit_D.dds").read_bytes() == b"red-d"
+    assert not (outfits_dir / "Rainbow").exists()
+    assert not (outfits_dir / ".Rainbow.staging").exists()
+
+
+def test_validation_verdicts_are_cached(config, tmp_path, mocker):
+    """Verify that re-validating identical images with the same style and model reuses the verdict unless bypassed."""
+    from haydee_outfit_gen.gemini_client import ValidationResult
+
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path / "cache")
+    client = mocker.Mock()
+    client.validate_texture.return_value = ValidationResult(
+        is_face_valid=True, is_torso_seams_valid=False, is_legs_valid=True, feedback="Seam break"
+    )
+    base_png, generated_png = tmp_path / "base.png", tmp_path / "out.png"
+    base_png.write_bytes(b"base")
+    generated_png.write_bytes(b"generated")
+
+    first = pipeline._validate(client, base_png, generated_png, "Style")
+    second = pipeline._validate(client, base_png, generated_png, "Style")
+    pipeline._validate(client, base_png, generated_png, "Other style")
+
+    assert client.validate_texture.call_count == 2
+    assert second == first and not second.is_valid
+
+    config["bypass_response_cache"] = True
+    pipeline._validate(client, base_png, generated_png, "Style")
+    assert client.validate_texture.call_count == 3
+
+
+def test_prompt_ideas_are_cached_per_theme(config, tmp_path, mocker):
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path / "cache")
+    mock_client = mocker.patch("src.client_registry.genai.Client").return_value
+    mock_stream = mock_client.models.generate_content_stream
+    mock_stream.side_effect = lambda **kwargs: stream_chunks('[{"name": "CyberNeon", "style": "neon"}]')
+    received = []
+
+    pipeline.generate_prompt_ideas("Cyberpunk")
+    ideas = pipeline.generate_prompt_ideas("Cyberpunk", on_idea=received.append)
+    pipeline.generate_prompt_ideas("Cyberpunk", count=5)
+
+    assert ideas == received == [{"name": "CyberNeon", "style": "neon"}]
+    assert mock_stream.call_count == 2
+
+
+def test_truncated_prompt_ideas_are_not_cached(config, tmp_path, mocker):
+    """Verify that ideas from a stream that ended before the JSON array closed are returned but not cached."""
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path / "cache")
+    mock_client = mocker.patch("src.client_registry.genai.Client").return_value
+    mock_stream = mock_client.models.generate_content_stream
+    truncated = '[{"name": "CyberNeon", "style": "neon"}, {"name": "Ru'
+    mock_stream.side_effect = lambda **kwargs: stream_chunks(truncated)
+
+    assert pipeline.generate_prompt_ideas("Cyberpunk") == [{"name": "CyberNeon", "style": "neon"}]
+
+    complete = '[{"name": "CyberNeon", "style": "neon"}]'
+    max_tokens = SimpleNamespace(text="", candidates=[SimpleNamespace(finish_reason="MAX_TOKENS")])
+    mock_stream.side_effect = lambda **kwargs: stream_chunks(complete) + [max_tokens]
+    pipeline.generate_prompt_ideas("Cyberpunk")
+
+    mock_stream.side_effect = lambda **kwargs: stream_chunks(complete)
+    pipeline.generate_prompt_ideas("Cyberpunk")
+    pipeline.generate_prompt_ideas("Cyberpunk")
+
+    assert mock_stream.call_count == 3
+
+
+def test_decode_dds_writes_png_when_in_memory_images_disabled(config, mocker, tmp_path):
+    """Verify that the temp-file mode still decodes through the decode cache and returns the PNG path."""
+    pipeline = OutfitPipeline(dict(config, in_memory_images=False), cache_dir=tmp_path)
+    decode = mocker.patch.object(pipeline.decode_cache, "dds_to_png")
+    from_dds = mocker.patch("src.pipeline.ImageBuffer.from_dds")
+
+    result = pipeline._decode_dds(tmp_path / "Suit_D.dds", tmp_path / "base.png", "4K")
+
+    assert result == tmp_path / "base.png"
+    decode.assert_called_once_with(tmp_path / "Suit_D.dds", tmp_path / "base.png", resolution="4K")
+    from_dds.assert_not_called()
+
+
+def test_decode_dds_reuses_in_memory_decodes(config, mocker, tmp_path):
+    """Verify that in-memory decodes of identical content go through the decode cache."""
+    from PIL import Image
+
+    pipeline = OutfitPipeline(config, cache_dir=tmp_path / "cache")
+    from_dds = mocker.spy(ImageBuffer, "from_dds")
+    for name in ("Suit_D.dds", "Copy_D.dds"):
+        Image.new("RGBA", (64, 64), (255, 0, 0, 255)).save(tmp_path / name, format="DDS", pixel_format="DXT5")
+
+    first = pipeline._decode_dds(tmp_path / "Suit_D.dds", tmp_path / "base.png", "4K")
+    second = pipeline._decode_dds(tmp_path / "Copy_D.dds", tmp_path / "base.png", "4K")
+
+    assert isinstance(first, ImageBuffer) and second is first
+    assert from_dds.call_count == 1
+    assert (pipeline.decode_cache.hits, pipeline.decode_cache.misses) == (1, 1)
+    assert not (tmp_path / "base.png").exists()
+
+
+def test_stale_only_rebuilds_changed_outputs(config, mocker, tmp_path):
+    """Verify that a stale-only run skips current outputs and redoes those whose inputs or files changed."""
+    outfits_dir = tmp_path / "Outfits"
+    (outfits_dir / "Haydee").mkdir(parents=True)
+    (outfits_dir / "Haydee" / "Suit_D.dds").write_bytes(b"base")
+    pipeline = OutfitPipeline(dict(config, haydee_path=str(tmp_path)), cache_dir=tmp_path / "cache")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    encode = mocker.patch.object(pipeline.dds_encoder, "encode",
+                                 side_effect=lambda kind, source, dds_path, **kwargs: Path(dds_path).write_text(f"{kind}-{encode.call_count}"))
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.validate_texture.return_value = mocker.Mock(is_valid=True, feedback="")
+
+    def encoded_kinds():
+        kinds = sorted(call.args[0] for call in encode.call_args_list)
+        encode.reset_mock()
+        return kinds
+
+    pipeline.generate_mod("Neon", "neon", True, True, True)
+    assert encoded_kinds() == ["diffuse", "normal", "specular"]
+
+    pipeline.generate_mod("Neon", "neon", True, True, True, stale_only=True)
+    assert encoded_kinds() == []
+    assert mock_client.generate_texture.call_count == 1
+
+    (outfits_dir / "Neon" / "Suit_N.dds").write_text("edited by hand")
+    pipeline.generate_mod("Neon", "neon", True, True, True, stale_only=True)
+    assert encoded_kinds() == ["normal"]
+
+    # A new style regenerates the diffuse, which makes both derived maps stale
+    pipeline.generate_mod("Neon", "rust", True, True, True, stale_only=True)
+    assert encoded_kinds() == ["diffuse", "normal", "specular"]
+    assert (outfits_dir / "Neon.outfit").exists()
+
+
+def test_cancelled_generation_restores_mod(config, mocker, tmp_path):
+    """Verify that cancelling during an API call stops the run and puts back the mod the run had cleared."""
+    outfits_dir = tmp_path / "Outfits"
+    (outfits_dir / "Haydee").mkdir(parents=True)
+    (outfits_dir / "Haydee" / "Suit_D.dds").write_bytes(b"base")
+    (outfits_dir / "Neon").mkdir()
+    (outfits_dir / "Neon" / "Suit_D.dds").write_bytes(b"previous diffuse")
+    (outfits_dir / "Neon.outfit").write_text("previous outfit", encoding="utf-8")
+
+    pipeline = OutfitPipeline(dict(config, haydee_path=str(tmp_path)))
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    encode = mocker.patch.object(pipeline.dds_encoder, "encode")
+    token = CancelToken()
+    release = threading.Event()
+    mock_client = mocker.patch("src.client_registry.GeminiModClient").return_value
+    mock_client.generate_texture.side_effect = lambda **kwargs: release.wait(10)
+    threading.Timer(0.05, token.cancel).start()
+
+    with pytest.raises(TaskCancelled):
+        pipeline.generate_mod("Neon", "neon", True, True, True, cancel_token=token)
+    release.set()
+
+    encode.assert_not_called()
+    mock_client.validate_texture.assert_not_called()
+    assert (outfits_dir / "Neon" / "Suit_D.dds").read_bytes() == b"previous diffuse"
+    assert (outfits_dir / "Neon.outfit").read_text(encoding="utf-8") == "previous outfit"
+    assert sorted(path.name for path in outfits_dir.iterdir()) == ["Haydee", "Neon", "Neon.outfit"]
+
+
+@pytest.fixture
+def draft_pipeline(config, mocker, tmp_path):
+    outfits_dir = tmp_path / "Outfits"
+    (outfits_dir / "Haydee").mkdir(parents=True)
+    (outfits_dir / "Haydee" / "Suit_D.dds").write_bytes(b"base")
+    pipeline = OutfitPipeline(dict(config, haydee_path=str(tmp_path)), cache_dir=tmp_path / "cache")
+    mocker.patch("src.pipeline.ImageBuffer.from_dds", return_value=ImageBuffer(b"decoded"))
+    mocker.patch.object(pipeline.dds_encoder, "encode")
+    client_class = mocker.patch("src.client_registry.GeminiModClient")
+    client_class.return_value.generate_texture.side_effect = lambda **kwargs: Path(kwargs["output_path"]).write_bytes(b"texture")
+    client_class.return_value.validate_texture.side_effect = [
+        mocker.Mock(is_valid=False, feedback="Face detected"),
+        mocker.Mock(is_valid=True, feedback=""),
+        mocker.Mock(is_valid=True, feedback=""),
+    ]
+    return pipeline, client_class
+
+
+def test_draft_runs_at_draft_resolution_without_touching_the_mod(draft_pipeline, tmp_path):
+    pipeline, client_class = draft_pipeline
+
+    draft = pipeline.generate_draft("Neon", "neon")
+
+    assert client_class.call_args.kwargs["image_resolution"] == "2K"
+    assert (draft["style"], draft["feedback"], draft["resolution"], draft["is_valid"]) == ("neon", ["Face detected"], "2K", True)
+    assert draft["image"].read_bytes() == b"texture"
+    assert pipeline.drafts.load("Neon")["image"] == draft["image"]
+    pipeline.dds_encoder.encode.assert_not_called()
+    assert sorted(path.name for path in (tmp_path / "Outfits").iterdir()) == ["Haydee"]
+    assert pipeline.run_history.runs[-1]["resolution"] == "2K"
+
+
+def test_finalize_upscales_the_approved_draft(draft_pipeline, tmp_path):
+    """Verify that finalizing reuses the draft as the diffuse instead of generating it again."""
+    pipeline, client_class = draft_pipeline
+    draft = pipeline.generate_draft("Neon", "neon")
+    client = client_class.return_value
+    client.generate_texture.reset_mock()
+
+    pipeline.finalize_draft("Neon", gen_n=False)
+
+    client.generate_texture.assert_not_called()
+    assert client.generate_material_mask.call_args.kwargs["diffuse_image_path"] == draft["image"]
+    encodes = {call.args[0]: call for call in pipeline.dds_encoder.encode.call_args_list}
+    assert sorted(encodes) == ["diffuse", "specular"]
+    assert encodes["diffuse"].args[1] == draft["image"]
+    assert encodes["diffuse"].kwargs["resolution"] == "4K"
+    assert (tmp_path / "Outfits" / "Neon").is_dir()
+
+
+def test_finalize_regenerates_from_draft_with_its_feedback(draft_pipeline):
+    """Verify that a regenerated diffuse restyles the draft but is validated against the base Suit_D."""
+    pipeline, client_class = draft_pipeline
+    pipeline.config["finalize_mode"] = "regenerate"
+    draft = pipeline.generate_draft("Neon", "neon")
+
+    pipeline.finalize_draft("Neon", gen_s=False, gen_n=False)
+
+    client = client_class.return_value
+    assert client_class.call_args.kwargs["image_resolution"] == "4K"
+    assert client.generate_texture.call_args.kwargs["base_image_path"] == draft["image"]
+    assert client.generate_texture.call_args.kwargs["previous_feedback"] == "Face detected"
+    assert client.generate_texture.call_args.kwargs["style"] == "neon"
+    assert client.validate_texture.call_args.kwargs["base_image_path"].read() == b"decoded"
+
+
+def test_finalize_refuses_drafts_that_failed_qa(draft_pipeline, mocker):
+    pipeline, client_class = draft_pipeline
+    client_class.return_value.validate_texture.side_effect = None
+    client_class.return_value.validate_texture.return_value = mocker.Mock(is_valid=False, feedback="Seams")
+    assert pipeline.generate_draft("Neon", "neon")["is_valid"] is False
+
+    with pytest.raises(ValueError, match="did not pass QA"):
+        pipeline.finalize_draft("Neon")
+    pipeline.dds_encoder.encode.assert_not_called()
+
+    pipeline.finalize_draft("Neon", allow_failed=True)
+    assert pipeline.dds_encoder.encode.called
+
+
+def test_finalize_requires_a_draft(pipeline):
+    with pytest.raises(FileNotFoundError, match="Generate a draft first"):
+        pipeline.finalize_draft("NeverDrafted")
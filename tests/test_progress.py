@@ -0,0 +1,80 @@
+import io
+import json
+
+import pytest
+
+from src.progress import ProgressReporter, ProgressTracker, StageHistory, format_duration, json_lines_listener
+
+
+def test_stage_events_report_bytes_and_elapsed(tmp_path):
+    reporter = ProgressReporter()
+    events = []
+    reporter.subscribe(events.append)
+    output = tmp_path / "Suit_D.dds"
+
+    with reporter.stage("NeonSurge", "encode", label="Suit_D.dds", output=output):
+        output.write_bytes(b"x" * 128)
+    with pytest.raises(RuntimeError):
+        with reporter.stage("NeonSurge", "validate"):
+            raise RuntimeError("API Failed")
+
+    assert [(e["event"], e["stage"]) for e in events] == [
+        ("stage_start", "encode"), ("stage_end", "encode"), ("stage_start", "validate"), ("stage_end", "validate"),
+    ]
+    assert events[1]["bytes"] == 128 and events[1]["status"] == "ok" and events[1]["elapsed"] >= 0
+    assert events[3]["status"] == "error" and "bytes" not in events[3]
+    # Failed stages do not skew the ETA history
+    assert "validate" not in reporter.history.durations
+
+
+def test_stage_history_moving_average_is_persisted(tmp_path):
+    history = StageHistory(tmp_path / "stage_history.json", smoothing=0.5)
+    assert history.expected("generate") == 60.0
+
+    history.record("generate", 40.0)
+    history.record("generate", 20.0)
+
+    assert StageHistory(tmp_path / "stage_history.json").expected("generate") == 30.0
+
+
+def test_tracker_fraction_and_eta(mocker):
+    mock_time = mocker.patch("src.progress.time.monotonic", return_value=100.0)
+    history = StageHistory()
+    history.durations = {"generate": 30.0, "validate": 10.0}
+    tracker = ProgressTracker(history, "NeonSurge")
+
+    tracker({"event": "plan", "task": "NeonSurge", "stages": ["generate", "validate"]})
+    assert tracker.snapshot() == (0.0, 40.0)
+
+    tracker({"event": "stage_start", "task": "NeonSurge", "stage": "generate", "label": "attempt 1"})
+    mock_time.return_value = 110.0
+    assert tracker.snapshot() == (0.25, 30.0)
+    assert tracker.current == "generate attempt 1"
+
+    # Events of other tasks (e.g. a batch job running in the background) are ignored
+    tracker({"event": "stage_end", "task": "Other", "stage": "generate"})
+    tracker({"event": "stage_end", "task": "NeonSurge", "stage": "generate", "label": "attempt 1"})
+    assert tracker.snapshot() == (0.75, 10.0)
+
+    # An unplanned retry extends the total without moving the bar backwards
+    tracker({"event": "stage_start", "task": "NeonSurge", "stage": "generate", "label": "attempt 2"})
+    assert tracker.snapshot() == (0.75, 40.0)
+
+
+def test_json_lines_listener():
+    stream = io.StringIO()
+    reporter = ProgressReporter()
+    reporter.subscribe(json_lines_listener(stream))
+
+    reporter.plan("Rainbow", ["migrate", "write"])
+    with reporter.stage("Rainbow", "write"):
+        pass
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["event"] for e in events] == ["plan", "stage_start", "stage_end"]
+    assert events[0]["stages"] == ["migrate", "write"]
+
+
+def test_format_duration():
+    assert format_duration(42.4) == "42s"
+    assert format_duration(125) == "2m 05s"
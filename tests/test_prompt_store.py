@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from src.config_manager import ConfigManager
+from src.prompt_store import PromptStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PromptStore(tmp_path / "prompts.db")
+    yield store
+    store.close()
+
+
+def test_add_keeps_newest_first_and_dedupes_by_name(store):
+    store.add_many([{"name": "Neon", "style": "glowing lines"}, {"name": "Candy", "style": "glossy sugar"}])
+    store.add("Rust", "corroded metal")
+    store.add("Candy", "matte sugar")
+
+    assert store.list() == [
+        {"name": "Candy", "style": "matte sugar"},
+        {"name": "Rust", "style": "corroded metal"},
+        {"name": "Neon", "style": "glowing lines"},
+    ]
+    assert store.count() == 3
+
+
+def test_remove(store):
+    store.add("Neon", "glowing lines")
+
+    assert store.remove("Neon") is True
+    assert store.remove("Neon") is False
+    assert store.get("Neon") is None
+
+
+def test_full_text_search(store):
+    """Verify that search matches words in names and styles, prefix-matches the last word and survives updates."""
+    store.add_many([
+        {"name": "Neon", "style": "glowing cyberpunk lines"},
+        {"name": "Candy", "style": "glossy pink sugar"},
+        {"name": "Cyber", "style": "chrome plates"},
+    ])
+    store.add("Candy", "matte chrome sugar")
+
+    assert [p["name"] for p in store.list("cyber")] == ["Neon", "Cyber"]
+    assert [p["name"] for p in store.list("chrome sug")] == ["Candy"]
+    assert store.list("glossy") == []
+    assert store.count('pink "OR') == 0
+    assert store.list("chrome", limit=1) == [{"name": "Candy", "style": "matte chrome sugar"}]
+
+
+def test_import_legacy_prompts(tmp_path, store):
+    """Verify that saved_prompts is moved out of settings.json once, keeping order and dropping duplicates."""
+    (tmp_path / "settings.json").write_text(json.dumps({"saved_prompts": [
+        {"name": "Neon", "style": "glowing lines"},
+        {"name": "Candy", "style": "glossy sugar"},
+        {"name": "Neon", "style": "older neon"},
+        {"name": "Broken"},
+    ]}), encoding="utf-8")
+    config_manager = ConfigManager(config_dir=tmp_path)
+
+    assert store.import_legacy(config_manager) == 2
+    assert store.list() == [{"name": "Neon", "style": "glowing lines"}, {"name": "Candy", "style": "glossy sugar"}]
+    config_manager.flush()
+    assert "saved_prompts" not in json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))
+
+    assert store.import_legacy(ConfigManager(config_dir=tmp_path)) == 0
+    assert store.count() == 2
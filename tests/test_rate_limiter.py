@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from src.client_registry import ClientRegistry
+from benchmarks.fake_gemini import FakeGeminiTransport
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+def test_aimd_adjusts_rate_and_concurrency():
+    """Verify that throttling halves the rate and concurrency limit and successes win them back."""
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, max_concurrency=4, base_backoff=0)
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert (limiter.rate, limiter.limit) == (3000, 2)
+
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release()
+    assert (limiter.rate, limiter.limit) == (4200, 3)
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release()
+    assert (limiter.rate, limiter.limit) == (6000, 4)
+
+
+def test_quota_errors_are_retried_after_shared_backoff():
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, base_backoff=0.2)
+    attempts = []
+
+    def flaky_call():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert limiter.call(flaky_call) == "ok"
+    assert attempts[1] - attempts[0] >= 0.2
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_unavailable_errors_slow_down_but_are_not_retried():
+    """Verify that 503s are left to the library retry loop and only reduce the rate."""
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, base_backoff=0)
+
+    def overloaded():
+        raise RuntimeError("503 UNAVAILABLE")
+
+    with pytest.raises(RuntimeError, match="503"):
+        limiter.call(overloaded)
+    assert limiter.rate == 30
+
+
+def test_concurrency_limit_is_shared_across_threads():
+    limiter = AdaptiveRateLimiter(requests_per_minute=60000, max_concurrency=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    threads = [threading.Thread(target=limiter.call, args=(work,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+
+
+def test_registry_routes_requests_through_limiter():
+    """Verify that a 429 from the API is absorbed by the limiter of the shared client."""
+    transport = FakeGeminiTransport(text_response="hello")
+    transport.error_statuses = [429]
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, base_backoff=0)
+    client = ClientRegistry(transport=transport, limiter=limiter).genai_client("key")
+
+    response = client.models.generate_content(model="validator", contents="Hi")
+
+    assert response.text == "hello"
+    assert len(transport.requests) == 2
+    assert limiter.rate < 6000
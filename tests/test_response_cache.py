@@ -0,0 +1,37 @@
+from src.response_cache import ResponseCache, cache_key
+
+
+def test_hit_after_put_and_persisted(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.json")
+    key = cache_key("model", "instruction", "Cyberpunk")
+
+    assert cache.get("prompt_ideas", key) is None
+    cache.put(key, [{"name": "CyberNeon", "style": "neon"}])
+
+    reloaded = ResponseCache(tmp_path / "responses.json")
+    assert reloaded.get("prompt_ideas", key) == [{"name": "CyberNeon", "style": "neon"}]
+    assert (cache.hits, cache.misses) == ({}, {"prompt_ideas": 1})
+    assert reloaded.hits == {"prompt_ideas": 1}
+
+
+def test_expired_entries_are_misses(tmp_path, mocker):
+    cache = ResponseCache(tmp_path / "responses.json", ttl_seconds=60)
+    mock_time = mocker.patch("src.response_cache.time.time", return_value=1000)
+    cache.put("key", "value")
+
+    mock_time.return_value = 1059
+    assert cache.get("validation", "key") == "value"
+    mock_time.return_value = 1061
+    assert cache.get("validation", "key") is None
+    assert "key" not in ResponseCache(tmp_path / "responses.json").entries
+
+
+def test_lru_eviction(tmp_path):
+    """Verify that the least recently used entry is dropped once max_entries is exceeded."""
+    cache = ResponseCache(tmp_path / "responses.json", max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("validation", "a")
+    cache.put("c", 3)
+
+    assert list(cache.entries) == ["a", "c"]
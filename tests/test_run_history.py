@@ -0,0 +1,79 @@
+import pytest
+
+from src.run_history import RunHistory, RunRecorder, format_report, percentile
+
+
+def make_run(model="flash", resolution="4K", generate=(40.0,), validate=10.0, status="ok", qa_passed=True):
+    stages = [{"stage": "generate", "elapsed": elapsed, "status": "ok", "model": model} for elapsed in generate]
+    stages.append({"stage": "validate", "elapsed": validate, "status": "ok", "model": "pro"})
+    return {"mod": "Mod", "started": 0, "resolution": resolution, "model": model, "validator_model": "pro",
+            "qa_mode": "sequential", "stages": stages, "elapsed": sum(generate) + validate,
+            "attempts": len(generate), "status": status, "qa_passed": qa_passed}
+
+
+def test_percentile():
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([10.0, 0.0, 5.0], 95) == pytest.approx(9.5)
+
+
+def test_recorder_collects_stage_ends_of_its_run(mocker):
+    mock_time = mocker.patch("src.run_history.time.monotonic", return_value=0.0)
+    recorder = RunRecorder("NeonSurge", resolution="2K", model="flash", validator_model="pro", qa_mode="sequential")
+
+    recorder({"event": "stage_start", "task": "NeonSurge", "stage": "generate"})
+    recorder({"event": "stage_end", "task": "NeonSurge", "stage": "generate", "label": "attempt 1", "elapsed": 30.0, "status": "ok"})
+    recorder({"event": "stage_end", "task": "Other", "stage": "generate", "elapsed": 5.0, "status": "ok"})
+    recorder({"event": "stage_end", "task": "NeonSurge", "stage": "validate", "elapsed": 9.0, "status": "error"})
+    recorder({"event": "qa", "task": "Other", "passed": True})
+    mock_time.return_value = 42.0
+
+    run = recorder.finish(RuntimeError("API Failed"))
+
+    assert run["stages"] == [
+        {"stage": "generate", "label": "attempt 1", "elapsed": 30.0, "status": "ok", "model": "flash"},
+        {"stage": "validate", "elapsed": 9.0, "status": "error", "model": "pro"},
+    ]
+    assert (run["elapsed"], run["attempts"], run["status"], run["error"], run["qa_passed"]) == (42.0, 1, "failed", "API Failed", None)
+
+
+def test_history_stats_are_persisted_and_capped(tmp_path):
+    history = RunHistory(tmp_path / "run_history.json", max_runs=3)
+    history.add(make_run(generate=(100.0,)))
+    history.add(make_run(generate=(40.0, 60.0), qa_passed=False))
+    history.add(make_run(generate=(20.0,)))
+    history.add(make_run(model="pro-image", resolution="2K", generate=(50.0,)))
+
+    reloaded = RunHistory(tmp_path / "run_history.json")
+    assert len(reloaded.runs) == 3
+
+    stage_stats = {(row["stage"], row["model"], row["resolution"]): row for row in reloaded.stage_stats()}
+    assert stage_stats[("generate", "flash", "4K")]["count"] == 3
+    assert stage_stats[("generate", "flash", "4K")]["p50"] == 40.0
+    assert stage_stats[("validate", "pro", "2K")]["count"] == 1
+
+    run_stats = {(row["model"], row["resolution"]): row for row in reloaded.run_stats()}
+    assert run_stats[("flash", "4K")]["pass_rate"] == 0.5
+    assert run_stats[("flash", "4K")]["attempts"] == 1.5
+
+    report = format_report(reloaded)
+    assert "pro-image" in report and "generate" in report
+
+
+def test_empty_report(tmp_path):
+    assert format_report(RunHistory(tmp_path / "run_history.json")) == "No generation runs recorded yet."
+
+
+def test_pass_rate_counts_qa_verdicts_not_crashes(tmp_path):
+    """Verify that a shipped texture that failed QA lowers the pass rate, while crashed and QA-less runs do not count."""
+    history = RunHistory(tmp_path / "run_history.json")
+    history.add(make_run(qa_passed=True))
+    history.add(make_run(qa_passed=False))
+    history.add(make_run(qa_passed=None, status="failed"))
+    history.add(make_run(model="pro-image", qa_passed=None))
+
+    run_stats = {row["model"]: row for row in history.run_stats()}
+    assert run_stats["flash"]["pass_rate"] == 0.5
+    assert run_stats["pro-image"]["pass_rate"] is None
+    pro_image_row = next(line for line in format_report(history).splitlines() if line.startswith("pro-image"))
+    assert pro_image_row.split()[-2] == "-"
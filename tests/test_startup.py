@@ -0,0 +1,27 @@
+from src.startup import StartupTimer
+
+
+def test_startup_report(mocker):
+    mock_time = mocker.patch("src.startup.time.perf_counter", return_value=10.0)
+    timer = StartupTimer()
+
+    mock_time.return_value = 10.5
+    timer.mark("imports")
+    mock_time.return_value = 11.25
+    timer.mark("window built")
+
+    assert timer.unpack_seconds is None
+    assert timer.report() == "Startup timing: imports 0.50s → window built 1.25s"
+
+
+def test_one_file_unpack_estimate(mocker, tmp_path):
+    bundle_dir = tmp_path / "_MEI12345"
+    bundle_dir.mkdir()
+    mocker.patch("src.startup.sys._MEIPASS", str(bundle_dir), create=True)
+    mocker.patch("src.startup.os.path.getctime", return_value=100.0)
+    mocker.patch("src.startup.time.time", return_value=103.0)
+
+    timer = StartupTimer()
+
+    assert 2.9 < timer.unpack_seconds <= 3.0
+    assert timer.report().startswith("Startup timing: one-file unpack ~")